@@ -42,6 +42,7 @@ base_requirements = {
     "pydantic>=1.5.1",
     "dictdiffer",
     "ratelimit",
+    "fastavro>=1.2.0",
 }
 
 framework_common = {
@@ -90,6 +91,17 @@ plugins: Dict[str, Set[str]] = {
         "deepdiff>=6.3.1"
     },
     # Transformer Plugins (None yet)
+    # Dead Letter Writer Plugins
+    "zstd": {
+        "zstandard>=0.18.0",
+    },
+    # Event Codecs
+    "orjson": {
+        "orjson>=3.6.0",
+    },
+    "msgpack": {
+        "msgpack>=1.0.0",
+    },
 }
 
 mypy_stubs = {
@@ -182,6 +194,7 @@ entry_points = {
     ],
     "datahub_actions.transformer.plugins": [],
     "datahub_actions.source.plugins": [],
+    "datahub_actions.dead_letter.plugins": [],
 }
 
 
@@ -13,6 +13,7 @@
 # limitations under the License.
 
 from abc import ABCMeta, abstractmethod
+from typing import List
 
 from datahub.ingestion.api.closeable import Closeable
 
@@ -40,3 +41,14 @@ class Action(Closeable, metaclass=ABCMeta):
     def act(self, event: EventEnvelope) -> None:
         """Take Action on DataHub events, provided an instance of a DataHub event."""
         pass
+
+    def act_batch(self, events: List[EventEnvelope]) -> None:
+        """
+        Take Action on a micro-batch of DataHub events.
+
+        This is invoked in place of `act` when the Pipeline is configured with a `batch_size` greater than 1.
+        The default implementation simply invokes `act` on each event in order. Actions which can amortize
+        per-call overhead across many events (e.g. bulk writes) should override this method.
+        """
+        for event in events:
+            self.act(event)
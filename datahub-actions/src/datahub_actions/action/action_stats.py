@@ -13,28 +13,46 @@
 # limitations under the License.
 
 import json
+from typing import Dict
 
+from datahub_actions.utils.sharded_counter import ShardedCounter
 
-# Class that stores running statistics for a single Action.
+
+# Class that stores running statistics for a single Action. Safe to increment from multiple threads.
 # TODO: Invocation time tracking.
 class ActionStats:
-    # The number of exception raised by the Action.
-    exception_count: int = 0
+    def __init__(self) -> None:
+        # The number of exception raised by the Action.
+        self._exception_count = ShardedCounter()
+
+        # The number of events that were actually submitted to the Action
+        self._success_count = ShardedCounter()
 
-    # The number of events that were actually submitted to the Action
-    success_count: int = 0
+    @property
+    def exception_count(self) -> int:
+        return self._exception_count.value
+
+    @property
+    def success_count(self) -> int:
+        return self._success_count.value
 
     def increment_exception_count(self) -> None:
-        self.exception_count = self.exception_count + 1
+        self._exception_count.increment()
 
     def get_exception_count(self) -> int:
         return self.exception_count
 
-    def increment_success_count(self) -> None:
-        self.success_count = self.success_count + 1
+    def increment_success_count(self, count: int = 1) -> None:
+        self._success_count.increment(count)
 
     def get_success_count(self) -> int:
         return self.success_count
 
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            "exception_count": self.exception_count,
+            "success_count": self.success_count,
+        }
+
     def as_string(self) -> str:
-        return json.dumps(self.__dict__, indent=4, sort_keys=True)
+        return json.dumps(self.as_dict(), indent=4, sort_keys=True)
@@ -0,0 +1,41 @@
+# Copyright 2021 Acryl Data, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import asyncio
+from abc import ABCMeta, abstractmethod
+
+from datahub_actions.action.action import Action
+from datahub_actions.event.event_envelope import EventEnvelope
+
+
+class AsyncAction(Action, metaclass=ABCMeta):
+    """
+    The base class for DataHub Actions which are natively asynchronous.
+
+    When a Pipeline is run on an asyncio event loop, `act_async` is awaited directly on the loop,
+    which allows a single process to keep many network calls (e.g. to DataHub or a webhook) in flight
+    without dedicating an OS thread to each. Synchronous Actions are instead run in a thread pool executor.
+
+    An AsyncAction can also be run by a synchronous Pipeline, in which case each invocation of `act`
+    runs `act_async` to completion on a private event loop.
+    """
+
+    @abstractmethod
+    async def act_async(self, event: EventEnvelope) -> None:
+        """Take Action on DataHub events, provided an instance of a DataHub event."""
+        pass
+
+    def act(self, event: EventEnvelope) -> None:
+        asyncio.run(self.act_async(event))
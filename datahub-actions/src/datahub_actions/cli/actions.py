@@ -69,8 +69,13 @@ def actions() -> None:
 )
 @click.option("-c", "--config", required=True, type=str, multiple=True)
 @click.option("--debug/--no-debug", default=False)
+@click.option(
+    "--event-loop/--no-event-loop",
+    default=False,
+    help="Host all pipelines on a single asyncio event loop, instead of one thread per pipeline.",
+)
 @click.pass_context
-def run(ctx: Any, config: List[str], debug: bool) -> None:
+def run(ctx: Any, config: List[str], debug: bool, event_loop: bool) -> None:
     """Execute one or more Actions Pipelines"""
 
     logger.info(
@@ -115,7 +120,7 @@ def run(ctx: Any, config: List[str], debug: bool) -> None:
 
     # Start each pipeline.
     for p in pipelines:
-        pipeline_manager.start_pipeline(p.name, p)
+        pipeline_manager.start_pipeline(p.name, p, use_event_loop=event_loop)
         logger.info(f"Action Pipeline with name '{p.name}' is now running.")
 
     # Now, simply run forever.
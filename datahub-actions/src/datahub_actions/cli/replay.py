@@ -0,0 +1,127 @@
+# Copyright 2021 Acryl Data, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import logging
+import pathlib
+import time
+from typing import Optional, Tuple
+
+import click
+from datahub.configuration.config_loader import load_config_file
+
+from datahub_actions.cli.actions import pipeline_config_to_pipeline
+from datahub_actions.plugin.source.failed_events.failed_events_source import (
+    FailedEventsSource,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@click.command()
+@click.option(
+    "-c",
+    "--config",
+    required=True,
+    type=str,
+    help="Config of the pipeline to replay events through. Its transformers, action and dead letter queue are used, its source is ignored.",
+)
+@click.option(
+    "-f",
+    "--file",
+    "files",
+    required=True,
+    type=str,
+    multiple=True,
+    help="A failed events file, or a directory of rotated (and possibly compressed) failed events files. May be repeated.",
+)
+@click.option(
+    "--format",
+    "file_format",
+    type=str,
+    default="json",
+    show_default=True,
+    help="How the failed events were written, either 'json' or 'msgpack'.",
+)
+@click.option(
+    "--parallelism",
+    type=int,
+    default=1,
+    show_default=True,
+    help="The max number of events replayed concurrently.",
+)
+@click.option(
+    "--rate-limit",
+    type=float,
+    default=None,
+    help="The max number of events replayed per second. Unlimited by default.",
+)
+@click.option(
+    "--checkpoint-file",
+    type=str,
+    default=None,
+    help="Where to record progress. Running the same command again resumes an interrupted replay.",
+)
+@click.option(
+    "--progress-interval",
+    type=int,
+    default=10,
+    show_default=True,
+    help="How often to report progress and throughput, in seconds.",
+)
+def replay(
+    config: str,
+    files: Tuple[str, ...],
+    file_format: str,
+    parallelism: int,
+    rate_limit: Optional[float],
+    checkpoint_file: Optional[str],
+    progress_interval: int,
+) -> None:
+    """Replay failed events logs through an Actions Pipeline"""
+
+    pipeline_config_dict = load_config_file(pathlib.Path(config))
+
+    # Swap the pipeline's source for the failed events being replayed.
+    pipeline_config_dict["enabled"] = True
+    pipeline_config_dict["source"] = {
+        "type": "failed_events",
+        "config": {
+            "paths": list(files),
+            "format": file_format,
+            "rate_limit": rate_limit,
+            "checkpoint_file": checkpoint_file,
+            "progress_interval_ms": progress_interval * 1000,
+        },
+    }
+    options = pipeline_config_dict.get("options") or {}
+    options["max_concurrency"] = parallelism
+    if "ordering_key" not in options:
+        # Failed events often share their original partition, so only preserve ordering per entity by default.
+        options["ordering_key"] = "ENTITY_URN"
+    pipeline_config_dict["options"] = options
+
+    pipeline = pipeline_config_to_pipeline(pipeline_config_dict)
+    assert isinstance(pipeline.source, FailedEventsSource)
+
+    logger.info(f"Replaying failed events through pipeline '{pipeline.name}'...")
+    started_at = time.monotonic()
+    try:
+        pipeline.run()
+    finally:
+        # Closing the source records the final checkpoint.
+        pipeline.stop()
+    click.echo(
+        f"Replayed {pipeline.source.acked_count} events through pipeline '{pipeline.name}' in {time.monotonic() - started_at:.1f}s"
+    )
@@ -0,0 +1,49 @@
+# Copyright 2021 Acryl Data, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from abc import ABCMeta, abstractmethod
+
+from datahub.ingestion.api.closeable import Closeable
+
+from datahub_actions.event.event_envelope import EventEnvelope
+from datahub_actions.pipeline.pipeline_context import PipelineContext
+
+
+class DeadLetterWriter(Closeable, metaclass=ABCMeta):
+    """
+    The base class for all DataHub Dead Letter Writers.
+
+    A Dead Letter Writer records the events which a Pipeline failed to process after exhausting its retries,
+    so that they can be investigated or replayed later.
+
+    Writers are free to buffer events, but must write out everything they have buffered when `flush`
+    or `close` is invoked. Writing to a writer which has been closed raises an exception.
+    """
+
+    @classmethod
+    @abstractmethod
+    def create(cls, config_dict: dict, ctx: PipelineContext) -> "DeadLetterWriter":
+        """Factory method to create an instance of a Dead Letter Writer"""
+        pass
+
+    @abstractmethod
+    def write(self, event: EventEnvelope) -> None:
+        """Records an event which failed to be processed."""
+        pass
+
+    @abstractmethod
+    def flush(self) -> None:
+        """Writes out any buffered events."""
+        pass
@@ -0,0 +1,31 @@
+# Copyright 2021 Acryl Data, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from datahub.ingestion.api.registry import PluginRegistry
+
+from datahub_actions.dead_letter.dead_letter_writer import DeadLetterWriter
+from datahub_actions.plugin.dead_letter.file.file_dead_letter_writer import (
+    FileDeadLetterWriter,
+)
+from datahub_actions.plugin.dead_letter.kafka.kafka_dead_letter_writer import (
+    KafkaDeadLetterWriter,
+)
+
+dead_letter_writer_registry = PluginRegistry[DeadLetterWriter]()
+dead_letter_writer_registry.register_from_entrypoint(
+    "datahub_actions.dead_letter.plugins"
+)
+dead_letter_writer_registry.register("file", FileDeadLetterWriter)
+dead_letter_writer_registry.register("kafka", KafkaDeadLetterWriter)
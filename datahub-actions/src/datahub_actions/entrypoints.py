@@ -19,10 +19,11 @@ import sys
 import click
 import stackprinter
 from datahub.cli.cli_utils import get_boolean_env_variable
-from prometheus_client import start_http_server
 
 import datahub_actions as datahub_package
-from datahub_actions.cli.actions import actions
+from datahub_actions.cli.actions import actions, pipeline_manager
+from datahub_actions.cli.replay import replay
+from datahub_actions.utils.monitoring_server import start_monitoring_server
 
 logger = logging.getLogger(__name__)
 
@@ -47,7 +48,7 @@ MAX_CONTENT_WIDTH = 120
     type=bool,
     is_flag=True,
     default=False,
-    help="Enable prometheus monitoring endpoint. You can set the portnumber with --monitoring-port.",
+    help="Enable prometheus monitoring endpoint, and a readiness probe on /ready. You can set the portnumber with --monitoring-port.",
 )
 @click.option(
     "--monitoring-port",
@@ -102,7 +103,7 @@ def datahub_actions(
         logging.getLogger().setLevel(logging.WARNING)
         datahub_logger.setLevel(logging.INFO)
     if enable_monitoring:
-        start_http_server(monitoring_port)
+        start_monitoring_server(monitoring_port, pipeline_manager.is_ready)
     # Setup the context for the memory_leak_detector decorator.
     ctx.ensure_object(dict)
     ctx.obj["detect_memory_leaks"] = detect_memory_leaks
@@ -138,3 +139,4 @@ def main(**kwargs):
 
 
 datahub_actions.add_command(actions)
+datahub_actions.add_command(replay)
@@ -13,6 +13,9 @@
 # limitations under the License.
 
 from abc import ABCMeta, abstractmethod
+from typing import Any
+
+from datahub_actions.event.json_util import json_dumps, json_loads
 
 
 class Event(metaclass=ABCMeta):
@@ -32,3 +35,16 @@ class Event(metaclass=ABCMeta):
         """
         Convert the event into its JSON representation.
         """
+
+    @classmethod
+    def from_json_obj(cls, json_obj: Any) -> "Event":
+        """
+        Convert from the parsed json format into the event object.
+        """
+        return cls.from_json(json_dumps(json_obj))
+
+    def as_json_obj(self) -> Any:
+        """
+        Convert the event into its parsed JSON representation.
+        """
+        return json_loads(self.as_json())
@@ -0,0 +1,124 @@
+# Copyright 2021 Acryl Data, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+import struct
+from abc import ABCMeta, abstractmethod
+from typing import Any, Iterator
+
+from datahub.configuration.common import ConfigurationError
+from datahub.ingestion.api.registry import PluginRegistry
+
+from datahub_actions.event.event_envelope import EventEnvelope
+from datahub_actions.event.json_util import json_dumps, json_loads
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Frames each record appended to a log of binary encoded events, as a 4 byte big-endian length.
+RECORD_LENGTH = struct.Struct(">I")
+
+
+class EventCodec(metaclass=ABCMeta):
+    """
+    Serializes enveloped events, e.g. to spool them to disk or to append them to a failed events log.
+    """
+
+    # The extension of files holding events encoded with the codec.
+    file_suffix: str
+
+    @abstractmethod
+    def dumps(self, obj: Any) -> bytes:
+        """
+        Encodes a JSON compatible object, e.g. an enveloped event as returned by `EventEnvelope.as_dict`.
+        """
+
+    @abstractmethod
+    def loads(self, data: bytes) -> Any:
+        """
+        Decodes an object encoded with `dumps`.
+        """
+
+    def encode(self, envelope: EventEnvelope) -> bytes:
+        return self.dumps(envelope.as_dict())
+
+    def decode(self, data: bytes) -> EventEnvelope:
+        return EventEnvelope.from_json_obj(self.loads(data))
+
+    def encode_record(self, envelope: EventEnvelope) -> bytes:
+        """
+        Encodes an event as a record which can be appended to a log of events. By default, records are length-prefixed.
+        """
+        data = self.encode(envelope)
+        return RECORD_LENGTH.pack(len(data)) + data
+
+    def read_records(self, stream: io.BufferedIOBase) -> Iterator[bytes]:
+        """
+        Reads the records of a log of events written with `encode_record`, yielding each one to be decoded with `decode`.
+        """
+        while True:
+            header = stream.read(RECORD_LENGTH.size)
+            if len(header) < RECORD_LENGTH.size:
+                return
+            (length,) = RECORD_LENGTH.unpack(header)
+            data = stream.read(length)
+            if len(data) < length:
+                # The last record is still being written.
+                return
+            yield data
+
+
+class JsonEventCodec(EventCodec):
+    file_suffix = ".json"
+
+    def dumps(self, obj: Any) -> bytes:
+        return json_dumps(obj).encode("utf-8")
+
+    def loads(self, data: bytes) -> Any:
+        return json_loads(data)
+
+    def encode(self, envelope: EventEnvelope) -> bytes:
+        # Reuses the envelope's cached JSON form of the event.
+        return envelope.as_json().encode("utf-8")
+
+    # JSON events are written as lines, so that logs of them can be read and grepped as text.
+    def encode_record(self, envelope: EventEnvelope) -> bytes:
+        return self.encode(envelope) + b"\n"
+
+    def read_records(self, stream: io.BufferedIOBase) -> Iterator[bytes]:
+        return iter(stream.readline, b"")
+
+
+# A compact binary encoding. Unlike JSON, it cannot be written as lines of text, so records are length-prefixed.
+class MsgpackEventCodec(EventCodec):
+    file_suffix = ".msgpack"
+
+    def __init__(self) -> None:
+        if msgpack is None:
+            raise ConfigurationError(
+                "The msgpack event codec requires the msgpack package. Install it using `pip install 'acryl-datahub-actions[msgpack]'`."
+            )
+
+    def dumps(self, obj: Any) -> bytes:
+        return msgpack.packb(obj)
+
+    def loads(self, data: bytes) -> Any:
+        return msgpack.unpackb(data)
+
+
+event_codec_registry = PluginRegistry[EventCodec]()
+event_codec_registry.register("json", JsonEventCodec)
+event_codec_registry.register("msgpack", MsgpackEventCodec)
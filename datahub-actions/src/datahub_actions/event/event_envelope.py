@@ -12,19 +12,30 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import json
 import logging
-from dataclasses import dataclass
-from typing import Any, Dict
+import sys
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
 
 from datahub_actions.event.event import Event
 from datahub_actions.event.event_registry import event_registry
+from datahub_actions.event.json_util import json_dumps, json_loads
 
 logger = logging.getLogger(__name__)
 
+# Envelopes are slotted where dataclasses support it, since many of them may be buffered at once.
+_DATACLASS_OPTIONS: Dict[str, bool] = (
+    {"slots": True} if sys.version_info >= (3, 10) else {}
+)
+
 
 # An object representation of the actual change event.
-@dataclass
+#
+# An enveloped event is typically serialized several times, e.g. for logging, by the Action and again when it fails to
+# be processed. The JSON form of the event is therefore computed once and cached, until the event is replaced. Events
+# are treated as immutable once enveloped: if one is modified in place, call `invalidate` to drop the cached form.
+# The meta bag is small and modified in place by Event Sources, so it is serialized anew on each call.
+@dataclass(**_DATACLASS_OPTIONS)
 class EventEnvelope:
     # The type of the event. This corresponds to the shape of the payload.
     event_type: str
@@ -35,26 +46,62 @@ class EventEnvelope:
     # Arbitrary metadata about the event
     meta: Dict[str, Any]
 
+    # The cached JSON form of the event, and the event it was computed from. Not part of the envelope's value.
+    _event_json: Optional[str] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _event_json_source: Optional[Event] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    def invalidate(self) -> None:
+        """
+        Drops the cached serialized form of the event, e.g. after the event was modified in place.
+        """
+        self._event_json = None
+        self._event_json_source = None
+
     # Convert an enveloped event to JSON representation
     def as_json(self) -> str:
-        # Be careful about converting meta bag, since anything can be put inside at runtime.
-        meta_json = None
-        try:
-            if self.meta is not None:
-                meta_json = json.dumps(self.meta)
-        except Exception:
-            logger.warn(
-                f"Failed to serialize meta field of EventEnvelope to json {self.meta}. Ignoring it during serialization."
-            )
-        result = f'{{ "event_type": "{self.event_type}", "event": {self.event.as_json()}, "meta": {meta_json if meta_json is not None else "null"} }}'
+        result = f'{{ "event_type": "{self.event_type}", "event": {self._get_event_json()}, "meta": {self._get_meta_json()} }}'
         return result
 
+    # Convert an enveloped event to its parsed JSON representation. The result is a copy, so may be modified freely.
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "event_type": self.event_type,
+            "event": json_loads(self._get_event_json()),
+            "meta": json_loads(self._get_meta_json()),
+        }
+
     # Convert a json event envelope back into the object.
     @classmethod
     def from_json(cls, json_str: str) -> "EventEnvelope":
-        json_obj = json.loads(json_str)
+        return cls.from_json_obj(json_loads(json_str))
+
+    # Convert a parsed json event envelope back into the object, e.g. as returned by `as_dict`.
+    @classmethod
+    def from_json_obj(cls, json_obj: Dict[str, Any]) -> "EventEnvelope":
         event_type = json_obj["event_type"]
         event_class = event_registry.get(event_type)
-        event = event_class.from_json(json.dumps(json_obj["event"]))
+        event = event_class.from_json_obj(json_obj["event"])
         meta = json_obj["meta"] if "meta" in json_obj else {}
         return EventEnvelope(event_type=event_type, event=event, meta=meta)
+
+    def _get_event_json(self) -> str:
+        # A replaced event is serialized anew.
+        if self._event_json is None or self._event_json_source is not self.event:
+            self._event_json = self.event.as_json()
+            self._event_json_source = self.event
+        return self._event_json
+
+    def _get_meta_json(self) -> str:
+        # Be careful about converting meta bag, since anything can be put inside at runtime.
+        try:
+            if self.meta is not None:
+                return json_dumps(self.meta)
+        except Exception:
+            logger.warn(
+                f"Failed to serialize meta field of EventEnvelope to json {self.meta}. Ignoring it during serialization."
+            )
+        return "null"
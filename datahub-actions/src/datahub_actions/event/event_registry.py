@@ -12,15 +12,17 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import json
+from typing import Any, Dict, Optional, Union
 
 from datahub.ingestion.api.registry import PluginRegistry
 from datahub.metadata.schema_classes import (
+    ChangeTypeClass,
     EntityChangeEventClass,
     MetadataChangeLogClass,
 )
 
 from datahub_actions.event.event import Event
+from datahub_actions.event.json_util import json_dumps, json_loads
 
 # TODO: Figure out where to put these.
 # TODO: Perform runtime validation based on the event types found in the registry.
@@ -39,11 +41,17 @@ class MetadataChangeLogEvent(MetadataChangeLogClass, Event):
 
     @classmethod
     def from_json(cls, json_str: str) -> "Event":
-        json_obj = json.loads(json_str)
+        return cls.from_json_obj(json_loads(json_str))
+
+    @classmethod
+    def from_json_obj(cls, json_obj: Any) -> "Event":
         return cls.from_class(cls.from_obj(json_obj))
 
     def as_json(self) -> str:
-        return json.dumps(self.to_obj())
+        return json_dumps(self.to_obj())
+
+    def as_json_obj(self) -> Any:
+        return self.to_obj()
 
 
 # A DataHub Event representing an Entity Change Event.
@@ -59,10 +67,16 @@ class EntityChangeEvent(EntityChangeEventClass, Event):
 
     @classmethod
     def from_json(cls, json_str: str) -> "EntityChangeEvent":
-        json_obj = json.loads(json_str)
+        return cls.from_json_obj(json_loads(json_str))
 
+    @classmethod
+    def from_json_obj(cls, json_obj: Any) -> "EntityChangeEvent":
         # Remove parameters from json_obj and add it later to _inner_dict, this hack exists because of the way EntityChangeLogClass does not support "AnyRecord"
-        parameters = json_obj.pop("parameters", None)
+        parameters = json_obj.get("parameters")
+        if "parameters" in json_obj:
+            json_obj = {
+                key: val for key, val in json_obj.items() if key != "parameters"
+            }
 
         event = cls.from_class(cls.from_obj(json_obj))
 
@@ -75,11 +89,72 @@ class EntityChangeEvent(EntityChangeEventClass, Event):
         return event
 
     def as_json(self) -> str:
+        return json_dumps(self.as_json_obj())
+
+    def as_json_obj(self) -> Any:
         json_obj = self.to_obj()
         # Insert parameters, this hack exists because of the way EntityChangeLogClass does not support "AnyRecord"
         if "__parameters_json" in self._inner_dict:
             json_obj["parameters"] = self._inner_dict["__parameters_json"]
-        return json.dumps(json_obj)
+        return json_obj
+
+
+# The top level fields of a LazyMetadataChangeLogEvent which are read without materializing it.
+LAZY_HEADER_FIELDS = frozenset({"entityType", "entityUrn", "aspectName", "changeType"})
+
+
+def _lazy_header_field(name: str) -> property:
+    # Reads a top level field from the raw record until the event is materialized, without materializing it.
+    def _get(self: "LazyMetadataChangeLogEvent") -> Any:
+        inner_dict = self.__dict__.get("_materialized_inner_dict")
+        if inner_dict is not None:
+            return inner_dict.get(name)
+        value = self._raw.get(name)
+        # Depending on the decoder, optional fields may be (type name, value) tuples.
+        return value[1] if isinstance(value, tuple) else value
+
+    def _set(self: "LazyMetadataChangeLogEvent", value: Any) -> None:
+        self._inner_dict[name] = value
+
+    return property(_get, _set)
+
+
+# A Metadata Change Log Event which holds the raw record decoded from Avro, and only builds its typed
+# fields the first time one of them is accessed. The top level header fields, which filters and most
+# Actions read, are served straight from the raw record.
+class LazyMetadataChangeLogEvent(MetadataChangeLogEvent):
+    def __init__(self, raw: Dict[str, Any]):
+        # The raw record, as decoded from Avro with unions as (record name, value) tuples.
+        self._raw = raw
+
+    @property  # type: ignore[override]
+    def _inner_dict(self) -> dict:
+        inner_dict = self.__dict__.get("_materialized_inner_dict")
+        if inner_dict is None:
+            inner_dict = MetadataChangeLogClass.from_obj(self._raw, True)._inner_dict
+            self.__dict__["_materialized_inner_dict"] = inner_dict
+        return inner_dict
+
+    @_inner_dict.setter
+    def _inner_dict(self, inner_dict: dict) -> None:
+        self.__dict__["_materialized_inner_dict"] = inner_dict
+
+    @property
+    def is_materialized(self) -> bool:
+        return "_materialized_inner_dict" in self.__dict__
+
+    def get(self, item: str, default: Any = None) -> Any:
+        if item in LAZY_HEADER_FIELDS and not self.is_materialized:
+            value = getattr(self, item)
+            return default if value is None else value
+        return super().get(item, default)
+
+    entityType: str = _lazy_header_field("entityType")  # type: ignore[assignment]
+    entityUrn: Optional[str] = _lazy_header_field("entityUrn")  # type: ignore[assignment]
+    aspectName: Optional[str] = _lazy_header_field("aspectName")  # type: ignore[assignment]
+    changeType: Union[str, ChangeTypeClass] = _lazy_header_field(  # type: ignore[assignment]
+        "changeType"
+    )
 
 
 # Standard Event Types for easy reference.
@@ -0,0 +1,162 @@
+# Copyright 2021 Acryl Data, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import logging
+import threading
+from typing import Optional
+
+from prometheus_client import Gauge
+
+logger = logging.getLogger(__name__)
+
+CONCURRENCY_LIMIT_METRIC = Gauge(
+    name="pipeline_concurrency_limit",
+    documentation="The current adaptive concurrency limit of an actions pipeline",
+    labelnames=["pipeline_name"],
+)
+
+# The factor the limit is multiplied by when the downstream system shows signs of overload.
+DEFAULT_BACKOFF_RATIO = 0.9
+# How far recent latency may rise above the long-term baseline before it is considered overload.
+DEFAULT_LATENCY_TOLERANCE = 2.0
+# Smoothing factors for the recent and long-term (baseline) latency averages.
+RECENT_LATENCY_ALPHA = 0.2
+BASELINE_LATENCY_ALPHA = 0.01
+# How many samples the limit may stay at its min while overloaded before the baseline is reset to recent latency.
+BASELINE_RESET_SAMPLES = 100
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Limits the number of events in flight, adapting the limit to the latency and error rate of processing
+    using additive-increase / multiplicative-decrease (AIMD).
+
+    While processing succeeds and latency stays close to its long-term baseline, the limit grows by roughly
+    one permit for every limit's worth of samples. When processing fails, or recent latency rises well above
+    the baseline (a sign that the downstream system is saturated), the limit is cut by a constant factor.
+
+    The limit is cut at most once per limit's worth of samples, since the events already in flight when the
+    downstream system became saturated all report the same overload. Samples taken while overloaded do not move
+    the baseline, so that a sustained overload is never mistaken for the new normal. However, once the limit has
+    stayed at its min for a while and latency is still high, the rise is no longer caused by the events in flight,
+    e.g. the downstream system has simply become slower. The baseline is then reset to the recent latency, so that
+    the limit can grow again.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        min_limit: int,
+        max_limit: int,
+        backoff_ratio: float = DEFAULT_BACKOFF_RATIO,
+        latency_tolerance: float = DEFAULT_LATENCY_TOLERANCE,
+    ):
+        self._min_limit = min_limit
+        self._max_limit = max_limit
+        self._backoff_ratio = backoff_ratio
+        self._latency_tolerance = latency_tolerance
+        self._limit = float(min_limit)
+        self._in_flight = 0
+        self._recent_latency: Optional[float] = None
+        self._baseline_latency: Optional[float] = None
+        # The number of samples recorded since the limit was last cut.
+        self._samples_since_decrease = 0
+        # The number of samples recorded in a row while overloaded at the min limit.
+        self._samples_at_min_limit = 0
+        self._condition = threading.Condition()
+        self._limit_metric = CONCURRENCY_LIMIT_METRIC.labels(pipeline_name=name)
+        self._limit_metric.set(self.limit)
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """
+        Blocks until a permit is available, then takes it. Returns False if none became available within the timeout.
+        """
+        with self._condition:
+            if not self._condition.wait_for(
+                lambda: self._in_flight < self.limit, timeout
+            ):
+                return False
+            self._in_flight += 1
+            return True
+
+    def try_acquire(self) -> bool:
+        """
+        Takes a permit if one is available, without blocking.
+        """
+        with self._condition:
+            if self._in_flight >= self.limit:
+                return False
+            self._in_flight += 1
+            return True
+
+    def release(self) -> None:
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    def record(self, latency_seconds: float, failed: bool) -> None:
+        """
+        Records the outcome of a single processing attempt, and adjusts the limit accordingly.
+        """
+        with self._condition:
+            self._samples_since_decrease += 1
+            if not failed:
+                self._recent_latency = self._smooth(
+                    self._recent_latency, latency_seconds, RECENT_LATENCY_ALPHA
+                )
+            overloaded = failed or (
+                self._recent_latency is not None
+                and self._baseline_latency is not None
+                and self._recent_latency
+                > self._baseline_latency * self._latency_tolerance
+            )
+            if overloaded:
+                if self._samples_since_decrease >= self.limit:
+                    self._limit = max(
+                        float(self._min_limit), self._limit * self._backoff_ratio
+                    )
+                    self._samples_since_decrease = 0
+                if not failed and self.limit <= self._min_limit:
+                    self._samples_at_min_limit += 1
+                    if self._samples_at_min_limit >= BASELINE_RESET_SAMPLES:
+                        logger.info(
+                            "Latency stayed high at the min concurrency limit, resetting the baseline latency"
+                        )
+                        self._baseline_latency = self._recent_latency
+                        self._samples_at_min_limit = 0
+                else:
+                    self._samples_at_min_limit = 0
+            else:
+                self._samples_at_min_limit = 0
+                self._baseline_latency = self._smooth(
+                    self._baseline_latency, latency_seconds, BASELINE_LATENCY_ALPHA
+                )
+                if self._in_flight * 2 >= self.limit:
+                    # Only grow the limit while it is actually being used.
+                    self._limit = min(
+                        float(self._max_limit), self._limit + 1.0 / self._limit
+                    )
+            self._limit_metric.set(self.limit)
+            self._condition.notify_all()
+
+    @staticmethod
+    def _smooth(average: Optional[float], sample: float, alpha: float) -> float:
+        if average is None:
+            return sample
+        return average + alpha * (sample - average)
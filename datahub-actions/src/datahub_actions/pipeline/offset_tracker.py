@@ -0,0 +1,73 @@
+# Copyright 2021 Acryl Data, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import threading
+from collections import deque
+from typing import Deque, Dict, Hashable, List
+
+from datahub_actions.event.event_envelope import EventEnvelope
+
+
+class TrackedEvent:
+    """
+    A handle for an event which has been handed out for processing, but not yet acked.
+    """
+
+    __slots__ = ("envelope", "stream_key", "completed")
+
+    def __init__(self, envelope: EventEnvelope, stream_key: Hashable):
+        self.envelope = envelope
+        self.stream_key = stream_key
+        self.completed = False
+
+
+# Class that tracks in-flight events for each independently ordered stream (e.g. a Kafka topic partition).
+#
+# Events may complete out of order when they are processed concurrently. To preserve at-least-once delivery,
+# an event may only be acked once every event that was tracked before it on the same stream has completed.
+class OffsetTracker:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._streams: Dict[Hashable, Deque[TrackedEvent]] = {}
+
+    def track(self, envelope: EventEnvelope, stream_key: Hashable) -> TrackedEvent:
+        """
+        Begin tracking an event. Events must be tracked in the order they were received from the stream.
+        """
+        tracked_event = TrackedEvent(envelope, stream_key)
+        with self._lock:
+            if stream_key not in self._streams:
+                self._streams[stream_key] = deque()
+            self._streams[stream_key].append(tracked_event)
+        return tracked_event
+
+    def complete(self, tracked_event: TrackedEvent) -> List[EventEnvelope]:
+        """
+        Mark a tracked event as completed.
+
+        Returns the contiguous run of completed events at the head of the event's stream, in order,
+        which are now safe to ack. This list is empty if an earlier event is still in flight.
+        """
+        with self._lock:
+            tracked_event.completed = True
+            stream = self._streams[tracked_event.stream_key]
+            ackable = []
+            while stream and stream[0].completed:
+                ackable.append(stream.popleft().envelope)
+            return ackable
+
+    def in_flight_count(self) -> int:
+        with self._lock:
+            return sum(len(stream) for stream in self._streams.values())
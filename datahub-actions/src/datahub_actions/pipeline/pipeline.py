@@ -12,24 +12,72 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
+import functools
 import logging
 import os
-from typing import List, Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Optional,
+    Set,
+)
+
+from prometheus_client import Histogram
 
 from datahub_actions.action.action import Action
+from datahub_actions.action.async_action import AsyncAction
+from datahub_actions.dead_letter.dead_letter_writer import DeadLetterWriter
+from datahub_actions.event.event_codec import event_codec_registry
 from datahub_actions.event.event_envelope import EventEnvelope
-from datahub_actions.pipeline.pipeline_config import FailureMode, PipelineConfig
+from datahub_actions.pipeline.concurrency_limiter import AdaptiveConcurrencyLimiter
+from datahub_actions.pipeline.offset_tracker import OffsetTracker, TrackedEvent
+from datahub_actions.pipeline.pipeline_config import (
+    FailureMode,
+    OrderingKey,
+    PipelineConfig,
+    RetryMode,
+)
 from datahub_actions.pipeline.pipeline_stats import PipelineStats
 from datahub_actions.pipeline.pipeline_util import (
     create_action,
     create_action_context,
+    create_dead_letter_writer,
     create_event_source,
     create_filter_transformer,
     create_transformer,
+    get_entity_urn,
+    get_event_size,
+    get_event_timestamp,
+    get_partition_key,
+    get_transformer_name,
     normalize_directory_name,
 )
+from datahub_actions.pipeline.prefetch_queue import PrefetchQueue
+from datahub_actions.pipeline.retry_queue import (
+    DiskRetryQueue,
+    MemoryRetryQueue,
+    RetryEntry,
+    RetryPolicy,
+    RetryQueue,
+)
+from datahub_actions.pipeline.worker_pool import KeyedWorkerPool
+from datahub_actions.plugin.dead_letter.file.file_dead_letter_writer import (
+    FileDeadLetterWriter,
+    FileDeadLetterWriterConfig,
+)
+from datahub_actions.source.async_event_source import AsyncEventSource
 from datahub_actions.source.event_source import EventSource
 from datahub_actions.transform.transformer import Transformer
+from datahub_actions.transform.transformer_stats import TransformerStats
 
 logger = logging.getLogger(__name__)
 
@@ -39,6 +87,49 @@ DEFAULT_RETRY_COUNT = 0  # Do not retry unless instructed.
 DEFAULT_FAILED_EVENTS_DIR = "/tmp/logs/datahub/actions"
 DEFAULT_FAILED_EVENTS_FILE_NAME = "failed_events.log"  # Not currently configurable.
 DEFAULT_FAILURE_MODE = FailureMode.CONTINUE
+DEFAULT_BATCH_SIZE = 1  # Do not batch unless instructed.
+DEFAULT_LINGER_MS = 1000
+DEFAULT_MAX_CONCURRENCY = 1  # Process events sequentially unless instructed.
+DEFAULT_ADAPTIVE_CONCURRENCY = False
+DEFAULT_MIN_CONCURRENCY = 1
+PERMIT_POLL_INTERVAL_SECONDS = (
+    0.1  # Max time to wait for a permit before checking for failures.
+)
+DEFAULT_ORDERING_KEY = OrderingKey.PARTITION
+DEFAULT_WORKER_QUEUE_SIZE = 100  # Max number of events queued for a single worker.
+DEFAULT_PREFETCH_SIZE = 0  # Do not prefetch events unless instructed.
+DEFAULT_PREFETCH_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_RETRY_MODE = RetryMode.INLINE
+DEFAULT_RETRY_INITIAL_BACKOFF_MS = 0  # Retry immediately unless instructed.
+DEFAULT_RETRY_MAX_BACKOFF_MS = 60 * 1000
+DEFAULT_RETRY_QUEUE_DIR_NAME = "retry_queue"  # Within the failed events dir.
+DEFAULT_RETRY_QUEUE_FORMAT = "json"  # The format failing events are spooled in.
+RETRY_POLL_INTERVAL_SECONDS = 0.1  # Max time to wait before checking for due retries.
+
+TRANSFORMER_LATENCY_METRIC = Histogram(
+    name="pipeline_transformer_latency_seconds",
+    documentation="Time taken by a transformer to transform a single event",
+    labelnames=["pipeline_name", "transformer"],
+)
+
+ACTION_LATENCY_METRIC = Histogram(
+    name="pipeline_action_latency_seconds",
+    documentation="Time taken by an action to act on a single event, or a batch of events",
+    labelnames=["pipeline_name", "action"],
+)
+
+ACK_LATENCY_METRIC = Histogram(
+    name="pipeline_ack_latency_seconds",
+    documentation="Time taken by an event source to ack a single event, or a batch of events",
+    labelnames=["pipeline_name", "source"],
+)
+
+EVENT_LATENCY_METRIC = Histogram(
+    name="pipeline_event_latency_seconds",
+    documentation="Time from an event being produced to it being acked, for sources which record when events are produced",
+    labelnames=["pipeline_name"],
+    buckets=(0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 3600, float("inf")),
+)
 
 
 class PipelineException(Exception):
@@ -63,8 +154,14 @@ class Pipeline:
 
     Additionally, a Pipeline supports the following notable capabilities:
 
-        - Configurable retries of event processing in cases of component failure
-        - Configurable dead letter queue
+        - Configurable retries of event processing in cases of component failure, with exponential backoff
+        - Configurable retry queue, so that failing events are retried without blocking the rest of the stream
+        - Configurable dead letter queue, written to rotating local files or a pluggable destination
+        - Configurable micro-batching of events handed to the Action
+        - Configurable concurrent processing of events, preserving per-partition or per-entity ordering
+        - Adaptive concurrency, adjusting the number of events in flight to the latency and error rate of the Action
+        - Execution on an asyncio event loop, which can be shared by many Pipelines
+        - Configurable prefetching of events, overlapping sourcing with processing
         - Capturing basic statistics about each Pipeline component
         - At-will start and stop of an individual pipeline
 
@@ -78,15 +175,28 @@ class Pipeline:
     # Whether the Pipeline has been requested to shut down
     _shutdown: bool = False
 
-    # Pipeline statistics
-    _stats: PipelineStats = PipelineStats()
+    # Whether the Pipeline is currently processing events
+    _running: bool = False
 
     # Options
     _retry_count: int = DEFAULT_RETRY_COUNT  # Number of times a single event should be retried in case of processing error.
     _failure_mode: FailureMode = DEFAULT_FAILURE_MODE
     _failed_events_dir: str = DEFAULT_FAILED_EVENTS_DIR  # The top-level path where failed events will be logged.
+    _batch_size: int = DEFAULT_BATCH_SIZE  # Max number of events handed to the Action in a single invocation.
+    _linger_ms: int = DEFAULT_LINGER_MS  # Max time a batch waits to fill up.
+    _max_concurrency: int = DEFAULT_MAX_CONCURRENCY  # Max events processed at once.
+    _adaptive_concurrency: bool = DEFAULT_ADAPTIVE_CONCURRENCY
+    _min_concurrency: int = DEFAULT_MIN_CONCURRENCY  # Lowest adaptive limit.
+    _ordering_key: OrderingKey = DEFAULT_ORDERING_KEY  # Key to preserve order on.
+    _prefetch_size: int = DEFAULT_PREFETCH_SIZE  # Max events buffered ahead.
+    _prefetch_max_bytes: int = DEFAULT_PREFETCH_MAX_BYTES  # Max bytes buffered ahead.
+    _retry_mode: RetryMode = DEFAULT_RETRY_MODE  # Where failing events wait.
+    _retry_initial_backoff_ms: int = DEFAULT_RETRY_INITIAL_BACKOFF_MS
+    _retry_max_backoff_ms: int = DEFAULT_RETRY_MAX_BACKOFF_MS
+    _retry_queue_dir: Optional[str] = None  # Where failing events are spooled.
+    _retry_queue_format: str = DEFAULT_RETRY_QUEUE_FORMAT  # Spooled event format.
 
-    def __init__(
+    def __init__(  # noqa: C901
         self,
         name: str,
         source: EventSource,
@@ -95,6 +205,20 @@ class Pipeline:
         retry_count: Optional[int],
         failure_mode: Optional[FailureMode],
         failed_events_dir: Optional[str],
+        batch_size: Optional[int] = None,
+        linger_ms: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        ordering_key: Optional[OrderingKey] = None,
+        prefetch_size: Optional[int] = None,
+        prefetch_max_bytes: Optional[int] = None,
+        retry_mode: Optional[RetryMode] = None,
+        retry_initial_backoff_ms: Optional[int] = None,
+        retry_max_backoff_ms: Optional[int] = None,
+        retry_queue_dir: Optional[str] = None,
+        dead_letter_writer: Optional[DeadLetterWriter] = None,
+        adaptive_concurrency: Optional[bool] = None,
+        min_concurrency: Optional[int] = None,
+        retry_queue_format: Optional[str] = None,
     ) -> None:
         self.name = name
         self.source = source
@@ -107,7 +231,75 @@ class Pipeline:
             self._failure_mode = failure_mode
         if failed_events_dir is not None:
             self._failed_events_dir = failed_events_dir
-        self._init_failed_events_dir()
+        if batch_size is not None:
+            self._batch_size = batch_size
+        if linger_ms is not None:
+            self._linger_ms = linger_ms
+        if max_concurrency is not None:
+            self._max_concurrency = max_concurrency
+        if ordering_key is not None:
+            self._ordering_key = ordering_key
+        if prefetch_size is not None:
+            self._prefetch_size = prefetch_size
+        if prefetch_max_bytes is not None:
+            self._prefetch_max_bytes = prefetch_max_bytes
+        if retry_mode is not None:
+            self._retry_mode = retry_mode
+        if retry_initial_backoff_ms is not None:
+            self._retry_initial_backoff_ms = retry_initial_backoff_ms
+        if retry_max_backoff_ms is not None:
+            self._retry_max_backoff_ms = retry_max_backoff_ms
+        if retry_queue_dir is not None:
+            self._retry_queue_dir = retry_queue_dir
+        if adaptive_concurrency is not None:
+            self._adaptive_concurrency = adaptive_concurrency
+        if min_concurrency is not None:
+            self._min_concurrency = min_concurrency
+        if retry_queue_format is not None:
+            self._retry_queue_format = retry_queue_format
+        if self._max_concurrency > 1 and self._batch_size > 1:
+            logger.warning(
+                f"Both max_concurrency and batch_size were configured for pipeline {self.name}. Events will be processed concurrently, batch_size will be ignored."
+            )
+        self._offset_tracker = OffsetTracker()
+        # Stats and metric labels are bound up front, rather than looked up for every event.
+        self._stats = PipelineStats()
+        self._transformer_handles = [
+            (
+                transformer,
+                self._stats.get_transformer_stats(transformer),
+                TRANSFORMER_LATENCY_METRIC.labels(
+                    pipeline_name=name, transformer=get_transformer_name(transformer)
+                ),
+            )
+            for transformer in transforms
+        ]
+        self._action_latency_metric = ACTION_LATENCY_METRIC.labels(
+            pipeline_name=name, action=type(action).__name__
+        )
+        self._ack_latency_metric = ACK_LATENCY_METRIC.labels(
+            pipeline_name=name, source=type(source).__name__
+        )
+        self._event_latency_metric = EVENT_LATENCY_METRIC.labels(pipeline_name=name)
+        self._concurrency_limiter = (
+            AdaptiveConcurrencyLimiter(
+                self.name,
+                min(self._min_concurrency, self._max_concurrency),
+                self._max_concurrency,
+            )
+            if self._adaptive_concurrency and self._max_concurrency > 1
+            else None
+        )
+        self._ack_lock = threading.Lock()
+        self._retry_policy = RetryPolicy(
+            self._retry_initial_backoff_ms, self._retry_max_backoff_ms
+        )
+        self._dead_letter_writer = (
+            dead_letter_writer or self._create_failed_events_file_writer()
+        )
+        self._dead_letter_writer_lock = threading.Lock()
+        self._dead_letter_writer_closed = False
+        self._retry_queue = self._create_retry_queue()
 
     @classmethod
     def create(cls, config_dict: dict) -> "Pipeline":
@@ -124,6 +316,8 @@ class Pipeline:
 
         # Create Event Source
         event_source = create_event_source(config.source, ctx)
+        if config.filter is not None:
+            event_source.push_down_filter(config.filter)
 
         # Create Transforms
         transforms = []
@@ -137,6 +331,13 @@ class Pipeline:
         # Create Action
         action = create_action(config.action, ctx)
 
+        # Create Dead Letter Writer, if one is configured. Otherwise failed events are written to the failed events dir.
+        dead_letter_writer = (
+            create_dead_letter_writer(config.dead_letter, ctx)
+            if config.dead_letter is not None
+            else None
+        )
+
         # Finally, create Pipeline.
         return cls(
             config.name,
@@ -146,13 +347,105 @@ class Pipeline:
             config.options.retry_count if config.options else None,
             config.options.failure_mode if config.options else None,
             config.options.failed_events_dir if config.options else None,
+            config.options.batch_size if config.options else None,
+            config.options.linger_ms if config.options else None,
+            config.options.max_concurrency if config.options else None,
+            config.options.ordering_key if config.options else None,
+            config.options.prefetch_size if config.options else None,
+            config.options.prefetch_max_bytes if config.options else None,
+            config.options.retry_mode if config.options else None,
+            config.options.retry_initial_backoff_ms if config.options else None,
+            config.options.retry_max_backoff_ms if config.options else None,
+            config.options.retry_queue_dir if config.options else None,
+            dead_letter_writer,
+            config.options.adaptive_concurrency if config.options else None,
+            config.options.min_concurrency if config.options else None,
+            config.options.retry_queue_format if config.options else None,
         )
 
     async def start(self) -> None:
         """
-        Start the action pipeline asynchronously. This method is non-blocking.
+        Run the action pipeline on the running asyncio event loop. Many pipelines may share a single loop.
+
+        Up to `max_concurrency` events are processed at once, preserving ordering per ordering key.
+        Native AsyncEventSource and AsyncAction implementations are awaited directly on the loop, whereas
+        synchronous ones are run in a thread pool executor so that they never block it.
+        Raises an instance of PipelineException if an unrecoverable pipeline failure occurs.
         """
-        self.run()
+        self._stats.mark_start()
+        self._running = True
+
+        if self._retry_queue is not None:
+            logger.warning(
+                f"retry_mode {self._retry_mode} is not supported on an event loop. Failing events of pipeline {self.name} will be retried inline."
+            )
+        if self._batch_size > 1:
+            logger.warning(
+                f"batch_size is not supported on an event loop. Events of pipeline {self.name} will be handed to its Action one at a time."
+            )
+
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(
+            max_workers=self._max_concurrency, thread_name_prefix=f"{self.name}-worker"
+        )
+        concurrency_limit = asyncio.Semaphore(self._max_concurrency)
+        concurrency_limiter = self._concurrency_limiter
+        permit_released = asyncio.Event()
+        ack_lock = asyncio.Lock()
+        in_flight: Set[asyncio.Task] = set()
+        # The most recently scheduled task for each ordering key.
+        key_tails: Dict[Hashable, asyncio.Task] = {}
+        errors: List[BaseException] = []
+
+        async def acquire_permit() -> None:
+            if concurrency_limiter is None:
+                await concurrency_limit.acquire()
+                return
+            # Wait until the number of events in flight is below the current adaptive limit.
+            while not concurrency_limiter.try_acquire():
+                permit_released.clear()
+                await permit_released.wait()
+
+        def on_task_done(key: Hashable, task: asyncio.Task) -> None:
+            if concurrency_limiter is None:
+                concurrency_limit.release()
+            else:
+                concurrency_limiter.release()
+                permit_released.set()
+            in_flight.discard(task)
+            if key_tails.get(key) is task:
+                del key_tails[key]
+            if not task.cancelled() and task.exception() is not None:
+                errors.append(task.exception())  # type: ignore
+
+        try:
+            async for enveloped_event in self._events_async():
+                if errors:
+                    break
+                # Wait for a free slot before taking on more work.
+                await acquire_permit()
+                tracked_event = self._offset_tracker.track(
+                    enveloped_event, get_partition_key(enveloped_event)
+                )
+                key = self._get_ordering_key(enveloped_event)
+                task = loop.create_task(
+                    self._process_tracked_event_async(
+                        tracked_event, key_tails.get(key), executor, ack_lock
+                    )
+                )
+                key_tails[key] = task
+                in_flight.add(task)
+                task.add_done_callback(functools.partial(on_task_done, key))
+        finally:
+            # Wait for in-flight events to finish before returning.
+            await asyncio.gather(*in_flight, return_exceptions=True)
+            executor.shutdown(wait=False)
+            # Write out any failed events which are still buffered.
+            await loop.run_in_executor(None, self._finish_running)
+
+        # Surface the first unrecoverable failure raised while processing an event.
+        if errors:
+            raise errors[0]
 
     def run(self) -> None:
         """
@@ -160,14 +453,379 @@ class Pipeline:
         Raises an instance of PipelineException if an unrecoverable pipeline failure occurs.
         """
         self._stats.mark_start()
+        self._running = True
+        try:
+            self._run_events()
+        finally:
+            # Write out any failed events which are still buffered.
+            self._finish_running()
+
+    def _run_events(self) -> None:
+        if self._batch_size > 1 and self._max_concurrency <= 1:
+            if self._retry_queue is not None:
+                logger.warning(
+                    f"retry_mode {self._retry_mode} is not supported with batch_size. Failing events of pipeline {self.name} will be retried inline."
+                )
+            # Batches are always read through a prefetch queue, so that a partially filled batch
+            # is flushed on time even while the source is idle.
+            prefetch_queue = self._create_prefetch_queue(
+                max(self._prefetch_size, self._batch_size)
+            )
+            try:
+                self._run_batched(prefetch_queue)
+            finally:
+                prefetch_queue.close()
+            return
+
+        if self._retry_queue is not None:
+            # Events are read through a prefetch queue, so that retries which fall due are attempted
+            # even while the source is idle.
+            prefetch_queue = self._create_prefetch_queue(max(self._prefetch_size, 1))
+            try:
+                self._run_with_retry_queue(self._retry_queue, prefetch_queue)
+            finally:
+                prefetch_queue.close()
+            return
 
         # First, source the events.
-        enveloped_events = self.source.events()
-        for enveloped_event in enveloped_events:
-            # Then, process the event.
-            self._process_event(enveloped_event)
-            # Finally, ack the event.
-            self._ack_event(enveloped_event)
+        enveloped_events = self._events()
+        try:
+            if self._max_concurrency > 1:
+                self._run_concurrently(enveloped_events)
+                return
+
+            for enveloped_event in enveloped_events:
+                # Then, process the event.
+                self._process_event(enveloped_event)
+                # Finally, ack the event.
+                self._ack_event(enveloped_event)
+        finally:
+            if isinstance(enveloped_events, PrefetchQueue):
+                enveloped_events.close()
+
+    def _events(self) -> Iterable[EventEnvelope]:
+        if self._prefetch_size > 0:
+            return self._create_prefetch_queue(self._prefetch_size)
+        return self.source.events()
+
+    def _create_prefetch_queue(self, max_events: int) -> PrefetchQueue:
+        return PrefetchQueue(
+            self.source.events(),
+            max_events,
+            self._prefetch_max_bytes,
+            get_event_size,
+            self.name,
+        )
+
+    def _run_batched(self, prefetch_queue: PrefetchQueue) -> None:
+        batch: List[EventEnvelope] = []
+        batch_deadline = 0.0
+        while not self._shutdown:
+            # Wait for the next event, but no longer than the current batch is allowed to linger.
+            timeout = max(0.0, batch_deadline - time.monotonic()) if batch else None
+            enveloped_event = prefetch_queue.get(timeout)
+            if enveloped_event is not None:
+                if not batch:
+                    batch_deadline = time.monotonic() + self._linger_ms / 1000.0
+                batch.append(enveloped_event)
+            source_exhausted = enveloped_event is None and prefetch_queue.done
+
+            # Flush the batch once it is full, once it has been lingering for too long, or once the source is exhausted.
+            if batch and (
+                len(batch) >= self._batch_size
+                or time.monotonic() >= batch_deadline
+                or source_exhausted
+            ):
+                self._process_batch(batch)
+                self._ack_batch(batch)
+                batch = []
+
+            if source_exhausted:
+                return
+
+    def _run_concurrently(self, enveloped_events: Iterable[EventEnvelope]) -> None:
+        worker_pool = KeyedWorkerPool(
+            self._max_concurrency, DEFAULT_WORKER_QUEUE_SIZE, self.name
+        )
+        try:
+            for enveloped_event in enveloped_events:
+                # Track the event before handing it off, so that acks are only issued in source order.
+                tracked_event = self._offset_tracker.track(
+                    enveloped_event, get_partition_key(enveloped_event)
+                )
+                self._submit(
+                    worker_pool,
+                    self._get_ordering_key(enveloped_event),
+                    self._process_tracked_event,
+                    tracked_event,
+                )
+        finally:
+            # Wait for in-flight events to finish before returning.
+            worker_pool.shutdown()
+        # Surface any unrecoverable failure raised within a worker.
+        worker_pool.raise_if_failed()
+
+    def _run_with_retry_queue(
+        self, retry_queue: RetryQueue, prefetch_queue: PrefetchQueue
+    ) -> None:
+        worker_pool = (
+            KeyedWorkerPool(self._max_concurrency, DEFAULT_WORKER_QUEUE_SIZE, self.name)
+            if self._max_concurrency > 1
+            else None
+        )
+        source_exhausted = False
+        try:
+            while not self._shutdown:
+                if worker_pool is not None:
+                    # Surface any unrecoverable failure raised within a worker.
+                    worker_pool.raise_if_failed()
+
+                # First, attempt any retries which have fallen due.
+                for retry_entry in retry_queue.poll_ready():
+                    self._dispatch_attempt(
+                        worker_pool,
+                        retry_entry.envelope,
+                        retry_entry.attempt,
+                        retry_entry.tracked_event,
+                        retry_entry,
+                    )
+
+                # Then, wait for the next event, but no longer than until the next retry falls due.
+                timeout = RETRY_POLL_INTERVAL_SECONDS
+                next_ready_at = retry_queue.get_next_ready_at()
+                if next_ready_at is not None:
+                    timeout = min(timeout, max(0.0, next_ready_at - time.time()))
+
+                if source_exhausted:
+                    # Drain the remaining retries before returning.
+                    if (
+                        len(retry_queue) == 0
+                        and self._offset_tracker.in_flight_count() == 0
+                    ):
+                        return
+                    time.sleep(timeout)
+                    continue
+
+                enveloped_event = prefetch_queue.get(timeout)
+                if enveloped_event is None:
+                    source_exhausted = prefetch_queue.done
+                    continue
+
+                # Track the event, so that acks are only issued in source order even while retries are pending.
+                tracked_event = self._offset_tracker.track(
+                    enveloped_event, get_partition_key(enveloped_event)
+                )
+                self._dispatch_attempt(
+                    worker_pool, enveloped_event, 1, tracked_event, None
+                )
+        finally:
+            if worker_pool is not None:
+                # Wait for in-flight events to finish before returning.
+                worker_pool.shutdown()
+        if worker_pool is not None:
+            worker_pool.raise_if_failed()
+
+    def _submit(
+        self,
+        worker_pool: KeyedWorkerPool,
+        key: Hashable,
+        fn: Callable[..., None],
+        *args: Any,
+    ) -> None:
+        concurrency_limiter = self._concurrency_limiter
+        if concurrency_limiter is None:
+            worker_pool.submit(key, fn, *args)
+            return
+
+        # Wait until the number of events in flight is below the current adaptive limit.
+        while not concurrency_limiter.acquire(PERMIT_POLL_INTERVAL_SECONDS):
+            # Workers stop running tasks once the pool has failed, so permits may never be released.
+            worker_pool.raise_if_failed()
+        try:
+            worker_pool.submit(key, self._run_with_permit, fn, *args)
+        except BaseException:
+            concurrency_limiter.release()
+            raise
+
+    def _run_with_permit(self, fn: Callable[..., None], *args: Any) -> None:
+        assert self._concurrency_limiter is not None
+        try:
+            fn(*args)
+        finally:
+            self._concurrency_limiter.release()
+
+    def _dispatch_attempt(
+        self,
+        worker_pool: Optional[KeyedWorkerPool],
+        enveloped_event: EventEnvelope,
+        attempt: int,
+        tracked_event: Optional[TrackedEvent],
+        retry_entry: Optional[RetryEntry],
+    ) -> None:
+        if worker_pool is None:
+            self._attempt_event(enveloped_event, attempt, tracked_event, retry_entry)
+            return
+        self._submit(
+            worker_pool,
+            self._get_ordering_key(enveloped_event),
+            self._attempt_event,
+            enveloped_event,
+            attempt,
+            tracked_event,
+            retry_entry,
+        )
+
+    def _attempt_event(
+        self,
+        enveloped_event: EventEnvelope,
+        attempt: int,
+        tracked_event: Optional[TrackedEvent],
+        retry_entry: Optional[RetryEntry],
+    ) -> None:
+        assert self._retry_queue is not None
+        if self._shutdown:
+            # Leave the event un-acked. It will be redelivered on the next run.
+            return
+
+        max_attempts = self._retry_count + 1
+        if self._try_process_event(enveloped_event, attempt, max_attempts):
+            if retry_entry is not None:
+                self._retry_queue.resolve(retry_entry)
+            if tracked_event is not None:
+                self._complete_tracked_event(tracked_event)
+            return
+
+        if attempt < max_attempts:
+            # Park the event until its next retry falls due, so that it does not hold up the events behind it.
+            # Durable queues keep the event across restarts, so it can be acked as soon as it has been queued.
+            durable = self._retry_queue.durable
+            self._retry_queue.put(
+                RetryEntry(
+                    enveloped_event,
+                    attempt + 1,
+                    time.time() + self._retry_policy.get_backoff_seconds(attempt),
+                    None if durable else tracked_event,
+                    retry_entry.spool_path if retry_entry is not None else None,
+                )
+            )
+            if durable and tracked_event is not None:
+                self._complete_tracked_event(tracked_event)
+            return
+
+        # Out of retries. The event is recorded in the failed events log, so it no longer needs to be queued.
+        if retry_entry is not None:
+            self._retry_queue.resolve(retry_entry)
+        self._fail_event(enveloped_event)
+        if tracked_event is not None:
+            self._complete_tracked_event(tracked_event)
+
+    def _process_tracked_event(self, tracked_event: TrackedEvent) -> None:
+        if self._shutdown:
+            # Leave the event un-acked. It will be redelivered on the next run.
+            return
+
+        self._process_event(tracked_event.envelope)
+        self._complete_tracked_event(tracked_event)
+
+    def _complete_tracked_event(self, tracked_event: TrackedEvent) -> None:
+        # Ack all events which are now safe to ack. This is serialized so that acks never move backwards.
+        with self._ack_lock:
+            ackable_events = self._offset_tracker.complete(tracked_event)
+            if ackable_events:
+                self._ack_batch(ackable_events)
+
+    def _get_ordering_key(self, enveloped_event: EventEnvelope) -> Hashable:
+        if self._ordering_key == OrderingKey.ENTITY_URN:
+            entity_urn = get_entity_urn(enveloped_event)
+            if entity_urn is not None:
+                return entity_urn
+        return get_partition_key(enveloped_event)
+
+    async def _events_async(self) -> AsyncIterator[EventEnvelope]:
+        if isinstance(self.source, AsyncEventSource):
+            async for enveloped_event in self.source.events_async():
+                yield enveloped_event
+            return
+
+        # Synchronous sources block while waiting for events, so they are iterated from a dedicated thread.
+        loop = asyncio.get_running_loop()
+        source_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix=f"{self.name}-source"
+        )
+        enveloped_events = self._events()
+        enveloped_events_iter = iter(enveloped_events)
+        try:
+            while True:
+                enveloped_event = await loop.run_in_executor(
+                    source_executor, next, enveloped_events_iter, None
+                )
+                if enveloped_event is None:
+                    return
+                yield enveloped_event
+        finally:
+            if isinstance(enveloped_events, PrefetchQueue):
+                enveloped_events.close()
+            source_executor.shutdown(wait=False)
+
+    async def _process_tracked_event_async(
+        self,
+        tracked_event: TrackedEvent,
+        previous_task: Optional[asyncio.Task],
+        executor: ThreadPoolExecutor,
+        ack_lock: asyncio.Lock,
+    ) -> None:
+        if previous_task is not None:
+            # Preserve ordering among events sharing an ordering key.
+            await previous_task
+
+        if self._shutdown:
+            # Leave the event un-acked. It will be redelivered on the next run.
+            return
+
+        await self._process_event_async(tracked_event.envelope, executor)
+
+        # Ack all events which are now safe to ack. This is serialized so that acks never move backwards.
+        async with ack_lock:
+            ackable_events = self._offset_tracker.complete(tracked_event)
+            if ackable_events:
+                await self._ack_batch_async(ackable_events, executor)
+
+    async def _process_event_async(
+        self, enveloped_event: EventEnvelope, executor: ThreadPoolExecutor
+    ) -> None:
+        if not isinstance(self.action, AsyncAction):
+            # Synchronous Actions are run to completion, including retries, on the executor.
+            await asyncio.get_running_loop().run_in_executor(
+                executor, self._process_event, enveloped_event
+            )
+            return
+
+        # Attempt to process the incoming event, with retry.
+        curr_attempt = 1
+        max_attempts = self._retry_count + 1
+        while curr_attempt <= max_attempts:
+            try:
+                # First, transform the event.
+                transformed_event = self._execute_transformers(enveloped_event)
+
+                # Then, invoke the action if the event is non-null.
+                if transformed_event is not None:
+                    await self._execute_action_async(transformed_event)
+
+                # Short circuit - processing has succeeded.
+                return
+            except Exception:
+                logger.exception(
+                    f"Caught exception while attempting to process event. Attempt {curr_attempt}/{max_attempts} event type: {enveloped_event.event_type}, pipeline name: {self.name}"
+                )
+            if curr_attempt < max_attempts:
+                # Back off before retrying, without blocking the event loop.
+                await asyncio.sleep(
+                    self._retry_policy.get_backoff_seconds(curr_attempt)
+                )
+            curr_attempt = curr_attempt + 1
+
+        self._fail_event(enveloped_event)
 
     def stop(self) -> None:
         """
@@ -175,9 +833,12 @@ class Pipeline:
         """
         logger.debug(f"Preparing to stop Actions Pipeline with name {self.name}")
         self._shutdown = True
-        self._failed_events_fd.close()
         self.source.close()
         self.action.close()
+        # Events which fail while processing drains are still written to the dead letter queue, so a running
+        # Pipeline closes its writer once it has finished.
+        if not self._running:
+            self._close_dead_letter_writer()
 
     def stats(self) -> PipelineStats:
         """
@@ -185,85 +846,197 @@ class Pipeline:
         """
         return self._stats
 
+    def is_ready(self) -> bool:
+        """
+        Returns whether the Pipeline is running and its source is ready, e.g. caught up on its backlog.
+        """
+        return not self._shutdown and self.source.is_ready()
+
     def _process_event(self, enveloped_event: EventEnvelope) -> None:
         # Attempt to process the incoming event, with retry.
         curr_attempt = 1
         max_attempts = self._retry_count + 1
+        while curr_attempt <= max_attempts:
+            if self._try_process_event(enveloped_event, curr_attempt, max_attempts):
+                # Short circuit - processing has succeeded.
+                return
+            if curr_attempt < max_attempts:
+                # Back off before retrying, so that a struggling downstream system is not hammered.
+                backoff_seconds = self._retry_policy.get_backoff_seconds(curr_attempt)
+                if backoff_seconds > 0:
+                    time.sleep(backoff_seconds)
+            curr_attempt = curr_attempt + 1
+
+        self._fail_event(enveloped_event)
+
+    def _try_process_event(
+        self, enveloped_event: EventEnvelope, attempt: int, max_attempts: int
+    ) -> bool:
+        try:
+            # First, transform the event.
+            transformed_event = self._execute_transformers(enveloped_event)
+
+            # Then, invoke the action if the event is non-null.
+            if transformed_event is not None:
+                self._execute_action(transformed_event)
+            return True
+        except Exception:
+            logger.exception(
+                f"Caught exception while attempting to process event. Attempt {attempt}/{max_attempts} event type: {enveloped_event.event_type}, pipeline name: {self.name}"
+            )
+            return False
+
+    def _fail_event(self, enveloped_event: EventEnvelope) -> None:
+        logger.error(
+            f"Failed to process event after {self._retry_count} retries. event type: {enveloped_event.event_type}, pipeline name: {self.name}. Handling failure..."
+        )
+
+        # Increment failed event count.
+        self._stats.increment_failed_event_count()
+
+        # Finally, handle the failure
+        self._handle_failure(enveloped_event)
+
+    def _process_batch(self, enveloped_events: List[EventEnvelope]) -> None:
+        # Attempt to process the incoming batch as a whole, with retry.
+        curr_attempt = 1
+        max_attempts = self._retry_count + 1
         while curr_attempt <= max_attempts:
             try:
-                # First, transform the event.
-                transformed_event = self._execute_transformers(enveloped_event)
+                # First, transform each event in the batch.
+                transformed_events = []
+                for enveloped_event in enveloped_events:
+                    transformed_event = self._execute_transformers(enveloped_event)
+                    if transformed_event is not None:
+                        transformed_events.append(transformed_event)
 
-                # Then, invoke the action if the event is non-null.
-                if transformed_event is not None:
-                    self._execute_action(transformed_event)
+                # Then, invoke the action once if any events remain.
+                if transformed_events:
+                    self._execute_action_batch(transformed_events)
 
                 # Short circuit - processing has succeeded.
                 return
             except Exception:
                 logger.exception(
-                    f"Caught exception while attempting to process event. Attempt {curr_attempt}/{max_attempts} event type: {enveloped_event.event_type}, pipeline name: {self.name}"
+                    f"Caught exception while attempting to process batch of {len(enveloped_events)} events. Attempt {curr_attempt}/{max_attempts}, pipeline name: {self.name}"
                 )
                 curr_attempt = curr_attempt + 1
 
-            logger.error(
-                f"Failed to process event after {self._retry_count} retries. event type: {enveloped_event.event_type}, pipeline name: {self.name}. Handling failure..."
-            )
-
-            # Increment failed event count.
-            self._stats.increment_failed_event_count()
-
-            # Finally, handle the failure
-            self._handle_failure(enveloped_event)
+        # The batch as a whole could not be processed. Fall back to processing each event individually,
+        # so that only the events which are actually failing end up in the failed events log.
+        logger.error(
+            f"Failed to process batch of {len(enveloped_events)} events after {self._retry_count} retries, pipeline name: {self.name}. Falling back to processing events individually..."
+        )
+        for enveloped_event in enveloped_events:
+            self._process_event(enveloped_event)
 
     def _execute_transformers(
         self, enveloped_event: EventEnvelope
     ) -> Optional[EventEnvelope]:
         curr_event = enveloped_event
         # Iterate through all transformers, sequentially apply them to the result of the previous.
-        for transformer in self.transforms:
+        for transformer, transformer_stats, latency_metric in self._transformer_handles:
             # Increment stats
-            self._stats.increment_transformer_processed_count(transformer)
+            transformer_stats.increment_processed_count()
 
             # Transform the event
-            transformed_event = self._execute_transformer(curr_event, transformer)
+            transformed_event = self._execute_transformer(
+                curr_event, transformer, transformer_stats, latency_metric
+            )
 
             # Process result
             if transformed_event is None:
                 # If the transformer has filtered the event, short circuit.
-                self._stats.increment_transformer_filtered_count(transformer)
+                transformer_stats.increment_filtered_count()
                 return None
-            # Otherwise, set the result to the transformed event.
+            # Otherwise, set the result to the transformed event. Transformers may modify events in place,
+            # so any cached serialized form of the event is dropped.
+            transformed_event.invalidate()
             curr_event = transformed_event
 
         # Return the final transformed event.
         return curr_event
 
     def _execute_transformer(
-        self, enveloped_event: EventEnvelope, transformer: Transformer
+        self,
+        enveloped_event: EventEnvelope,
+        transformer: Transformer,
+        transformer_stats: TransformerStats,
+        latency_metric: Any,
     ) -> Optional[EventEnvelope]:
+        started_at = time.perf_counter()
         try:
             return transformer.transform(enveloped_event)
         except Exception as e:
-            self._stats.increment_transformer_exception_count(transformer)
+            transformer_stats.increment_exception_count()
             raise PipelineException(
                 f"Caught exception while executing Transformer with name {type(transformer).__name__}"
             ) from e
+        finally:
+            latency_metric.observe(time.perf_counter() - started_at)
 
     def _execute_action(self, enveloped_event: EventEnvelope) -> None:
+        started_at = time.perf_counter()
         try:
             self.action.act(enveloped_event)
             self._stats.increment_action_success_count()
+            self._observe_action_latency(started_at, failed=False)
+        except Exception as e:
+            self._stats.increment_action_exception_count()
+            self._observe_action_latency(started_at, failed=True)
+            raise PipelineException(
+                f"Caught exception while executing Action with type {type(self.action).__name__}"
+            ) from e
+
+    def _execute_action_batch(self, enveloped_events: List[EventEnvelope]) -> None:
+        started_at = time.perf_counter()
+        try:
+            self.action.act_batch(enveloped_events)
+            self._stats.increment_action_success_count(len(enveloped_events))
+            self._observe_action_latency(started_at, failed=False)
+        except Exception as e:
+            self._stats.increment_action_exception_count()
+            self._observe_action_latency(started_at, failed=True)
+            raise PipelineException(
+                f"Caught exception while executing Action with type {type(self.action).__name__} on a batch of {len(enveloped_events)} events"
+            ) from e
+
+    async def _execute_action_async(self, enveloped_event: EventEnvelope) -> None:
+        assert isinstance(self.action, AsyncAction)
+        started_at = time.perf_counter()
+        try:
+            await self.action.act_async(enveloped_event)
+            self._stats.increment_action_success_count()
+            self._observe_action_latency(started_at, failed=False)
         except Exception as e:
             self._stats.increment_action_exception_count()
+            self._observe_action_latency(started_at, failed=True)
             raise PipelineException(
                 f"Caught exception while executing Action with type {type(self.action).__name__}"
             ) from e
 
+    def _observe_action_latency(self, started_at: float, failed: bool) -> None:
+        latency_seconds = time.perf_counter() - started_at
+        self._action_latency_metric.observe(latency_seconds)
+        if self._concurrency_limiter is not None:
+            self._concurrency_limiter.record(latency_seconds, failed)
+
+    def _observe_ack_latency(
+        self, started_at: float, enveloped_events: Iterable[EventEnvelope]
+    ) -> None:
+        self._ack_latency_metric.observe(time.perf_counter() - started_at)
+        acked_at = time.time()
+        for enveloped_event in enveloped_events:
+            produced_at = get_event_timestamp(enveloped_event)
+            if produced_at is not None:
+                self._event_latency_metric.observe(max(0.0, acked_at - produced_at))
+
     def _ack_event(self, enveloped_event: EventEnvelope) -> None:
+        started_at = time.perf_counter()
         try:
             self.source.ack(enveloped_event)
             self._stats.increment_success_count()
+            self._observe_ack_latency(started_at, [enveloped_event])
         except Exception:
             self._stats.increment_failed_ack_count()
             logger.exception(
@@ -271,41 +1044,113 @@ class Pipeline:
             )
             logger.debug(f"Failed to ack event: {enveloped_event}")
 
+    def _ack_batch(self, enveloped_events: List[EventEnvelope]) -> None:
+        started_at = time.perf_counter()
+        try:
+            self.source.ack_batch(enveloped_events)
+            self._stats.increment_success_count(len(enveloped_events))
+            self._observe_ack_latency(started_at, enveloped_events)
+        except Exception:
+            self._stats.increment_failed_ack_count(len(enveloped_events))
+            logger.exception(
+                f"Caught exception while attempting to ack successfully processed batch of {len(enveloped_events)} events, pipeline name: {self.name}",
+            )
+
+    async def _ack_batch_async(
+        self, enveloped_events: List[EventEnvelope], executor: ThreadPoolExecutor
+    ) -> None:
+        if not isinstance(self.source, AsyncEventSource):
+            await asyncio.get_running_loop().run_in_executor(
+                executor, self._ack_batch, enveloped_events
+            )
+            return
+        started_at = time.perf_counter()
+        try:
+            await self.source.ack_batch_async(enveloped_events)
+            self._stats.increment_success_count(len(enveloped_events))
+            self._observe_ack_latency(started_at, enveloped_events)
+        except Exception:
+            self._stats.increment_failed_ack_count(len(enveloped_events))
+            logger.exception(
+                f"Caught exception while attempting to ack successfully processed batch of {len(enveloped_events)} events, pipeline name: {self.name}",
+            )
+
     def _handle_failure(self, enveloped_event: EventEnvelope) -> None:
-        # First, always save the failed event to a file. Useful for investigation.
-        self._append_failed_event_to_file(enveloped_event)
+        # First, always save the failed event to the dead letter queue. Useful for investigation.
+        self._write_dead_letter(enveloped_event)
         if self._failure_mode == FailureMode.THROW:
+            # Make sure the failed event is written out before the pipeline stops.
+            self._flush_dead_letters()
             raise PipelineException("Failed to process event after maximum retries.")
         elif self._failure_mode == FailureMode.CONTINUE:
             # Simply return, nothing left to do.
             pass
 
-    def _append_failed_event_to_file(self, enveloped_event: EventEnvelope) -> None:
-        # First, convert the event to JSON.
+    def _write_dead_letter(self, enveloped_event: EventEnvelope) -> None:
         try:
-            json = enveloped_event.as_json()
-            # Then append to failed events file.
-            self._failed_events_fd.write(json + "\n")
-            self._failed_events_fd.flush()
+            self._dead_letter_writer.write(enveloped_event)
         except Exception as e:
             # This is a serious issue, as if we do not handle it can mean losing an event altogether.
             # Raise an exception to ensure this issue is reported to the operator.
             raise PipelineException(
-                f"Failed to log failed event to file! {enveloped_event}"
+                f"Failed to write failed event to dead letter queue! {enveloped_event}"
+            ) from e
+
+    def _finish_running(self) -> None:
+        self._running = False
+        try:
+            self._flush_dead_letters()
+        finally:
+            if self._shutdown:
+                self._close_dead_letter_writer()
+
+    def _close_dead_letter_writer(self) -> None:
+        # Both stop and the finishing run may attempt to close the writer.
+        with self._dead_letter_writer_lock:
+            if self._dead_letter_writer_closed:
+                return
+            self._dead_letter_writer_closed = True
+        self._dead_letter_writer.close()
+
+    def _flush_dead_letters(self) -> None:
+        try:
+            self._dead_letter_writer.flush()
+        except Exception as e:
+            raise PipelineException(
+                f"Failed to flush failed events to dead letter queue for pipeline {self.name}!"
             ) from e
 
-    def _init_failed_events_dir(self) -> None:
+    def _create_retry_queue(self) -> Optional[RetryQueue]:
+        if self._retry_mode == RetryMode.MEMORY:
+            return MemoryRetryQueue()
+        if self._retry_mode == RetryMode.DISK:
+            retry_queue_dir = self._retry_queue_dir or os.path.join(
+                self._failed_events_dir,
+                normalize_directory_name(self.name),
+                DEFAULT_RETRY_QUEUE_DIR_NAME,
+            )
+            codec = event_codec_registry.get(self._retry_queue_format)()
+            try:
+                return DiskRetryQueue(retry_queue_dir, codec)
+            except OSError as e:
+                raise PipelineException(
+                    f"Caught exception while attempting to create retry queue at path {retry_queue_dir}. Please check your file system permissions."
+                ) from e
+        # Failing events are retried inline.
+        return None
+
+    def _create_failed_events_file_writer(self) -> DeadLetterWriter:
         # create a directory for failed events from this actions pipeine.
         failed_events_dir = os.path.join(
             self._failed_events_dir, normalize_directory_name(self.name)
         )
         try:
-            os.makedirs(failed_events_dir, exist_ok=True)
-
-            failed_events_file_name = os.path.join(
-                failed_events_dir, DEFAULT_FAILED_EVENTS_FILE_NAME
+            return FileDeadLetterWriter(
+                FileDeadLetterWriterConfig(
+                    directory=failed_events_dir,
+                    file_name=DEFAULT_FAILED_EVENTS_FILE_NAME,
+                )
             )
-            self._failed_events_fd = open(failed_events_file_name, "a")
         except Exception as e:
             logger.debug(e)
             raise PipelineException(
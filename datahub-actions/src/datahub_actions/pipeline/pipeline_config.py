@@ -27,6 +27,22 @@ class FailureMode(str, Enum):
     CONTINUE = "CONTINUE"
 
 
+class OrderingKey(str, Enum):
+    # Preserve processing order per source partition (e.g. a Kafka topic partition).
+    PARTITION = "PARTITION"
+    # Preserve processing order per entity urn. Allows more concurrency within a single partition.
+    ENTITY_URN = "ENTITY_URN"
+
+
+class RetryMode(str, Enum):
+    # Retry a failing event immediately, blocking the events behind it until it succeeds or runs out of retries.
+    INLINE = "INLINE"
+    # Hold a failing event in memory until its next retry is due, while later events continue to flow.
+    MEMORY = "MEMORY"
+    # Spool a failing event to local disk until its next retry is due, while later events continue to flow.
+    DISK = "DISK"
+
+
 class SourceConfig(ConfigModel):
     type: str
     config: Optional[Dict[str, Any]]
@@ -47,10 +63,32 @@ class ActionConfig(ConfigModel):
     config: Optional[dict]
 
 
+class DeadLetterConfig(ConfigModel):
+    type: str
+    config: Optional[Dict[str, Any]]
+
+
 class PipelineOptions(BaseModel):
     retry_count: Optional[int]
     failure_mode: Optional[FailureMode]
     failed_events_dir: Optional[str]  # The path where failed events should be logged.
+    batch_size: Optional[int]  # The max number of events handed to the Action at once.
+    linger_ms: Optional[int]  # The max time to wait for a batch to fill up.
+    max_concurrency: Optional[int]  # The max number of events processed concurrently.
+    ordering_key: Optional[OrderingKey]  # The key to preserve ordering on.
+    adaptive_concurrency: Optional[bool]  # Whether to adapt the concurrency limit.
+    min_concurrency: Optional[int]  # The lowest adaptive concurrency limit.
+    prefetch_size: Optional[
+        int
+    ]  # The max number of events buffered ahead of processing.
+    prefetch_max_bytes: Optional[
+        int
+    ]  # The max size of events buffered ahead of processing.
+    retry_mode: Optional[RetryMode]  # Where failing events wait to be retried.
+    retry_initial_backoff_ms: Optional[int]  # The delay before the first retry.
+    retry_max_backoff_ms: Optional[int]  # The max delay between retries.
+    retry_queue_dir: Optional[str]  # The path where retried events are spooled.
+    retry_queue_format: Optional[str]  # The format retried events are spooled in.
 
     class Config:
         use_enum_values = True
@@ -72,3 +110,4 @@ class PipelineConfig(ConfigModel):
     action: ActionConfig
     datahub: Optional[DatahubClientConfig]
     options: Optional[PipelineOptions]
+    dead_letter: Optional[DeadLetterConfig]
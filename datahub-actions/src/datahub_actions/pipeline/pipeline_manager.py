@@ -12,11 +12,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
 import logging
 import traceback
+from concurrent.futures import Future
 from dataclasses import dataclass
 from threading import Thread
-from typing import Dict
+from typing import Dict, Optional
 
 from datahub_actions.pipeline.pipeline import Pipeline, PipelineException
 
@@ -31,8 +33,11 @@ class PipelineSpec:
     # The pipeline
     pipeline: Pipeline
 
-    # The thread which is executing the pipeline.
-    thread: Thread
+    # The thread which is executing the pipeline. Not set for pipelines hosted on the shared event loop.
+    thread: Optional[Thread]
+
+    # The future tracking the pipeline, if it is hosted on the shared event loop.
+    future: Optional[Future] = None
 
 
 # Run a pipeline in blocking fashion
@@ -48,27 +53,69 @@ def run_pipeline(pipeline: Pipeline) -> None:
     logger.debug(f"Thread for pipeline with name {pipeline.name} has stopped.")
 
 
+# Run a pipeline on the running event loop
+async def run_pipeline_async(pipeline: Pipeline) -> None:
+    try:
+        await pipeline.start()
+    except PipelineException:
+        logger.error(
+            f"Caught exception while running pipeline with name {pipeline.name}: {traceback.format_exc(limit=3)}"
+        )
+        pipeline.stop()
+    logger.debug(f"Task for pipeline with name {pipeline.name} has stopped.")
+
+
 # A manager of multiple Action Pipelines.
-# This class manages 1 thread per pipeline registered.
+# By default, this class manages 1 thread per pipeline registered. Alternatively, pipelines can
+# be hosted together on a single asyncio event loop, which runs on its own thread.
 class PipelineManager:
     # A catalog of all the currently executing Action Pipelines.
     pipeline_registry: Dict[str, PipelineSpec] = {}
 
+    # The event loop shared by all pipelines started with 'use_event_loop'.
+    _event_loop: Optional[asyncio.AbstractEventLoop] = None
+
     def __init__(self) -> None:
         pass
 
     # Start a new Action Pipeline.
-    def start_pipeline(self, name: str, pipeline: Pipeline) -> None:
+    def start_pipeline(
+        self, name: str, pipeline: Pipeline, use_event_loop: bool = False
+    ) -> None:
         logger.debug(f"Attempting to start pipeline with name {name}...")
         if name not in self.pipeline_registry:
-            thread = Thread(target=run_pipeline, args=([pipeline]))
-            thread.start()
-            spec = PipelineSpec(name, pipeline, thread)
+            if use_event_loop:
+                future = asyncio.run_coroutine_threadsafe(
+                    run_pipeline_async(pipeline), self._get_event_loop()
+                )
+                spec = PipelineSpec(name, pipeline, None, future)
+            else:
+                thread = Thread(target=run_pipeline, args=([pipeline]))
+                thread.start()
+                spec = PipelineSpec(name, pipeline, thread)
             self.pipeline_registry[name] = spec
             logger.debug(f"Started pipeline with name {name}.")
         else:
             raise Exception(f"Pipeline with name {name} is already running.")
 
+    def _get_event_loop(self) -> asyncio.AbstractEventLoop:
+        # Lazily start the shared event loop on a background thread.
+        event_loop = PipelineManager._event_loop
+        if event_loop is None:
+            event_loop = asyncio.new_event_loop()
+            Thread(
+                target=event_loop.run_forever, name="pipeline-event-loop", daemon=True
+            ).start()
+            PipelineManager._event_loop = event_loop
+        return event_loop
+
+    # Whether any Action Pipelines are running, and all of them are ready.
+    def is_ready(self) -> bool:
+        pipeline_specs = list(self.pipeline_registry.values())
+        return bool(pipeline_specs) and all(
+            spec.pipeline.is_ready() for spec in pipeline_specs
+        )
+
     # Stop a running Action Pipeline.
     def stop_pipeline(self, name: str) -> None:
         logger.debug(f"Attempting to stop pipeline with name {name}...")
@@ -77,7 +124,10 @@ class PipelineManager:
             try:
                 pipeline_spec = self.pipeline_registry[name]
                 pipeline_spec.pipeline.stop()
-                pipeline_spec.thread.join()  # Wait for the pipeline thread to terminate.
+                if pipeline_spec.thread is not None:
+                    pipeline_spec.thread.join()  # Wait for the pipeline thread to terminate.
+                if pipeline_spec.future is not None:
+                    pipeline_spec.future.result()  # Wait for the pipeline task to terminate.
                 logger.info(f"Actions Pipeline with name '{name}' has been stopped.")
                 pipeline_spec.pipeline.stats().pretty_print_summary(
                     name
@@ -14,8 +14,10 @@
 
 import datetime
 import json
+import threading
+from dataclasses import dataclass
 from time import time
-from typing import Dict
+from typing import Dict, Optional
 
 import click
 
@@ -23,63 +25,103 @@ from datahub_actions.action.action_stats import ActionStats
 from datahub_actions.pipeline.pipeline_util import get_transformer_name
 from datahub_actions.transform.transformer import Transformer
 from datahub_actions.transform.transformer_stats import TransformerStats
+from datahub_actions.utils.sharded_counter import ShardedCounter
+
+
+# A point in time view of the statistics of an Actions Pipeline, from which processing rates can be computed.
+@dataclass(frozen=True)
+class PipelineStatsSnapshot:
+    # Timestamp in milliseconds when the snapshot was taken.
+    taken_at: int
+    failed_event_count: int
+    failed_ack_count: int
+    success_count: int
+    action_success_count: int
+    action_exception_count: int
+
+    def rates(self, previous: "PipelineStatsSnapshot") -> Dict[str, float]:
+        """
+        Returns the per second rate of each count between a previous snapshot and this one.
+        """
+        elapsed_seconds = max((self.taken_at - previous.taken_at) / 1000.0, 0.001)
+        return {
+            "failed_event_rate": (self.failed_event_count - previous.failed_event_count)
+            / elapsed_seconds,
+            "failed_ack_rate": (self.failed_ack_count - previous.failed_ack_count)
+            / elapsed_seconds,
+            "success_rate": (self.success_count - previous.success_count)
+            / elapsed_seconds,
+            "action_success_rate": (
+                self.action_success_count - previous.action_success_count
+            )
+            / elapsed_seconds,
+            "action_exception_rate": (
+                self.action_exception_count - previous.action_exception_count
+            )
+            / elapsed_seconds,
+        }
+
+
+# Class that stores running statistics for a single Actions Pipeline. Safe to increment from multiple threads.
+class PipelineStats:
+    def __init__(self) -> None:
+        # Timestamp in milliseconds when the pipeline was launched.
+        self.started_at: int = int(time() * 1000)
 
+        # Number of events that failed processing even after retry.
+        self._failed_event_count = ShardedCounter()
 
-# Class that stores running statistics for a single Actions Pipeline.
-class PipelineStats:
-    # Timestamp in milliseconds when the pipeline was launched.
-    started_at: int
+        # Number of events that failed when "ack" was invoked.
+        self._failed_ack_count = ShardedCounter()
+
+        # Top-level number of succeeded processing executions.
+        self._success_count = ShardedCounter()
 
-    # Number of events that failed processing even after retry.
-    failed_event_count: int = 0
+        # Transformer Stats
+        self.transformer_stats: Dict[str, TransformerStats] = {}
+        self._transformer_stats_lock = threading.Lock()
 
-    # Number of events that failed when "ack" was invoked.
-    failed_ack_count: int = 0
+        # Action Stats
+        self.action_stats: ActionStats = ActionStats()
 
-    # Top-level number of succeeded processing executions.
-    success_count: int = 0
+    @property
+    def failed_event_count(self) -> int:
+        return self._failed_event_count.value
 
-    # Transformer Stats
-    transformer_stats: Dict[str, TransformerStats] = {}
+    @property
+    def failed_ack_count(self) -> int:
+        return self._failed_ack_count.value
 
-    # Action Stats
-    action_stats: ActionStats = ActionStats()
+    @property
+    def success_count(self) -> int:
+        return self._success_count.value
 
     def mark_start(self) -> None:
         self.started_at = int(time() * 1000)
 
     def increment_failed_event_count(self) -> None:
-        self.failed_event_count = self.failed_event_count + 1
+        self._failed_event_count.increment()
 
-    def increment_failed_ack_count(self) -> None:
-        self.failed_ack_count = self.failed_ack_count + 1
+    def increment_failed_ack_count(self, count: int = 1) -> None:
+        self._failed_ack_count.increment(count)
 
-    def increment_success_count(self) -> None:
-        self.success_count = self.success_count + 1
+    def increment_success_count(self, count: int = 1) -> None:
+        self._success_count.increment(count)
 
     def increment_transformer_exception_count(self, transformer: Transformer) -> None:
-        transformer_name = get_transformer_name(transformer)
-        if transformer_name not in self.transformer_stats:
-            self.transformer_stats[transformer_name] = TransformerStats()
-        self.transformer_stats[transformer_name].increment_exception_count()
+        self.get_transformer_stats(transformer).increment_exception_count()
 
     def increment_transformer_processed_count(self, transformer: Transformer) -> None:
-        transformer_name = get_transformer_name(transformer)
-        if transformer_name not in self.transformer_stats:
-            self.transformer_stats[transformer_name] = TransformerStats()
-        self.transformer_stats[transformer_name].increment_processed_count()
+        self.get_transformer_stats(transformer).increment_processed_count()
 
     def increment_transformer_filtered_count(self, transformer: Transformer) -> None:
-        transformer_name = get_transformer_name(transformer)
-        if transformer_name not in self.transformer_stats:
-            self.transformer_stats[transformer_name] = TransformerStats()
-        self.transformer_stats[transformer_name].increment_filtered_count()
+        self.get_transformer_stats(transformer).increment_filtered_count()
 
     def increment_action_exception_count(self) -> None:
         self.action_stats.increment_exception_count()
 
-    def increment_action_success_count(self) -> None:
-        self.action_stats.increment_success_count()
+    def increment_action_success_count(self, count: int = 1) -> None:
+        self.action_stats.increment_success_count(count)
 
     def get_started_at(self) -> int:
         return self.started_at
@@ -94,16 +136,52 @@ class PipelineStats:
         return self.success_count
 
     def get_transformer_stats(self, transformer: Transformer) -> TransformerStats:
+        """
+        Returns the stats of a transformer. Callers on a hot path should hold on to the result, rather than
+        looking it up for every event.
+        """
         transformer_name = get_transformer_name(transformer)
-        if transformer_name not in self.transformer_stats:
-            self.transformer_stats[transformer_name] = TransformerStats()
-        return self.transformer_stats[transformer_name]
+        transformer_stats = self.transformer_stats.get(transformer_name)
+        if transformer_stats is None:
+            with self._transformer_stats_lock:
+                transformer_stats = self.transformer_stats.setdefault(
+                    transformer_name, TransformerStats()
+                )
+        return transformer_stats
 
     def get_action_stats(self) -> ActionStats:
         return self.action_stats
 
+    def snapshot(self) -> PipelineStatsSnapshot:
+        return PipelineStatsSnapshot(
+            taken_at=int(time() * 1000),
+            failed_event_count=self.failed_event_count,
+            failed_ack_count=self.failed_ack_count,
+            success_count=self.success_count,
+            action_success_count=self.action_stats.success_count,
+            action_exception_count=self.action_stats.exception_count,
+        )
+
+    def rates(
+        self, previous: Optional[PipelineStatsSnapshot] = None
+    ) -> Dict[str, float]:
+        """
+        Returns the per second rate of each count since a previous snapshot, or since the pipeline was launched.
+        """
+        if previous is None:
+            previous = PipelineStatsSnapshot(self.started_at, 0, 0, 0, 0, 0)
+        return self.snapshot().rates(previous)
+
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            "started_at": self.started_at,
+            "failed_event_count": self.failed_event_count,
+            "failed_ack_count": self.failed_ack_count,
+            "success_count": self.success_count,
+        }
+
     def as_string(self) -> str:
-        return json.dumps(self.__dict__, indent=4, sort_keys=True)
+        return json.dumps(self.as_dict(), indent=4, sort_keys=True)
 
     def pretty_print_summary(self, name: str) -> None:
         curr_time = int(time() * 1000)
@@ -114,6 +192,7 @@ class PipelineStats:
             f"Started at: {datetime.datetime.fromtimestamp(self.started_at/1000.0)} (Local Time)"
         )
         click.echo(f"Duration: {(curr_time - self.started_at)/1000.0}s")
+        click.echo(f"Throughput: {self.rates()['success_rate']:.2f} events/s")
         click.echo()
         click.secho("Pipeline statistics", bold=True)
         click.echo()
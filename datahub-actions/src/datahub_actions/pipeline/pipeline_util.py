@@ -14,15 +14,21 @@
 
 import logging
 import re
-from typing import Optional
+from typing import Hashable, Optional
 
 from datahub.ingestion.graph.client import DatahubClientConfig, DataHubGraph
 
 from datahub_actions.action.action import Action
 from datahub_actions.action.action_registry import action_registry
 from datahub_actions.api.action_graph import AcrylDataHubGraph
+from datahub_actions.dead_letter.dead_letter_writer import DeadLetterWriter
+from datahub_actions.dead_letter.dead_letter_writer_registry import (
+    dead_letter_writer_registry,
+)
+from datahub_actions.event.event_envelope import EventEnvelope
 from datahub_actions.pipeline.pipeline_config import (
     ActionConfig,
+    DeadLetterConfig,
     FilterConfig,
     SourceConfig,
     TransformConfig,
@@ -145,6 +151,37 @@ def create_action(action_config: ActionConfig, ctx: PipelineContext) -> Action:
     return action_instance
 
 
+def create_dead_letter_writer(
+    dead_letter_config: DeadLetterConfig, ctx: PipelineContext
+) -> DeadLetterWriter:
+    dead_letter_writer_type = dead_letter_config.type
+    dead_letter_writer_instance = None
+    try:
+        logger.debug(
+            f"Attempting to instantiate new Dead Letter Writer of type {dead_letter_writer_type}.."
+        )
+        dead_letter_writer_class = dead_letter_writer_registry.get(
+            dead_letter_writer_type
+        )
+        dead_letter_writer_config_dict = (
+            dead_letter_config.config if dead_letter_config.config is not None else {}
+        )
+        dead_letter_writer_instance = dead_letter_writer_class.create(
+            dead_letter_writer_config_dict, ctx
+        )
+    except Exception as e:
+        raise Exception(
+            f"Caught exception while attempting to instantiate Dead Letter Writer with type {dead_letter_writer_type}"
+        ) from e
+
+    if dead_letter_writer_instance is None:
+        raise Exception(
+            f"Failed to create Dead Letter Writer with type {dead_letter_writer_type}. Dead Letter Writer create method returned 'None'."
+        )
+
+    return dead_letter_writer_instance
+
+
 def normalize_directory_name(name: str) -> str:
     # Lower case & remove whitespaces + periods.
     return re.sub(r"[^\w\-_]", "_", name.lower())
@@ -153,3 +190,31 @@ def normalize_directory_name(name: str) -> str:
 def get_transformer_name(transformer: Transformer) -> str:
     # TODO: Would be better to compute this using the transformer registry itself.
     return type(transformer).__name__
+
+
+def get_partition_key(enveloped_event: EventEnvelope) -> Hashable:
+    # Events from a source without partitions are considered part of a single ordered stream.
+    kafka_meta = enveloped_event.meta.get("kafka") if enveloped_event.meta else None
+    if kafka_meta is None:
+        return None
+    return (kafka_meta["topic"], kafka_meta["partition"])
+
+
+def get_entity_urn(enveloped_event: EventEnvelope) -> Optional[str]:
+    return getattr(enveloped_event.event, "entityUrn", None)
+
+
+def get_event_size(enveloped_event: EventEnvelope) -> int:
+    # The serialized size of the event, if reported by the source. Used to bound the memory held by buffered events.
+    kafka_meta = enveloped_event.meta.get("kafka") if enveloped_event.meta else None
+    if kafka_meta is None:
+        return 0
+    return kafka_meta.get("size", 0)
+
+
+def get_event_timestamp(enveloped_event: EventEnvelope) -> Optional[float]:
+    # The epoch time in seconds at which the event was produced, if reported by the source.
+    kafka_meta = enveloped_event.meta.get("kafka") if enveloped_event.meta else None
+    if kafka_meta is None or kafka_meta.get("timestamp") is None:
+        return None
+    return kafka_meta["timestamp"] / 1000.0
@@ -0,0 +1,134 @@
+# Copyright 2021 Acryl Data, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Iterable, Iterator, Optional, Tuple
+
+from datahub_actions.event.event_envelope import EventEnvelope
+
+logger = logging.getLogger(__name__)
+
+
+class PrefetchQueue:
+    """
+    A bounded buffer of events, filled by a background thread which iterates over an Event Source.
+
+    This allows the source to fetch and decode upcoming events while the Pipeline is busy processing earlier ones.
+    The producer thread blocks (applying backpressure to the source) once either the maximum number of events
+    or the maximum number of bytes are buffered. A single event is always admitted into an empty buffer,
+    so that an oversized event can never stall the stream.
+
+    If the source raises, the exception is re-raised to the consumer once all previously buffered events are consumed.
+    """
+
+    def __init__(
+        self,
+        events: Iterable[EventEnvelope],
+        max_events: int,
+        max_bytes: int,
+        size_fn: Callable[[EventEnvelope], int],
+        name: str,
+    ):
+        self._max_events = max_events
+        self._max_bytes = max_bytes
+        self._size_fn = size_fn
+        self._condition = threading.Condition()
+        self._buffer: Deque[Tuple[EventEnvelope, int]] = deque()
+        self._buffered_bytes = 0
+        self._producer_done = False
+        self._closed = False
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(
+            target=self._produce, args=(events,), name=f"{name}-prefetch", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def done(self) -> bool:
+        """
+        Whether the source has been exhausted, and all buffered events have been consumed.
+        """
+        with self._condition:
+            return self._producer_done and not self._buffer
+
+    def get(self, timeout: Optional[float] = None) -> Optional[EventEnvelope]:
+        """
+        Returns the next buffered event, waiting up to 'timeout' seconds (or forever if None) for one to arrive.
+
+        Returns None if the timeout elapses, or if the source has been exhausted.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while not self._buffer and not self._producer_done:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._condition.wait(remaining)
+            if not self._buffer:
+                if self._error is not None:
+                    raise self._error
+                return None
+            enveloped_event, size = self._buffer.popleft()
+            self._buffered_bytes = self._buffered_bytes - size
+            self._condition.notify_all()
+            return enveloped_event
+
+    def close(self) -> None:
+        """
+        Stops buffering new events. Any buffered events are discarded.
+        """
+        with self._condition:
+            self._closed = True
+            self._buffer.clear()
+            self._buffered_bytes = 0
+            self._condition.notify_all()
+
+    def __iter__(self) -> Iterator[EventEnvelope]:
+        while True:
+            enveloped_event = self.get()
+            if enveloped_event is None:
+                return
+            yield enveloped_event
+
+    def _produce(self, events: Iterable[EventEnvelope]) -> None:
+        try:
+            for enveloped_event in events:
+                size = self._size_fn(enveloped_event)
+                with self._condition:
+                    while not self._closed and self._is_full(size):
+                        self._condition.wait()
+                    if self._closed:
+                        return
+                    self._buffer.append((enveloped_event, size))
+                    self._buffered_bytes = self._buffered_bytes + size
+                    self._condition.notify_all()
+        except BaseException as e:
+            logger.debug(f"Prefetch of events failed: {e}")
+            self._error = e
+        finally:
+            with self._condition:
+                self._producer_done = True
+                self._condition.notify_all()
+
+    def _is_full(self, size: int) -> bool:
+        if not self._buffer:
+            return False
+        return (
+            len(self._buffer) >= self._max_events
+            or self._buffered_bytes + size > self._max_bytes
+        )
@@ -0,0 +1,233 @@
+# Copyright 2021 Acryl Data, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import heapq
+import itertools
+import logging
+import os
+import random
+import threading
+import time
+from abc import ABCMeta, abstractmethod
+from dataclasses import dataclass
+from typing import List, Optional, Tuple, Type
+
+from datahub_actions.event.event_codec import (
+    EventCodec,
+    JsonEventCodec,
+    MsgpackEventCodec,
+)
+from datahub_actions.event.event_envelope import EventEnvelope
+from datahub_actions.pipeline.offset_tracker import TrackedEvent
+
+logger = logging.getLogger(__name__)
+
+# The codecs spooled entries may have been written with, besides the queue's own. Entries are read back by their file suffix.
+SPOOL_CODEC_CLASSES = [JsonEventCodec, MsgpackEventCodec]
+
+
+@dataclass
+class RetryPolicy:
+    """
+    Exponential backoff with jitter, used to space out the attempts made to process a failing event.
+    """
+
+    # The delay after the first failed attempt.
+    initial_backoff_ms: int
+
+    # The maximum delay between two attempts.
+    max_backoff_ms: int
+
+    # The factor by which the delay grows after each failed attempt.
+    multiplier: float = 2.0
+
+    def get_backoff_seconds(self, failed_attempt: int) -> float:
+        backoff_ms = min(
+            self.max_backoff_ms,
+            self.initial_backoff_ms * self.multiplier ** (failed_attempt - 1),
+        )
+        # Equal jitter: wait at least half the backoff, so that retries from many pipelines are spread out.
+        return (backoff_ms / 2 + random.uniform(0, backoff_ms / 2)) / 1000.0
+
+
+class RetryEntry:
+    """
+    An event waiting in a retry queue for its next processing attempt.
+    """
+
+    __slots__ = ("envelope", "attempt", "ready_at", "tracked_event", "spool_path")
+
+    def __init__(
+        self,
+        envelope: EventEnvelope,
+        attempt: int,
+        ready_at: float,
+        tracked_event: Optional[TrackedEvent] = None,
+        spool_path: Optional[str] = None,
+    ):
+        # The event to retry.
+        self.envelope = envelope
+        # The number of the next attempt (the first attempt is 1).
+        self.attempt = attempt
+        # The epoch time in seconds at which the next attempt may be made.
+        self.ready_at = ready_at
+        # The handle used to ack the event once resolved. None if the event has already been acked.
+        self.tracked_event = tracked_event
+        # The location of the entry on disk, if it has been spooled.
+        self.spool_path = spool_path
+
+
+class RetryQueue(metaclass=ABCMeta):
+    """
+    A queue of failed events which are waiting to be retried, ordered by the time they become ready.
+
+    Events wait here while later events continue to be processed, so that a failing event does not
+    block the rest of the stream.
+    """
+
+    # Whether entries survive a restart of the process. If so, events can be acked as soon as they are queued.
+    durable: bool = False
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._heap: List[Tuple[float, int, RetryEntry]] = []
+        self._sequence = itertools.count()
+
+    def put(self, entry: RetryEntry) -> None:
+        with self._lock:
+            heapq.heappush(self._heap, (entry.ready_at, next(self._sequence), entry))
+
+    def poll_ready(self) -> List[RetryEntry]:
+        """
+        Removes and returns all entries which are ready to be retried, in order.
+        """
+        now = time.time()
+        ready = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                ready.append(heapq.heappop(self._heap)[2])
+        return ready
+
+    def get_next_ready_at(self) -> Optional[float]:
+        with self._lock:
+            return self._heap[0][0] if self._heap else None
+
+    @abstractmethod
+    def resolve(self, entry: RetryEntry) -> None:
+        """
+        Marks an entry previously returned from `poll_ready` as resolved, either because it has been
+        processed successfully or because it has exhausted its retries.
+        """
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._heap)
+
+
+class MemoryRetryQueue(RetryQueue):
+    """
+    A retry queue held in memory. Queued events are not acked until they are resolved.
+    """
+
+    def resolve(self, entry: RetryEntry) -> None:
+        pass
+
+
+class DiskRetryQueue(RetryQueue):
+    """
+    A retry queue spooled to files in a local directory, so that queued events survive a restart.
+
+    Because entries are durable, events can be acked as soon as they have been queued. Any entries
+    left over from a previous run are loaded on construction, and are immediately ready to be retried.
+    """
+
+    durable = True
+
+    def __init__(self, directory: str, codec: Optional[EventCodec] = None):
+        super().__init__()
+        self._directory = directory
+        # The codec new entries are spooled with.
+        self._codec = codec if codec is not None else JsonEventCodec()
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def put(self, entry: RetryEntry) -> None:
+        spool_path = os.path.join(
+            self._directory,
+            f"{int(entry.ready_at * 1000)}-{threading.get_ident()}-{time.monotonic_ns()}{self._codec.file_suffix}",
+        )
+        temp_path = spool_path + ".tmp"
+        with open(temp_path, "wb") as spool_file:
+            spool_file.write(
+                self._codec.dumps(
+                    {
+                        "attempt": entry.attempt,
+                        "event": entry.envelope.as_dict(),
+                    }
+                )
+            )
+            spool_file.flush()
+            os.fsync(spool_file.fileno())
+        # Rename, so that a partially written entry is never loaded.
+        os.replace(temp_path, spool_path)
+        if entry.spool_path is not None:
+            self._remove_spool_file(entry.spool_path)
+        entry.spool_path = spool_path
+        super().put(entry)
+
+    def resolve(self, entry: RetryEntry) -> None:
+        if entry.spool_path is not None:
+            self._remove_spool_file(entry.spool_path)
+            entry.spool_path = None
+
+    def _load(self) -> None:
+        for file_name in sorted(os.listdir(self._directory)):
+            if file_name.endswith(self._codec.file_suffix):
+                codec_class: Optional[Type[EventCodec]] = None
+            else:
+                codec_class = next(
+                    (
+                        codec_class
+                        for codec_class in SPOOL_CODEC_CLASSES
+                        if file_name.endswith(codec_class.file_suffix)
+                    ),
+                    None,
+                )
+                if codec_class is None:
+                    continue
+            spool_path = os.path.join(self._directory, file_name)
+            try:
+                codec = self._codec if codec_class is None else codec_class()
+                with open(spool_path, "rb") as spool_file:
+                    spooled = codec.loads(spool_file.read())
+                envelope = EventEnvelope.from_json_obj(spooled["event"])
+            except Exception:
+                logger.exception(
+                    f"Failed to load spooled retry entry {spool_path}. Skipping it."
+                )
+                continue
+            super().put(
+                RetryEntry(envelope, spooled["attempt"], 0.0, spool_path=spool_path)
+            )
+        if len(self) > 0:
+            logger.info(
+                f"Loaded {len(self)} spooled events to retry from {self._directory}"
+            )
+
+    def _remove_spool_file(self, spool_path: str) -> None:
+        try:
+            os.remove(spool_path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,86 @@
+# Copyright 2021 Acryl Data, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import logging
+import threading
+from queue import Queue
+from typing import Any, Callable, Hashable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Sentinel placed on a worker's queue to ask it to exit.
+_SHUTDOWN = object()
+
+
+class KeyedWorkerPool:
+    """
+    A fixed pool of worker threads, where each submitted task is routed to a worker based on its key.
+
+    Tasks which share a key are always executed by the same worker, sequentially and in submission order.
+    Each worker has a bounded queue, so that submission blocks (applying backpressure) when a worker falls behind.
+
+    If any task raises, the first exception is recorded, all remaining queued tasks are discarded, and
+    the exception is re-raised to the submitter on the next call to `submit` or `raise_if_failed`.
+    """
+
+    def __init__(self, num_workers: int, queue_size: int, name: str):
+        self.error: Optional[BaseException] = None
+        self._queues: List[Queue] = [
+            Queue(maxsize=queue_size) for _ in range(num_workers)
+        ]
+        self._threads: List[threading.Thread] = [
+            threading.Thread(
+                target=self._work,
+                args=(queue,),
+                name=f"{name}-worker-{index}",
+                daemon=True,
+            )
+            for index, queue in enumerate(self._queues)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, key: Hashable, fn: Callable[..., None], *args: Any) -> None:
+        self.raise_if_failed()
+        self._queues[hash(key) % len(self._queues)].put((fn, args))
+
+    def raise_if_failed(self) -> None:
+        if self.error is not None:
+            raise self.error
+
+    def shutdown(self) -> None:
+        """
+        Waits for all previously submitted tasks to finish, then stops the workers.
+        """
+        for queue in self._queues:
+            queue.put(_SHUTDOWN)
+        for thread in self._threads:
+            thread.join()
+
+    def _work(self, queue: Queue) -> None:
+        while True:
+            task = queue.get()
+            if task is _SHUTDOWN:
+                return
+            if self.error is not None:
+                # Discard remaining work once the pool has failed.
+                continue
+            fn, args = task
+            try:
+                fn(*args)
+            except BaseException as e:
+                logger.debug(f"Worker {threading.current_thread().name} failed: {e}")
+                if self.error is None:
+                    self.error = e
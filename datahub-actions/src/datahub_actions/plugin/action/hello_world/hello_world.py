@@ -42,7 +42,7 @@ class HelloWorldAction(Action):
 
     def act(self, event: EventEnvelope) -> None:
         print("Hello world! Received event:")
-        message = json.dumps(json.loads(event.as_json()), indent=4)
+        message = json.dumps(event.as_dict(), indent=4)
         if self.config.to_upper:
             print(message.upper())
         else:
@@ -105,12 +105,8 @@ class TagPropagationAction(Action):
                 assert semantic_event.modifier, "tag urn should be present"
                 propagate = self.config.enabled
                 if self.config.tag_prefixes:
-                    propagate = any(
-                        [
-                            True
-                            for prefix in self.config.tag_prefixes
-                            if semantic_event.modifier.startswith(prefix)
-                        ]
+                    propagate = semantic_event.modifier.startswith(
+                        tuple(self.config.tag_prefixes)
                     )
                     if not propagate:
                         logger.debug(f"Not propagating {semantic_event.modifier}")
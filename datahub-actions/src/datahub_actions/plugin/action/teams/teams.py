@@ -79,8 +79,9 @@ class TeamsNotificationAction(Action):
 
     def act(self, event: EventEnvelope) -> None:
         try:
-            message = json.dumps(json.loads(event.as_json()), indent=4)
-            logger.debug(f"Received event: {message}")
+            if logger.isEnabledFor(logging.DEBUG):
+                message = json.dumps(event.as_dict(), indent=4)
+                logger.debug(f"Received event: {message}")
             if event.event_type == "EntityChangeEvent_v1":
                 assert isinstance(event.event, EntityChangeEvent)
                 if (
@@ -0,0 +1,240 @@
+# Copyright 2021 Acryl Data, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import glob
+import gzip
+import logging
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+from enum import Enum
+from typing import List, Optional
+
+from datahub.configuration import ConfigModel
+from datahub.configuration.common import ConfigurationError
+
+from datahub_actions.dead_letter.dead_letter_writer import DeadLetterWriter
+from datahub_actions.event.event_codec import event_codec_registry
+from datahub_actions.event.event_envelope import EventEnvelope
+from datahub_actions.pipeline.pipeline_context import PipelineContext
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FILE_NAME = "failed_events.log"
+DEFAULT_FORMAT = "json"
+DEFAULT_FLUSH_MAX_EVENTS = 100
+DEFAULT_FLUSH_INTERVAL_MS = 1000
+DEFAULT_MAX_FILE_SIZE_BYTES = 100 * 1024 * 1024
+
+
+class DeadLetterCompression(str, Enum):
+    NONE = "NONE"
+    GZIP = "GZIP"
+    # Requires the zstandard package.
+    ZSTD = "ZSTD"
+
+
+COMPRESSED_FILE_SUFFIXES = {
+    DeadLetterCompression.GZIP: ".gz",
+    DeadLetterCompression.ZSTD: ".zst",
+}
+
+
+class FileDeadLetterWriterConfig(ConfigModel):
+    # The directory where failed events are written.
+    directory: str
+
+    # The name of the active failed events file. Rotated files are suffixed with the time they were rotated.
+    file_name: str = DEFAULT_FILE_NAME
+
+    # How failed events are encoded. Either 'json', written as lines, or the more compact 'msgpack', written as
+    # length-prefixed records.
+    format: str = DEFAULT_FORMAT
+
+    # Buffered events are written out once this many are waiting, or once flush_interval_ms has passed.
+    flush_max_events: int = DEFAULT_FLUSH_MAX_EVENTS
+    flush_interval_ms: int = DEFAULT_FLUSH_INTERVAL_MS
+
+    # The active file is rotated once it reaches this size, or once it has been open for rotation_interval_ms.
+    max_file_size_bytes: Optional[int] = DEFAULT_MAX_FILE_SIZE_BYTES
+    rotation_interval_ms: Optional[int] = None
+
+    # How rotated files are compressed.
+    compression: DeadLetterCompression = DeadLetterCompression.NONE
+
+    # Rotated files beyond this count, or older than this age, are deleted. Rotated files are kept forever by default,
+    # since failed events may still need to be replayed.
+    max_rotated_files: Optional[int] = None
+    max_rotated_file_age_ms: Optional[int] = None
+
+
+# Writes failed events to a local file, which is rotated, compressed and pruned over time.
+class FileDeadLetterWriter(DeadLetterWriter):
+    def __init__(self, config: FileDeadLetterWriterConfig):
+        if config.compression == DeadLetterCompression.ZSTD and zstandard is None:
+            raise ConfigurationError(
+                "ZSTD compression of failed events requires the zstandard package. Install it using `pip install 'acryl-datahub-actions[zstd]'`."
+            )
+        self.config = config
+        self._codec = event_codec_registry.get(config.format)()
+        self._file_path = os.path.join(config.directory, config.file_name)
+        self._lock = threading.Lock()
+        # Serializes compressing and pruning rotated files, so that a file is never pruned while it is being compressed.
+        self._maintenance_lock = threading.Lock()
+        self._buffer: List[bytes] = []
+        os.makedirs(config.directory, exist_ok=True)
+        self._open_file()
+
+        # Flush on a timer, so that buffered events are written out even when failures are rare.
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(
+            target=self._flush_periodically,
+            name=f"dead-letter-flusher-{config.file_name}",
+            daemon=True,
+        )
+        self._flusher.start()
+
+    @classmethod
+    def create(cls, config_dict: dict, ctx: PipelineContext) -> "DeadLetterWriter":
+        config = FileDeadLetterWriterConfig.parse_obj(config_dict or {})
+        return cls(config)
+
+    def write(self, event: EventEnvelope) -> None:
+        record = self._codec.encode_record(event)
+        with self._lock:
+            if self._closed.is_set():
+                raise Exception(
+                    f"Cannot write failed event to {self._file_path}, since the writer has been closed"
+                )
+            self._buffer.append(record)
+            if len(self._buffer) < self.config.flush_max_events:
+                return
+        self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._write_buffer()
+            rotated_file_path = self._rotate_if_needed()
+        # Compression and pruning can be slow, so they are done without holding up writers.
+        if rotated_file_path is not None:
+            with self._maintenance_lock:
+                self._compress(rotated_file_path)
+                self._prune()
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed.set()
+        self._flusher.join()
+        self.flush()
+        with self._lock:
+            self._file.close()
+
+    def _open_file(self) -> None:
+        self._file = open(self._file_path, "ab")
+        self._file_size = os.path.getsize(self._file_path)
+        self._file_opened_at = time.time()
+
+    def _write_buffer(self) -> None:
+        if not self._buffer:
+            return
+        # Write out the whole buffer at once, rather than a write per event.
+        data = b"".join(self._buffer)
+        self._file.write(data)
+        self._file.flush()
+        self._buffer = []
+        self._file_size += len(data)
+
+    def _rotate_if_needed(self) -> Optional[str]:
+        if self._file_size == 0:
+            return None
+        max_file_size_bytes = self.config.max_file_size_bytes
+        rotation_interval_ms = self.config.rotation_interval_ms
+        if not (
+            (max_file_size_bytes is not None and self._file_size >= max_file_size_bytes)
+            or (
+                rotation_interval_ms is not None
+                and (time.time() - self._file_opened_at) * 1000 >= rotation_interval_ms
+            )
+        ):
+            return None
+
+        self._file.close()
+        rotated_file_path = (
+            f"{self._file_path}.{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}"
+        )
+        os.replace(self._file_path, rotated_file_path)
+        self._open_file()
+        logger.debug(f"Rotated failed events file to {rotated_file_path}")
+        return rotated_file_path
+
+    def _compress(self, file_path: str) -> None:
+        compression = self.config.compression
+        if compression == DeadLetterCompression.NONE:
+            return
+        compressed_file_path = file_path + COMPRESSED_FILE_SUFFIXES[compression]
+        with open(file_path, "rb") as source:
+            if compression == DeadLetterCompression.GZIP:
+                with gzip.open(compressed_file_path, "wb") as destination:
+                    shutil.copyfileobj(source, destination)
+            else:
+                with open(compressed_file_path, "wb") as destination:
+                    zstandard.ZstdCompressor().copy_stream(source, destination)
+        os.remove(file_path)
+
+    def _prune(self) -> None:
+        # Rotated file names sort in the order they were rotated. Files which are yet to be compressed are left alone.
+        compression = self.config.compression
+        rotated_file_paths = sorted(
+            file_path
+            for file_path in glob.glob(glob.escape(self._file_path) + ".*")
+            if compression == DeadLetterCompression.NONE
+            or file_path.endswith(COMPRESSED_FILE_SUFFIXES[compression])
+        )
+        expired_file_paths = set()
+        max_rotated_files = self.config.max_rotated_files
+        if (
+            max_rotated_files is not None
+            and len(rotated_file_paths) > max_rotated_files
+        ):
+            expired_file_paths.update(
+                rotated_file_paths[: len(rotated_file_paths) - max_rotated_files]
+            )
+        max_rotated_file_age_ms = self.config.max_rotated_file_age_ms
+        if max_rotated_file_age_ms is not None:
+            oldest_allowed = time.time() - max_rotated_file_age_ms / 1000.0
+            expired_file_paths.update(
+                file_path
+                for file_path in rotated_file_paths
+                if os.path.getmtime(file_path) < oldest_allowed
+            )
+        for file_path in expired_file_paths:
+            logger.debug(f"Deleting expired failed events file {file_path}")
+            os.remove(file_path)
+
+    def _flush_periodically(self) -> None:
+        while not self._closed.wait(self.config.flush_interval_ms / 1000.0):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception(
+                    f"Caught exception while attempting to flush failed events to {self._file_path}"
+                )
@@ -0,0 +1,121 @@
+# Copyright 2021 Acryl Data, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import functools
+import logging
+import threading
+from typing import Any, List, Optional, Tuple
+
+import confluent_kafka
+from datahub.configuration import ConfigModel
+from datahub.configuration.kafka import KafkaProducerConnectionConfig
+
+from datahub_actions.dead_letter.dead_letter_writer import DeadLetterWriter
+from datahub_actions.event.event_envelope import EventEnvelope
+from datahub_actions.pipeline.pipeline_context import PipelineContext
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FLUSH_TIMEOUT_MS = 30 * 1000
+
+
+class KafkaDeadLetterWriterConfig(ConfigModel):
+    connection: KafkaProducerConnectionConfig = KafkaProducerConnectionConfig()
+
+    # The topic failed events are written to.
+    topic: str
+
+    # The max time to wait for buffered events to be delivered when flushing.
+    flush_timeout_ms: int = DEFAULT_FLUSH_TIMEOUT_MS
+
+
+# Writes failed events as JSON to a Kafka dead letter topic. Events are batched by the producer.
+class KafkaDeadLetterWriter(DeadLetterWriter):
+    def __init__(self, config: KafkaDeadLetterWriterConfig, ctx: PipelineContext):
+        self.config = config
+        self._pipeline_name = ctx.pipeline_name
+        # The events whose delivery failed along with their errors, raised from the next flush or close so that failed
+        # events are never lost silently.
+        self._delivery_errors: List[Tuple[EventEnvelope, Any]] = []
+        self._delivery_errors_lock = threading.Lock()
+        self._closed = False
+        self.producer = confluent_kafka.Producer(
+            {
+                "bootstrap.servers": config.connection.bootstrap,
+                "linger.ms": 100,  # Batch failed events produced in quick succession.
+                "compression.type": "zstd",
+                **config.connection.producer_config,
+            }
+        )
+
+    @classmethod
+    def create(cls, config_dict: dict, ctx: PipelineContext) -> "DeadLetterWriter":
+        config = KafkaDeadLetterWriterConfig.parse_obj(config_dict or {})
+        return cls(config, ctx)
+
+    def write(self, event: EventEnvelope) -> None:
+        if self._closed:
+            raise Exception(
+                f"Cannot write failed event to dead letter topic {self.config.topic}, since the writer has been closed"
+            )
+        value = event.as_json().encode("utf-8")
+        try:
+            self._produce(event, value)
+        except BufferError:
+            # The producer's queue is full. Wait for some deliveries, then try once more.
+            self.producer.poll(1.0)
+            self._produce(event, value)
+        # Serve delivery callbacks for previously produced events.
+        self.producer.poll(0)
+
+    def flush(self) -> None:
+        undelivered_count = self.producer.flush(self.config.flush_timeout_ms / 1000.0)
+        self._raise_delivery_errors()
+        if undelivered_count > 0:
+            raise Exception(
+                f"Failed to deliver {undelivered_count} failed events to dead letter topic {self.config.topic} within {self.config.flush_timeout_ms}ms"
+            )
+
+    def close(self) -> None:
+        self._closed = True
+        self.flush()
+
+    def _produce(self, event: EventEnvelope, value: bytes) -> None:
+        self.producer.produce(
+            self.config.topic,
+            value=value,
+            headers=[("pipeline_name", self._pipeline_name.encode("utf-8"))],
+            on_delivery=functools.partial(self._on_delivery, event),
+        )
+
+    def _on_delivery(
+        self, event: EventEnvelope, error: Optional[Any], message: Any
+    ) -> None:
+        if error is not None:
+            logger.error(
+                f"Failed to deliver failed event to dead letter topic {self.config.topic}: {error}. Event: {event}"
+            )
+            with self._delivery_errors_lock:
+                self._delivery_errors.append((event, error))
+
+    def _raise_delivery_errors(self) -> None:
+        with self._delivery_errors_lock:
+            errors = self._delivery_errors
+            self._delivery_errors = []
+        if errors:
+            event, error = errors[0]
+            raise Exception(
+                f"Failed to deliver {len(errors)} failed events to dead letter topic {self.config.topic}, the first with {error}: {event}"
+            )
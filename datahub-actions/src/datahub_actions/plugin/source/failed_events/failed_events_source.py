@@ -0,0 +1,307 @@
+# Copyright 2021 Acryl Data, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import gzip
+import hashlib
+import io
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+from datahub.configuration import ConfigModel
+from datahub.configuration.common import ConfigurationError
+
+from datahub_actions.event.event_codec import EventCodec, event_codec_registry
+from datahub_actions.event.event_envelope import EventEnvelope
+from datahub_actions.pipeline.pipeline_context import PipelineContext
+from datahub_actions.source.event_source import EventSource
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECKPOINT_INTERVAL_MS = 1000
+DEFAULT_PROGRESS_INTERVAL_MS = 10 * 1000
+DEFAULT_FORMAT = "json"
+# The number of leading records a failed events file is identified by.
+FINGERPRINT_RECORDS = 16
+# Files written next to failed events files which don't hold failed events, e.g. checkpoints being written.
+TEMP_FILE_SUFFIX = ".tmp"
+
+
+class FailedEventsSourceConfig(ConfigModel):
+    # The failed events files to replay. Directories are expanded to the files they contain, oldest first.
+    paths: List[str]
+
+    # How the failed events were encoded by the writer, either 'json' or 'msgpack'.
+    format: str = DEFAULT_FORMAT
+
+    # The max number of events read per second. Unlimited by default.
+    rate_limit: Optional[float] = None
+
+    # Where replay progress is recorded, so that an interrupted replay can resume where it left off.
+    checkpoint_file: Optional[str] = None
+    checkpoint_interval_ms: int = DEFAULT_CHECKPOINT_INTERVAL_MS
+
+    # How often progress and throughput are logged.
+    progress_interval_ms: int = DEFAULT_PROGRESS_INTERVAL_MS
+
+
+# Expands directories into the files they contain, ordered oldest first so that rotated files are replayed before the active one.
+# Hidden and temporary files, and the ignored paths such as a checkpoint file kept alongside, are left out.
+def expand_failed_events_paths(
+    paths: List[str], ignored_paths: Iterable[str] = ()
+) -> List[str]:
+    ignored_abs_paths = {os.path.abspath(path) for path in ignored_paths}
+    file_paths = []
+    for path in paths:
+        if os.path.isdir(path):
+            dir_file_paths = [
+                os.path.join(path, file_name)
+                for file_name in os.listdir(path)
+                if os.path.isfile(os.path.join(path, file_name))
+                and not file_name.startswith(".")
+                and not file_name.endswith(TEMP_FILE_SUFFIX)
+                and os.path.abspath(os.path.join(path, file_name))
+                not in ignored_abs_paths
+            ]
+            file_paths.extend(sorted(dir_file_paths, key=os.path.getmtime))
+        else:
+            file_paths.append(path)
+    return [os.path.abspath(file_path) for file_path in file_paths]
+
+
+# Reads the records of a failed events file, decompressing rotated files where needed.
+def read_failed_events_records(file_path: str, codec: EventCodec) -> Iterator[bytes]:
+    if file_path.endswith(".gz"):
+        with gzip.open(file_path, "rb") as gzip_file:
+            yield from codec.read_records(gzip_file)
+    elif file_path.endswith(".zst"):
+        if zstandard is None:
+            raise ConfigurationError(
+                f"Reading {file_path} requires the zstandard package. Install it using `pip install 'acryl-datahub-actions[zstd]'`."
+            )
+        with open(file_path, "rb") as zstd_file:
+            reader = zstandard.ZstdDecompressor().stream_reader(zstd_file)
+            yield from codec.read_records(io.BufferedReader(reader))
+    else:
+        # Only read the events present up front, since events which fail again may be appended to the same file.
+        size = os.path.getsize(file_path)
+        with open(file_path, "rb") as plain_file:
+            yield from _read_records_up_to(
+                codec.read_records(plain_file), plain_file, size
+            )
+
+
+def _read_records_up_to(
+    records: Iterator[bytes], stream: io.BufferedIOBase, size: int
+) -> Iterator[bytes]:
+    while stream.tell() < size:
+        record = next(records, None)
+        if record is None:
+            return
+        yield record
+
+
+class RateLimiter:
+    """
+    Spaces out calls to `acquire` so that they happen at most `rate` times per second.
+    """
+
+    def __init__(self, rate: float):
+        self._interval = 1.0 / rate
+        self._next_at = time.monotonic()
+
+    def acquire(self) -> None:
+        now = time.monotonic()
+        if self._next_at > now:
+            time.sleep(self._next_at - now)
+        # Don't accumulate credit while idle, so that bursts stay within the rate.
+        self._next_at = max(self._next_at, now) + self._interval
+
+
+# Identifies a failed events file by its leading records, which stay the same as the file is rotated, compressed or
+# moved, unlike its path. Several records are used, since files often start with the same event, e.g. when a replay
+# fails again.
+def fingerprint_failed_events_file(leading_records: List[bytes]) -> str:
+    digest = hashlib.sha256()
+    for record in leading_records:
+        digest.update(len(record).to_bytes(4, "big"))
+        digest.update(record)
+    return digest.hexdigest()
+
+
+# Replays events from failed events logs written by a Pipeline. Each event is marked with its position in the
+# files, and acked positions are checkpointed in order so that an interrupted replay can resume. Positions count
+# records, which are lines for the JSON format.
+class FailedEventsSource(EventSource):
+    running = False
+
+    def __init__(self, config: FailedEventsSourceConfig, ctx: PipelineContext):
+        self.source_config = config
+        self._codec = event_codec_registry.get(config.format)()
+        self._file_paths = expand_failed_events_paths(
+            config.paths,
+            [config.checkpoint_file] if config.checkpoint_file is not None else [],
+        )
+        self._lock = threading.Lock()
+        # The number of leading lines of each file which have been fully processed, keyed by file fingerprint.
+        self._checkpoint: Dict[str, int] = self._load_checkpoint()
+        # Lines which have been processed, but follow a line which is still in flight.
+        self._completed_lines: Dict[str, Set[int]] = {}
+        self._read_count = 0
+        self._acked_count = 0
+        self._started_at = time.monotonic()
+        self._last_checkpoint_at = self._started_at
+        self._last_progress_at = self._started_at
+
+    @classmethod
+    def create(cls, config_dict: dict, ctx: PipelineContext) -> "EventSource":
+        config = FailedEventsSourceConfig.parse_obj(config_dict)
+        return cls(config, ctx)
+
+    def events(self) -> Iterable[EventEnvelope]:
+        rate_limiter = (
+            RateLimiter(self.source_config.rate_limit)
+            if self.source_config.rate_limit
+            else None
+        )
+        self.running = True
+        for file_path in self._file_paths:
+            records = read_failed_events_records(file_path, self._codec)
+            leading_records = list(itertools.islice(records, FINGERPRINT_RECORDS))
+            fingerprint = fingerprint_failed_events_file(leading_records)
+            start_line = self._checkpoint.get(fingerprint, 0)
+            if start_line > 0:
+                logger.info(f"Resuming replay of {file_path} from line {start_line}")
+            for line_number, record in enumerate(
+                itertools.chain(leading_records, records)
+            ):
+                if not self.running:
+                    return
+                if line_number < start_line:
+                    continue
+                enveloped_event = self._parse_record(
+                    file_path, fingerprint, line_number, record
+                )
+                if enveloped_event is None:
+                    # Nothing to replay, so the line is immediately done with.
+                    self._complete_line(fingerprint, line_number, replayed=False)
+                    continue
+                if rate_limiter is not None:
+                    rate_limiter.acquire()
+                self._read_count += 1
+                yield enveloped_event
+                self._maybe_report_progress()
+
+    def ack(self, event: EventEnvelope) -> None:
+        replay_meta = event.meta["replay"]
+        self._complete_line(replay_meta["fingerprint"], replay_meta["line"])
+        self._maybe_report_progress()
+
+    def close(self) -> None:
+        self.running = False
+        self._save_checkpoint()
+        self._report_progress()
+
+    @property
+    def acked_count(self) -> int:
+        return self._acked_count
+
+    def _parse_record(
+        self, file_path: str, fingerprint: str, line_number: int, record: bytes
+    ) -> Optional[EventEnvelope]:
+        if not record.strip():
+            return None
+        try:
+            enveloped_event = self._codec.decode(record)
+        except Exception:
+            logger.exception(
+                f"Failed to parse failed event at {file_path}:{line_number + 1}. Skipping it."
+            )
+            return None
+        if enveloped_event.meta is None:
+            enveloped_event.meta = {}
+        enveloped_event.meta["replay"] = {
+            "file": file_path,
+            "fingerprint": fingerprint,
+            "line": line_number,
+        }
+        return enveloped_event
+
+    def _complete_line(
+        self, fingerprint: str, line_number: int, replayed: bool = True
+    ) -> None:
+        with self._lock:
+            if replayed:
+                self._acked_count += 1
+            completed_lines = self._completed_lines.setdefault(fingerprint, set())
+            completed_lines.add(line_number)
+            # Advance the checkpoint past the contiguous run of completed lines.
+            next_line = self._checkpoint.get(fingerprint, 0)
+            while next_line in completed_lines:
+                completed_lines.remove(next_line)
+                next_line += 1
+            self._checkpoint[fingerprint] = next_line
+
+            now = time.monotonic()
+            if (
+                now - self._last_checkpoint_at
+                < self.source_config.checkpoint_interval_ms / 1000.0
+            ):
+                return
+            self._last_checkpoint_at = now
+        self._save_checkpoint()
+
+    def _load_checkpoint(self) -> Dict[str, int]:
+        checkpoint_file = self.source_config.checkpoint_file
+        if checkpoint_file is None or not os.path.exists(checkpoint_file):
+            return {}
+        with open(checkpoint_file, "r") as f:
+            return json.loads(f.read())["files"]
+
+    def _save_checkpoint(self) -> None:
+        checkpoint_file = self.source_config.checkpoint_file
+        if checkpoint_file is None:
+            return
+        with self._lock:
+            checkpoint_json = json.dumps({"files": self._checkpoint})
+            # Write to a temporary file then rename, so that a checkpoint is never partially written.
+            temp_file = checkpoint_file + ".tmp"
+            with open(temp_file, "w") as f:
+                f.write(checkpoint_json)
+            os.replace(temp_file, checkpoint_file)
+
+    def _maybe_report_progress(self) -> None:
+        now = time.monotonic()
+        if (
+            now - self._last_progress_at
+            >= self.source_config.progress_interval_ms / 1000.0
+        ):
+            self._last_progress_at = now
+            self._report_progress()
+
+    def _report_progress(self) -> None:
+        elapsed = max(time.monotonic() - self._started_at, 1e-6)
+        logger.info(
+            f"Replayed {self._acked_count} events ({self._read_count} read) in {elapsed:.1f}s, {self._acked_count / elapsed:.1f} events/s"
+        )
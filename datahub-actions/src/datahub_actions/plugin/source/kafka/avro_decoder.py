@@ -0,0 +1,80 @@
+# Copyright 2021 Acryl Data, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+import json
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from confluent_kafka.schema_registry.schema_registry_client import SchemaRegistryClient
+from fastavro import parse_schema, schemaless_reader
+
+logger = logging.getLogger(__name__)
+
+# Confluent wire format: a zero magic byte, followed by the big endian 4 byte id of the writer schema.
+MAGIC_BYTE = 0
+HEADER_SIZE = 5
+
+
+class CachingAvroDecoder:
+    """
+    Decodes Avro values framed in the Confluent wire format, caching the parsed writer schema of each schema id.
+
+    Values are decoded into the same dicts as confluent's AvroDeserializer with return_record_name=True, but
+    without its per-message subject resolution, rule execution and schema expansion. Values in any other format,
+    and schemas with references, are handed to the fallback deserializer.
+    """
+
+    def __init__(
+        self,
+        schema_registry_client: SchemaRegistryClient,
+        fallback: Callable[[Optional[bytes], Any], Any],
+    ):
+        self.schema_registry_client = schema_registry_client
+        self.fallback = fallback
+        # Parsed writer schemas by schema id. None if the schema has to be decoded by the fallback.
+        self._writer_schemas: Dict[int, Optional[Any]] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, value: Optional[bytes], ctx: Any = None) -> Any:
+        if value is None:
+            return None
+        if len(value) <= HEADER_SIZE or value[0] != MAGIC_BYTE:
+            return self.fallback(value, ctx)
+        schema_id = int.from_bytes(value[1:HEADER_SIZE], "big")
+        try:
+            writer_schema = self._writer_schemas[schema_id]
+        except KeyError:
+            writer_schema = self._load_writer_schema(schema_id)
+        if writer_schema is None:
+            return self.fallback(value, ctx)
+        payload = io.BytesIO(value)
+        payload.seek(HEADER_SIZE)
+        return schemaless_reader(payload, writer_schema, None, return_record_name=True)
+
+    def _load_writer_schema(self, schema_id: int) -> Optional[Any]:
+        with self._lock:
+            if schema_id in self._writer_schemas:
+                return self._writer_schemas[schema_id]
+            schema = self.schema_registry_client.get_schema(schema_id)
+            writer_schema = None
+            if schema.references or schema.schema_str is None:
+                logger.info(
+                    f"Schema with id {schema_id} has references or no definition, decoding its values with the fallback deserializer"
+                )
+            else:
+                writer_schema = parse_schema(json.loads(schema.schema_str))
+            self._writer_schemas[schema_id] = writer_schema
+            return writer_schema
@@ -0,0 +1,206 @@
+# Copyright 2021 Acryl Data, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from confluent_kafka import OFFSET_END, TopicPartition
+
+logger = logging.getLogger(__name__)
+
+# The max time to wait for the broker to resolve timestamps and watermarks into offsets.
+OFFSET_LOOKUP_TIMEOUT_SECONDS = 10.0
+
+
+class KafkaBackfill:
+    """
+    Bounds the range of offsets consumed from each partition, to re-process a past window of events.
+
+    Newly assigned partitions are positioned at their start bound, given either as an explicit offset or as the
+    first offset produced at or after start_timestamp, unless the consumer group has already committed progress
+    within the bounds, e.g. after a restart or a rebalance, in which case they resume from the committed offset.
+    A partition is finished once its end bound is reached, given
+    either as an explicit (exclusive) offset or as the first offset produced at or after end_timestamp. Consumption
+    stops once every assigned partition is finished. Explicit offsets take precedence over timestamps.
+    """
+
+    def __init__(
+        self,
+        start_timestamp: Optional[int] = None,
+        end_timestamp: Optional[int] = None,
+        start_offsets: Optional[Dict[str, Dict[int, int]]] = None,
+        end_offsets: Optional[Dict[str, Dict[int, int]]] = None,
+    ):
+        self.start_timestamp = start_timestamp
+        self.end_timestamp = end_timestamp
+        self.start_offsets = start_offsets or {}
+        self.end_offsets = end_offsets or {}
+        self._resolved_end_offsets: Dict[Tuple[str, int], Optional[int]] = {}
+        self._assigned: Set[Tuple[str, int]] = set()
+        self._finished: Set[Tuple[str, int]] = set()
+
+    @property
+    def is_bounded(self) -> bool:
+        return self.end_timestamp is not None or bool(self.end_offsets)
+
+    @property
+    def finished(self) -> bool:
+        return bool(self._assigned) and self._assigned <= self._finished
+
+    def is_finished(self, topic: str, partition: int) -> bool:
+        return (topic, partition) in self._finished
+
+    def assign(self, consumer: Any, partitions: List[TopicPartition]) -> None:
+        """
+        Resolves the bounds of newly assigned partitions, and sets their start offsets in place before they are assigned.
+        """
+        start_offsets = self._resolve_offsets(
+            consumer, partitions, self.start_offsets, self.start_timestamp
+        )
+        end_offsets = self._resolve_offsets(
+            consumer, partitions, self.end_offsets, self.end_timestamp
+        )
+        committed_offsets = self._committed_offsets(
+            consumer,
+            [
+                partition
+                for partition in partitions
+                if start_offsets.get((partition.topic, partition.partition), -1) >= 0
+            ],
+        )
+        for partition in partitions:
+            topic_partition = (partition.topic, partition.partition)
+            end_offset = end_offsets.get(topic_partition)
+            if end_offset is not None and end_offset < 0:
+                end_offset = None
+            if (
+                end_offset is None
+                and self.end_timestamp is not None
+                and self.end_timestamp <= time.time() * 1000
+            ):
+                # Nothing was produced since end_timestamp, so the partition ends where its log currently does.
+                end_offset = consumer.get_watermark_offsets(
+                    TopicPartition(partition.topic, partition.partition),
+                    timeout=OFFSET_LOOKUP_TIMEOUT_SECONDS,
+                )[1]
+            start_offset = start_offsets.get(topic_partition)
+            if start_offset is not None:
+                committed_offset = committed_offsets.get(topic_partition)
+                if start_offset < 0:
+                    # Partitions with nothing produced since start_timestamp start at the end of their log.
+                    partition.offset = OFFSET_END
+                elif (
+                    committed_offset is not None
+                    and committed_offset >= start_offset
+                    and (end_offset is None or committed_offset <= end_offset)
+                ):
+                    # Progress was already made on the partition, e.g. before a restart or a rebalance.
+                    partition.offset = committed_offset
+                else:
+                    partition.offset = start_offset
+            self._resolved_end_offsets[topic_partition] = end_offset
+            self._assigned.add(topic_partition)
+            self._finished.discard(topic_partition)
+            if (
+                partition.offset >= 0
+                and end_offset is not None
+                and partition.offset >= end_offset
+            ):
+                self._finish(topic_partition)
+            logger.info(
+                f"Backfilling Kafka partition {topic_partition} from offset {partition.offset} to offset {end_offset}"
+            )
+
+    def accepts(
+        self, topic: str, partition: int, offset: int, timestamp: Optional[int]
+    ) -> bool:
+        """
+        Returns whether a message is within the bounds of its partition, finishing the partition once it is not.
+        """
+        topic_partition = (topic, partition)
+        if topic_partition in self._finished:
+            return False
+        end_offset = self._resolved_end_offsets.get(topic_partition)
+        if (end_offset is not None and offset >= end_offset) or (
+            self.end_timestamp is not None
+            and timestamp is not None
+            and timestamp >= self.end_timestamp
+        ):
+            self._finish(topic_partition)
+            return False
+        return True
+
+    def on_partition_eof(self, topic: str, partition: int, offset: int) -> None:
+        # The end bound may be reached without a message beyond it to observe.
+        end_offset = self._resolved_end_offsets.get((topic, partition))
+        if end_offset is not None and offset >= end_offset:
+            self._finish((topic, partition))
+
+    def release(self, topic_partitions: Iterable[Tuple[str, int]]) -> None:
+        for topic_partition in topic_partitions:
+            self._assigned.discard(topic_partition)
+            self._finished.discard(topic_partition)
+            self._resolved_end_offsets.pop(topic_partition, None)
+
+    def _finish(self, topic_partition: Tuple[str, int]) -> None:
+        if topic_partition not in self._finished:
+            self._finished.add(topic_partition)
+            logger.info(f"Finished backfilling Kafka partition {topic_partition}")
+
+    @staticmethod
+    def _committed_offsets(
+        consumer: Any, partitions: List[TopicPartition]
+    ) -> Dict[Tuple[str, int], int]:
+        if not partitions:
+            return {}
+        # A negative offset is returned for partitions the consumer group has not committed to.
+        return {
+            (committed.topic, committed.partition): committed.offset
+            for committed in consumer.committed(
+                [
+                    TopicPartition(partition.topic, partition.partition)
+                    for partition in partitions
+                ],
+                timeout=OFFSET_LOOKUP_TIMEOUT_SECONDS,
+            )
+            if committed.offset >= 0
+        }
+
+    @staticmethod
+    def _resolve_offsets(
+        consumer: Any,
+        partitions: List[TopicPartition],
+        explicit_offsets: Dict[str, Dict[int, int]],
+        timestamp: Optional[int],
+    ) -> Dict[Tuple[str, int], int]:
+        offsets: Dict[Tuple[str, int], int] = {}
+        lookups = []
+        for partition in partitions:
+            explicit_offset = explicit_offsets.get(partition.topic, {}).get(
+                partition.partition
+            )
+            if explicit_offset is not None:
+                offsets[(partition.topic, partition.partition)] = explicit_offset
+            elif timestamp is not None:
+                lookups.append(
+                    TopicPartition(partition.topic, partition.partition, timestamp)
+                )
+        if lookups:
+            # A negative offset is returned for partitions with nothing produced at or after the timestamp.
+            for found in consumer.offsets_for_times(
+                lookups, timeout=OFFSET_LOOKUP_TIMEOUT_SECONDS
+            ):
+                offsets[(found.topic, found.partition)] = found.offset
+        return offsets
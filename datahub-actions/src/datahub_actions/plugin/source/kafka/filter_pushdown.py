@@ -0,0 +1,138 @@
+# Copyright 2021 Acryl Data, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from datahub_actions.event.event_registry import (
+    ENTITY_CHANGE_EVENT_V1_TYPE,
+    METADATA_CHANGE_LOG_EVENT_V1_TYPE,
+)
+from datahub_actions.pipeline.pipeline_config import FilterConfig
+from datahub_actions.plugin.transform.filter.filter_transformer import (
+    compile_fields,
+    is_operator_filter,
+)
+
+# Fields of a raw MetadataChangeLog which are plain strings both before and after the typed event is built,
+# so can be matched without building it.
+PUSHED_DOWN_MCL_FIELDS = {"entityType", "entityUrn", "aspectName", "changeType"}
+
+
+def _matches_event_type(event_type: Any, filter_event_type: Any) -> bool:
+    if isinstance(filter_event_type, list):
+        return event_type in filter_event_type
+    return event_type == filter_event_type
+
+
+def _compile_field_predicate(field: str, match_val: Any) -> Optional[Callable]:
+    # Mirrors how the FilterTransformer matches top level string values, lists of them, and operators.
+    if isinstance(match_val, str):
+        return lambda value: value.get(field) == match_val
+    if isinstance(match_val, list) and all(isinstance(val, str) for val in match_val):
+        match_vals = frozenset(match_val)
+        return lambda value: value.get(field) in match_vals
+    if is_operator_filter(match_val):
+        ((_, predicate),) = compile_fields({field: match_val})
+        return lambda value: predicate(value.get(field))
+    return None
+
+
+class KafkaFilterPushdown:
+    """
+    The parts of a pipeline's filter which the Kafka source can evaluate against raw deserialized messages,
+    before the typed events are built.
+
+    Pushdown is conservative: it only rejects messages which the pipeline's FilterTransformer would certainly
+    filter out, and leaves the rest of the filter to the FilterTransformer, which still runs on every event.
+    """
+
+    def __init__(self, filter_config: FilterConfig):
+        self.accepts_mcl = _matches_event_type(
+            METADATA_CHANGE_LOG_EVENT_V1_TYPE, filter_config.event_type
+        )
+        self.accepts_pe = _matches_event_type(
+            ENTITY_CHANGE_EVENT_V1_TYPE, filter_config.event_type
+        )
+        self._mcl_predicates: List[Callable] = []
+        for field, match_val in (filter_config.event or {}).items():
+            if field not in PUSHED_DOWN_MCL_FIELDS:
+                continue
+            predicate = _compile_field_predicate(field, match_val)
+            if predicate is not None:
+                self._mcl_predicates.append(predicate)
+
+    def matches_mcl(self, value: Dict[str, Any]) -> bool:
+        if not self.accepts_mcl:
+            return False
+        for predicate in self._mcl_predicates:
+            if not predicate(value):
+                return False
+        return True
+
+
+class SkippedOffsetTracker:
+    """
+    Tracks the offsets of messages skipped by filter pushdown, so they can be committed without breaking
+    at-least-once delivery of the events around them.
+
+    A skipped offset may only be committed once every event yielded before it on the same partition has been
+    acked. Skipped offsets which are not yet safe to commit are folded into the ack of the last outstanding event.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._yielded_offsets: Dict[Tuple[str, int], int] = {}
+        self._acked_offsets: Dict[Tuple[str, int], int] = {}
+        self._skipped_offsets: Dict[Tuple[str, int], int] = {}
+
+    def on_yield(self, topic: str, partition: int, offset: int) -> None:
+        with self._lock:
+            self._yielded_offsets[(topic, partition)] = offset
+
+    def on_skip(self, topic: str, partition: int, offset: int) -> bool:
+        """
+        Records a skipped message, returning whether its offset can be committed right away.
+        """
+        topic_partition = (topic, partition)
+        with self._lock:
+            yielded_offset = self._yielded_offsets.get(topic_partition, -1)
+            if self._acked_offsets.get(topic_partition, -1) >= yielded_offset:
+                return True
+            self._skipped_offsets[topic_partition] = offset
+            return False
+
+    def resolve_ack(self, topic: str, partition: int, offset: int) -> int:
+        """
+        Records an acked event, returning the offset which can be committed on its behalf.
+        """
+        topic_partition = (topic, partition)
+        with self._lock:
+            if offset > self._acked_offsets.get(topic_partition, -1):
+                self._acked_offsets[topic_partition] = offset
+            if self._yielded_offsets.get(topic_partition, -1) > offset:
+                return offset
+            skipped_offset = self._skipped_offsets.pop(topic_partition, -1)
+            return max(offset, skipped_offset)
+
+    def forget(self, topic_partitions: Iterable[Tuple[str, int]]) -> None:
+        """
+        Drops the state of topic partitions which are no longer assigned. Should they be assigned again,
+        consumption restarts from their committed offsets.
+        """
+        with self._lock:
+            for topic_partition in topic_partitions:
+                self._yielded_offsets.pop(topic_partition, None)
+                self._acked_offsets.pop(topic_partition, None)
+                self._skipped_offsets.pop(topic_partition, None)
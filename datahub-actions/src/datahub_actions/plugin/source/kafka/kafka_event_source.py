@@ -13,32 +13,59 @@
 # limitations under the License.
 
 import logging
+import queue
+import threading
+import time
 from dataclasses import dataclass
-from typing import Any, Callable, Dict, Iterable, Optional
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
 
 # Confluent important
 import confluent_kafka
 from confluent_kafka import KafkaError, KafkaException, TopicPartition
 from confluent_kafka.schema_registry.avro import AvroDeserializer
 from confluent_kafka.schema_registry.schema_registry_client import SchemaRegistryClient
+from confluent_kafka.serialization import MessageField, SerializationContext
 from datahub.configuration import ConfigModel
 from datahub.configuration.kafka import KafkaConsumerConnectionConfig
 from datahub.emitter.serialization_helper import post_json_transform
 
 # DataHub imports.
-from datahub.metadata.schema_classes import GenericPayloadClass, MetadataChangeLogClass
-from prometheus_client import Counter, Gauge
+from datahub.metadata.schema_classes import GenericPayloadClass
+from prometheus_client import Counter, Gauge, Histogram
 
 from datahub_actions.event.event_envelope import EventEnvelope
 from datahub_actions.event.event_registry import (
     ENTITY_CHANGE_EVENT_V1_TYPE,
     METADATA_CHANGE_LOG_EVENT_V1_TYPE,
     EntityChangeEvent,
+    LazyMetadataChangeLogEvent,
     MetadataChangeLogEvent,
 )
 
 # May or may not need these.
+from datahub_actions.pipeline.pipeline_config import FilterConfig
 from datahub_actions.pipeline.pipeline_context import PipelineContext
+from datahub_actions.plugin.source.kafka.avro_decoder import CachingAvroDecoder
+from datahub_actions.plugin.source.kafka.backfill import KafkaBackfill
+from datahub_actions.plugin.source.kafka.filter_pushdown import (
+    KafkaFilterPushdown,
+    SkippedOffsetTracker,
+)
+from datahub_actions.plugin.source.kafka.lag_monitor import ConsumerLagMonitor
+from datahub_actions.plugin.source.kafka.offset_committer import (
+    OffsetCommitter,
+    log_commit_result,
+)
 from datahub_actions.source.event_source import EventSource
 
 logger = logging.getLogger(__name__)
@@ -62,24 +89,45 @@ MESSAGE_COUNTER_METRIC = Counter(
     labelnames=["pipeline_name", "error"],
 )
 
+POLL_LATENCY_METRIC = Histogram(
+    name="kafka_poll_latency_seconds",
+    documentation="Time taken by polls which returned a kafka message, including deserialization",
+    labelnames=["pipeline_name"],
+)
+
+SKIPPED_MESSAGE_COUNTER_METRIC = Counter(
+    name="kafka_skipped_messages",
+    documentation="Number of kafka messages skipped before decoding, because they cannot match the pipeline's filter",
+    labelnames=["pipeline_name"],
+)
+
+DESERIALIZE_LATENCY_METRIC = Histogram(
+    name="kafka_deserialize_latency_seconds",
+    documentation="Time taken to deserialize the value of a kafka message",
+    labelnames=["pipeline_name"],
+)
+
 
 # Converts a Kafka Message to a Kafka Metadata Dictionary.
 def build_kafka_meta(msg: Any) -> dict:
+    timestamp_type, timestamp = msg.timestamp()
     return {
         "kafka": {
             "topic": msg.topic(),
             "offset": msg.offset(),
             "partition": msg.partition(),
+            # The time in milliseconds at which the message was produced, if known.
+            "timestamp": timestamp
+            if timestamp_type != confluent_kafka.TIMESTAMP_NOT_AVAILABLE
+            else None,
         }
     }
 
 
-# Converts a Kafka Message to a MetadataChangeLogEvent
+# Converts a Kafka Message to a MetadataChangeLogEvent. Its typed fields are only built when first accessed.
 def build_metadata_change_log_event(msg: Any) -> MetadataChangeLogEvent:
     value: dict = msg.value()
-    return MetadataChangeLogEvent.from_class(
-        MetadataChangeLogClass.from_obj(value, True)
-    )
+    return LazyMetadataChangeLogEvent(value)
 
 
 # Converts a Kafka Message to an EntityChangeEvent.
@@ -87,26 +135,138 @@ def build_entity_change_event(payload: GenericPayloadClass) -> EntityChangeEvent
     return EntityChangeEvent.from_json(payload.get("value"))
 
 
+# Wraps a value deserializer to record the serialized size of the most recently deserialized message,
+# and the time taken to deserialize it.
+class SizeRecordingDeserializer:
+    def __init__(self, deserializer: Callable, latency_metric: Optional[Any] = None):
+        self.deserializer = deserializer
+        self.last_value_size = 0
+        self._latency_metric = latency_metric
+
+    def __call__(self, value: Optional[bytes], ctx: Any) -> Any:
+        self.last_value_size = len(value) if value is not None else 0
+        if self._latency_metric is None:
+            return self.deserializer(value, ctx)
+        started_at = time.perf_counter()
+        try:
+            return self.deserializer(value, ctx)
+        finally:
+            self._latency_metric.observe(time.perf_counter() - started_at)
+
+
+# Records the serialized size of the Kafka message inside the Kafka meta of each event.
+def with_message_size(
+    enveloped_events: Iterable[EventEnvelope], size: int
+) -> Iterable[EventEnvelope]:
+    for enveloped_event in enveloped_events:
+        enveloped_event.meta["kafka"]["size"] = size
+        yield enveloped_event
+
+
+DEFAULT_LAG_REPORT_INTERVAL_MS = 30000  # Used when only max_ready_lag is set.
+
+
 class KafkaEventSourceConfig(ConfigModel):
     connection: KafkaConsumerConnectionConfig = KafkaConsumerConnectionConfig()
     topic_routes: Optional[Dict[str, str]]
-
-
-def kafka_messages_observer(pipeline_name: str) -> Callable:
-    def _observe(message):
-        if message is not None:
-            topic = message.topic()
-            partition = message.partition()
-            offset = message.offset()
+    max_batch_size: int = 1  # The max number of messages fetched in a single call. Above 1, messages are consumed in batches.
+    batch_timeout_ms: int = 100  # The max time to wait for a batch to fill up.
+    commit_interval_ms: Optional[
+        int
+    ] = None  # When set, offsets are committed asynchronously at most this often, rather than synchronously on every ack.
+    commit_max_events: int = 1000  # When committing asynchronously, the number of acked messages which triggers an early commit.
+    poll_buffer_size: Optional[
+        int
+    ] = None  # When set, Kafka is polled on a background thread, buffering up to this many events. Partitions are paused while the buffer is full.
+    start_timestamp: Optional[
+        int
+    ] = None  # When set, assigned partitions are consumed from the first message produced at or after this epoch time in milliseconds.
+    end_timestamp: Optional[
+        int
+    ] = None  # When set, partitions are consumed up to the first message produced at or after this epoch time in milliseconds.
+    start_offsets: Optional[
+        Dict[str, Dict[int, int]]
+    ] = None  # The offsets to start consuming from, per topic and partition. Takes precedence over start_timestamp.
+    end_offsets: Optional[
+        Dict[str, Dict[int, int]]
+    ] = None  # The offsets to stop consuming at (exclusive), per topic and partition. Takes precedence over end_timestamp.
+    lag_report_interval_ms: Optional[
+        int
+    ] = None  # How often the consumer lag of each assigned partition is measured. Disabled by default.
+    max_ready_lag: Optional[
+        int
+    ] = None  # When set, the source only reports itself ready once its total consumer lag is at most this many messages.
+
+
+class KafkaMessageObserver:
+    """
+    Records the offset and message count metrics of consumed Kafka messages.
+
+    Label children are resolved once per topic partition and cached, rather than looked up on every message.
+    Batches of messages update the offset gauge of each partition once, with its highest offset.
+    """
+
+    def __init__(self, pipeline_name: str):
+        self.pipeline_name = pipeline_name
+        self._message_counters = {
+            error: MESSAGE_COUNTER_METRIC.labels(
+                error=error, pipeline_name=pipeline_name
+            )
+            for error in (False, True)
+        }
+        self._offset_gauges: Dict[Tuple[str, int], Any] = {}
+
+    def observe(self, message: Any) -> None:
+        if message is None:
+            return
+        if message.error() is not None:
+            self._message_counters[True].inc()
+            return
+        topic = message.topic()
+        partition = message.partition()
+        offset = message.offset()
+        if logger.isEnabledFor(logging.DEBUG):
             logger.debug(f"Kafka msg received: {topic}, {partition}, {offset}")
-            OFFSET_METRIC.labels(
-                topic=topic, partition=partition, pipeline_name=pipeline_name
-            ).set(offset)
-            MESSAGE_COUNTER_METRIC.labels(
-                error=message.error() is not None, pipeline_name=pipeline_name
-            ).inc()
-
-    return _observe
+        self._get_offset_gauge(topic, partition).set(offset)
+        self._message_counters[False].inc()
+
+    def observe_batch(self, messages: List[Any]) -> None:
+        error_count = 0
+        highest_offsets: Dict[Tuple[str, int], int] = {}
+        for message in messages:
+            if message.error() is not None:
+                error_count += 1
+                continue
+            topic_partition = (message.topic(), message.partition())
+            offset = message.offset()
+            if offset > highest_offsets.get(topic_partition, -1):
+                highest_offsets[topic_partition] = offset
+        for (topic, partition), offset in highest_offsets.items():
+            self._get_offset_gauge(topic, partition).set(offset)
+        if error_count:
+            self._message_counters[True].inc(error_count)
+        if len(messages) > error_count:
+            self._message_counters[False].inc(len(messages) - error_count)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Kafka batch of {len(messages)} msgs received")
+
+    def _get_offset_gauge(self, topic: str, partition: int) -> Any:
+        offset_gauge = self._offset_gauges.get((topic, partition))
+        if offset_gauge is None:
+            offset_gauge = self._offset_gauges[
+                (topic, partition)
+            ] = OFFSET_METRIC.labels(
+                topic=topic, partition=partition, pipeline_name=self.pipeline_name
+            )
+        return offset_gauge
+
+
+# The interval at which the offsets of skipped messages are committed, unless commit_interval_ms is configured.
+DEFAULT_SKIPPED_OFFSET_COMMIT_INTERVAL_MS = 1000
+
+POLL_TIMEOUT_SECONDS = 2.0
+# While partitions are paused, polls return quickly so the buffer is checked for room often.
+PAUSED_POLL_TIMEOUT_SECONDS = 0.1
 
 
 # This is the default Kafka-based Event Source.
@@ -114,69 +274,373 @@ def kafka_messages_observer(pipeline_name: str) -> Callable:
 class KafkaEventSource(EventSource):
     running = False
     source_config: KafkaEventSourceConfig
+    _offset_committer: Optional[OffsetCommitter] = None
+    _filter_pushdown: Optional[KafkaFilterPushdown] = None
+    _skipped_offsets: Optional[SkippedOffsetTracker] = None
+    _skipped_offset_committer: Optional[OffsetCommitter] = None
+    _poll_buffer: Optional["queue.Queue[Any]"] = None
+    _poll_thread: Optional[threading.Thread] = None
+    _paused = False
+    # The partitions paused while the poll buffer is full, which are resumed once it has drained.
+    _backpressure_paused_partitions: FrozenSet[Tuple[str, int]] = frozenset()
+    _revoked_partitions: FrozenSet[Tuple[str, int]] = frozenset()
+    _incremental_rebalance = False
+    _backfill: Optional[KafkaBackfill] = None
+    _lag_monitor: Optional[ConsumerLagMonitor] = None
 
     def __init__(self, config: KafkaEventSourceConfig, ctx: PipelineContext):
         self.source_config = config
         schema_client_config = config.connection.schema_registry_config.copy()
         schema_client_config["url"] = self.source_config.connection.schema_registry_url
         self.schema_registry_client = SchemaRegistryClient(schema_client_config)
-        self.consumer: confluent_kafka.Consumer = confluent_kafka.DeserializingConsumer(
-            {
-                # Provide a custom group id to subcribe to multiple partitions via separate actions pods.
-                "group.id": ctx.pipeline_name,
-                "bootstrap.servers": self.source_config.connection.bootstrap,
-                "enable.auto.commit": False,  # We manually commit offsets.
-                "auto.offset.reset": "latest",  # Latest by default, unless overwritten.
-                "value.deserializer": AvroDeserializer(
+        consumer_config: Dict[str, Any] = {
+            # Provide a custom group id to subcribe to multiple partitions via separate actions pods.
+            "group.id": ctx.pipeline_name,
+            "bootstrap.servers": self.source_config.connection.bootstrap,
+            "enable.auto.commit": False,  # We manually commit offsets.
+            "auto.offset.reset": "latest",  # Latest by default, unless overwritten.
+            "session.timeout.ms": "10000",  # 10s timeout.
+            "max.poll.interval.ms": "10000",  # 10s poll max.
+            **self.source_config.connection.consumer_config,
+        }
+        # A value deserializer given in the consumer config takes precedence over the built-in one. Either way values
+        # are deserialized through the source, which records their size, rather than by the consumer on its own.
+        value_deserializer = consumer_config.pop("value.deserializer", None)
+        if value_deserializer is None:
+            value_deserializer = CachingAvroDecoder(
+                self.schema_registry_client,
+                fallback=AvroDeserializer(
                     schema_registry_client=self.schema_registry_client,
                     return_record_name=True,
                 ),
-                "session.timeout.ms": "10000",  # 10s timeout.
-                "max.poll.interval.ms": "10000",  # 10s poll max.
-                **self.source_config.connection.consumer_config,
-            }
+            )
+        self._value_deserializer = SizeRecordingDeserializer(
+            value_deserializer,
+            DESERIALIZE_LATENCY_METRIC.labels(pipeline_name=ctx.pipeline_name),
+        )
+        if self.source_config.commit_interval_ms is not None:
+            consumer_config.setdefault("on_commit", log_commit_result)
+        if (
+            config.start_timestamp is not None
+            or config.end_timestamp is not None
+            or config.start_offsets
+            or config.end_offsets
+        ):
+            self._backfill = KafkaBackfill(
+                start_timestamp=config.start_timestamp,
+                end_timestamp=config.end_timestamp,
+                start_offsets=config.start_offsets,
+                end_offsets=config.end_offsets,
+            )
+            if self._backfill.is_bounded:
+                # Reaching the end of a partition may be the only sign that its end bound was reached.
+                consumer_config.setdefault("enable.partition.eof", True)
+        # With the cooperative-sticky assignor, rebalances only move the partitions which change owner.
+        self._incremental_rebalance = "cooperative-sticky" in str(
+            consumer_config.get("partition.assignment.strategy", "")
+        )
+        self.consumer: confluent_kafka.Consumer
+        if self.source_config.max_batch_size > 1:
+            # The deserializing consumer cannot consume in batches, so values are deserialized by the source.
+            self.consumer = confluent_kafka.Consumer(consumer_config)
+        else:
+            self.consumer = confluent_kafka.DeserializingConsumer(
+                {"value.deserializer": self._value_deserializer, **consumer_config}
+            )
+        self._message_observer = KafkaMessageObserver(ctx.pipeline_name)
+        if self.source_config.commit_interval_ms is not None:
+            self._offset_committer = OffsetCommitter(
+                self.consumer,
+                max_events=self.source_config.commit_max_events,
+                interval_ms=self.source_config.commit_interval_ms,
+            )
+        if (
+            self.source_config.lag_report_interval_ms is not None
+            or self.source_config.max_ready_lag is not None
+        ):
+            # Readiness is derived from the lag, so it is measured whenever a threshold is set.
+            self._lag_monitor = ConsumerLagMonitor(
+                ctx.pipeline_name,
+                interval_ms=self.source_config.lag_report_interval_ms
+                or DEFAULT_LAG_REPORT_INTERVAL_MS,
+                max_ready_lag=self.source_config.max_ready_lag,
+            )
+        self._poll_latency_metric = POLL_LATENCY_METRIC.labels(
+            pipeline_name=ctx.pipeline_name
+        )
+        self._skipped_message_counter = SKIPPED_MESSAGE_COUNTER_METRIC.labels(
+            pipeline_name=ctx.pipeline_name
         )
-        self._observe_message: Callable = kafka_messages_observer(ctx.pipeline_name)
 
     @classmethod
     def create(cls, config_dict: dict, ctx: PipelineContext) -> "EventSource":
         config = KafkaEventSourceConfig.parse_obj(config_dict)
         return cls(config, ctx)
 
+    def push_down_filter(self, filter_config: FilterConfig) -> None:
+        self._filter_pushdown = KafkaFilterPushdown(filter_config)
+        self._skipped_offsets = SkippedOffsetTracker()
+        # Skipped messages are never acked by the pipeline, so their offsets are committed in bulk by the source.
+        self._skipped_offset_committer = self._offset_committer or OffsetCommitter(
+            self.consumer,
+            max_events=self.source_config.commit_max_events,
+            interval_ms=DEFAULT_SKIPPED_OFFSET_COMMIT_INTERVAL_MS,
+        )
+
     def events(self) -> Iterable[EventEnvelope]:
         topic_routes = self.source_config.topic_routes or DEFAULT_TOPIC_ROUTES
         topics_to_subscribe = list(topic_routes.values())
         logger.debug(f"Subscribing to the following topics: {topics_to_subscribe}")
-        self.consumer.subscribe(topics_to_subscribe)
+        self.consumer.subscribe(
+            topics_to_subscribe,
+            on_assign=self._on_assign,
+            on_revoke=self._on_revoke,
+            on_lost=self._on_lost,
+        )
         self.running = True
+        if self.source_config.poll_buffer_size is not None:
+            yield from self._events_from_poll_thread(topic_routes)
+        else:
+            yield from self._poll_events(topic_routes)
+
+    def _events_from_poll_thread(
+        self, topic_routes: Dict[str, str]
+    ) -> Iterable[EventEnvelope]:
+        # Polling on a separate thread keeps the consumer within max.poll.interval.ms however slow the Action is.
+        poll_buffer: "queue.Queue[Any]" = queue.Queue()
+        self._poll_buffer = poll_buffer
+        self._poll_thread = threading.Thread(
+            target=self._run_poll_thread,
+            args=(topic_routes, poll_buffer),
+            name="kafka-event-source-poll",
+            daemon=True,
+        )
+        self._poll_thread.start()
+        while True:
+            try:
+                item = poll_buffer.get(timeout=PAUSED_POLL_TIMEOUT_SECONDS)
+            except queue.Empty:
+                if not self._poll_thread.is_alive():
+                    break
+                continue
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def _run_poll_thread(
+        self, topic_routes: Dict[str, str], poll_buffer: "queue.Queue[Any]"
+    ) -> None:
+        try:
+            for enveloped_event in self._poll_events(topic_routes):
+                poll_buffer.put(enveloped_event)
+        except Exception as e:
+            # Surface errors on the thread consuming the events.
+            poll_buffer.put(e)
+
+    def _apply_backpressure(self) -> None:
+        # Pauses fetching once the buffer is full, and resumes it once the buffer has drained by half.
+        if self._poll_buffer is None or self.source_config.poll_buffer_size is None:
+            return
+        buffered = self._poll_buffer.qsize()
+        if not self._paused and buffered >= self.source_config.poll_buffer_size:
+            partitions = self.consumer.assignment()
+            self.consumer.pause(partitions)
+            self._backpressure_paused_partitions = frozenset(
+                (partition.topic, partition.partition) for partition in partitions
+            )
+            self._paused = True
+            logger.debug(f"Paused Kafka partitions with {buffered} events buffered")
+        elif self._paused and buffered <= self.source_config.poll_buffer_size // 2:
+            # Partitions which finished their backfill range in the meantime stay paused.
+            self.consumer.resume(
+                [
+                    TopicPartition(topic, partition)
+                    for topic, partition in sorted(self._backpressure_paused_partitions)
+                    if self._backfill is None
+                    or not self._backfill.is_finished(topic, partition)
+                ]
+            )
+            self._backpressure_paused_partitions = frozenset()
+            self._paused = False
+            logger.debug(f"Resumed Kafka partitions with {buffered} events buffered")
+
+    def _on_poll(self) -> None:
+        # Invoked on the polling thread before every poll.
+        self._maybe_commit()
+        self._apply_backpressure()
+        if self._lag_monitor is not None:
+            self._lag_monitor.maybe_update(self.consumer)
+
+    def _poll_events(self, topic_routes: Dict[str, str]) -> Iterable[EventEnvelope]:
+        if self.source_config.max_batch_size > 1:
+            yield from self._consume_batches(topic_routes)
+            return
         while self.running:
+            self._on_poll()
+            poll_started_at = time.perf_counter()
             try:
-                msg = self.consumer.poll(timeout=2.0)
+                msg = self.consumer.poll(
+                    timeout=PAUSED_POLL_TIMEOUT_SECONDS
+                    if self._paused
+                    else POLL_TIMEOUT_SECONDS
+                )
             except confluent_kafka.error.ConsumeError as e:
+                if e.code == KafkaError._PARTITION_EOF and e.kafka_message is not None:
+                    # The deserializing consumer raises end of partition events.
+                    self._on_partition_eof(e.kafka_message)
+                    continue
                 logger.exception(f"Kafka consume error: {e}")
                 continue
 
             if msg is None:
                 continue
+            self._poll_latency_metric.observe(time.perf_counter() - poll_started_at)
 
-            self._observe_message(msg)
+            self._message_observer.observe(msg)
             if msg.error():
                 if msg.error().code() == KafkaError._PARTITION_EOF:
                     # End of partition event
-                    logger.debug(
-                        "%% %s [%d] reached end at offset %d\n"
-                        % (msg.topic(), msg.partition(), msg.offset())
-                    )
+                    self._on_partition_eof(msg)
                 elif msg.error():
                     raise KafkaException(msg.error())
-            else:
+            elif self._in_backfill_range(msg):
+                value_size = self._value_deserializer.last_value_size
                 if "mcl" in topic_routes and msg.topic() == topic_routes["mcl"]:
-                    yield from self.handle_mcl(msg)
+                    yield from self._handle_message(msg, "mcl", value_size)
                 elif "pe" in topic_routes and msg.topic() == topic_routes["pe"]:
-                    yield from self.handle_pe(msg)
+                    yield from self._handle_message(msg, "pe", value_size)
 
         logger.info("Kafka consumer exiting main loop")
 
+    def _consume_batches(self, topic_routes: Dict[str, str]) -> Iterable[EventEnvelope]:
+        # Resolve the route of each topic once, rather than for every message.
+        routes = {
+            topic_routes[route]: route
+            for route in ("mcl", "pe")
+            if route in topic_routes
+        }
+        max_batch_size = self.source_config.max_batch_size
+        batch_timeout = self.source_config.batch_timeout_ms / 1000.0
+        while self.running:
+            self._on_poll()
+            poll_started_at = time.perf_counter()
+            try:
+                msgs: List[Any] = self.consumer.consume(
+                    num_messages=max_batch_size, timeout=batch_timeout
+                )
+            except KafkaException as e:
+                logger.exception(f"Kafka consume error: {e}")
+                continue
+
+            if not msgs:
+                continue
+            self._poll_latency_metric.observe(time.perf_counter() - poll_started_at)
+
+            self._message_observer.observe_batch(msgs)
+            for msg in msgs:
+                if msg.error():
+                    if msg.error().code() == KafkaError._PARTITION_EOF:
+                        # End of partition event
+                        self._on_partition_eof(msg)
+                        continue
+                    raise KafkaException(msg.error())
+                route = routes.get(msg.topic())
+                if route is None or not self._in_backfill_range(msg):
+                    continue
+                try:
+                    msg.set_value(
+                        self._value_deserializer(
+                            msg.value(),
+                            SerializationContext(
+                                msg.topic(), MessageField.VALUE, msg.headers()
+                            ),
+                        )
+                    )
+                except Exception:
+                    logger.exception(
+                        f"Failed to deserialize Kafka message: {msg.topic()}, {msg.partition()}, {msg.offset()}"
+                    )
+                    continue
+                yield from self._handle_message(
+                    msg, route, self._value_deserializer.last_value_size
+                )
+
+        logger.info("Kafka consumer exiting main loop")
+
+    def _handle_message(
+        self, msg: Any, route: str, value_size: int
+    ) -> Iterable[EventEnvelope]:
+        handler = self.handle_mcl if route == "mcl" else self.handle_pe
+        if self._filter_pushdown is None or self._skipped_offsets is None:
+            yield from with_message_size(handler(msg), value_size)
+            return
+        if route == "mcl":
+            accepted = self._filter_pushdown.matches_mcl(msg.value())
+        else:
+            accepted = self._filter_pushdown.accepts_pe
+        # Handlers produce at most one event per message.
+        enveloped_events = list(handler(msg)) if accepted else []
+        if not enveloped_events:
+            self._skip_message(msg)
+            return
+        self._skipped_offsets.on_yield(msg.topic(), msg.partition(), msg.offset())
+        yield from with_message_size(enveloped_events, value_size)
+
+    def _in_backfill_range(self, msg: Any) -> bool:
+        # Messages beyond the end of the backfill range are neither processed nor committed.
+        if self._backfill is None:
+            return True
+        if self._backfill.is_finished(msg.topic(), msg.partition()):
+            return False
+        timestamp_type, timestamp = msg.timestamp()
+        if self._backfill.accepts(
+            msg.topic(),
+            msg.partition(),
+            msg.offset(),
+            timestamp
+            if timestamp_type != confluent_kafka.TIMESTAMP_NOT_AVAILABLE
+            else None,
+        ):
+            return True
+        self.consumer.pause([TopicPartition(msg.topic(), msg.partition())])
+        self._stop_if_backfilled()
+        return False
+
+    def _on_partition_eof(self, msg: Any) -> None:
+        logger.debug(
+            "%% %s [%d] reached end at offset %d\n"
+            % (msg.topic(), msg.partition(), msg.offset())
+        )
+        if self._backfill is not None:
+            self._backfill.on_partition_eof(msg.topic(), msg.partition(), msg.offset())
+            self._stop_if_backfilled()
+
+    def _stop_if_backfilled(self) -> None:
+        assert self._backfill is not None
+        if self._backfill.finished and self.running:
+            logger.info("Reached the end of the backfill range on all Kafka partitions")
+            self.running = False
+
+    def _skip_message(self, msg: Any) -> None:
+        assert self._skipped_offsets is not None
+        assert self._skipped_offset_committer is not None
+        self._skipped_message_counter.inc()
+        if self._skipped_offsets.on_skip(msg.topic(), msg.partition(), msg.offset()):
+            self._skipped_offset_committer.ack(
+                msg.topic(), msg.partition(), msg.offset()
+            )
+
+    def _discard_skipped_offsets(self, topic: str, partition: int, offset: int) -> None:
+        # Skipped offsets pending a bulk commit are superseded by the synchronous commit of a higher offset.
+        if self._skipped_offset_committer is not None:
+            self._skipped_offset_committer.discard(topic, partition, offset)
+
+    def _resolve_ack_offset(self, topic: str, partition: int, offset: int) -> int:
+        # Acking an event may also commit the messages skipped after it.
+        if self._skipped_offsets is None:
+            return offset
+        return self._skipped_offsets.resolve_ack(topic, partition, offset)
+
     @staticmethod
     def handle_mcl(msg: Any) -> Iterable[EventEnvelope]:
         metadata_change_log_event = build_metadata_change_log_event(msg)
@@ -196,21 +660,170 @@ class KafkaEventSource(EventSource):
             kafka_meta = build_kafka_meta(msg)
             yield EventEnvelope(ENTITY_CHANGE_EVENT_V1_TYPE, event, kafka_meta)
 
+    def _offset_committers(self) -> List[OffsetCommitter]:
+        committers = []
+        if self._offset_committer is not None:
+            committers.append(self._offset_committer)
+        if (
+            self._skipped_offset_committer is not None
+            and self._skipped_offset_committer is not self._offset_committer
+        ):
+            committers.append(self._skipped_offset_committer)
+        return committers
+
+    def _maybe_commit(self) -> None:
+        # Commits offsets which have been acked but not yet committed, once they are due.
+        for committer in self._offset_committers():
+            committer.maybe_commit()
+
+    def _on_assign(self, consumer: Any, partitions: List[TopicPartition]) -> None:
+        if self._backfill is not None:
+            # Newly assigned partitions start at their backfill start bound, rather than at the committed offset.
+            self._backfill.assign(consumer, partitions)
+        # Under incremental rebalancing, only the newly assigned partitions are passed, and added to the assignment.
+        if self._incremental_rebalance:
+            consumer.incremental_assign(partitions)
+        else:
+            consumer.assign(partitions)
+        self._revoked_partitions = self._revoked_partitions - {
+            (partition.topic, partition.partition) for partition in partitions
+        }
+        # Partitions assigned while the buffer is full start out paused.
+        if self._paused:
+            consumer.pause(partitions)
+            self._backpressure_paused_partitions = (
+                self._backpressure_paused_partitions
+                | {(partition.topic, partition.partition) for partition in partitions}
+            )
+        logger.info(f"Assigned Kafka partitions: {partitions}")
+
+    def _on_revoke(self, consumer: Any, partitions: List[TopicPartition]) -> None:
+        # Commit acked offsets before another consumer takes over the partitions, so it doesn't redeliver them.
+        for committer in self._offset_committers():
+            committer.flush()
+        self._release_partitions(partitions)
+        logger.info(f"Revoked Kafka partitions: {partitions}")
+
+    def _on_lost(self, consumer: Any, partitions: List[TopicPartition]) -> None:
+        # Lost partitions may already be owned by another consumer, so their offsets can no longer be committed.
+        self._release_partitions(partitions)
+        logger.warning(f"Lost Kafka partitions: {partitions}")
+
+    def _release_partitions(self, partitions: List[TopicPartition]) -> None:
+        # Drops all progress on partitions this consumer no longer owns. Their new owner resumes from the committed offsets.
+        topic_partitions = {
+            (partition.topic, partition.partition) for partition in partitions
+        }
+        self._revoked_partitions = self._revoked_partitions | topic_partitions
+        self._backpressure_paused_partitions = (
+            self._backpressure_paused_partitions - topic_partitions
+        )
+        for committer in self._offset_committers():
+            committer.forget(topic_partitions)
+        if self._skipped_offsets is not None:
+            self._skipped_offsets.forget(topic_partitions)
+        if self._backfill is not None:
+            self._backfill.release(topic_partitions)
+        if self._lag_monitor is not None:
+            self._lag_monitor.forget(topic_partitions)
+        self._drop_buffered_events(topic_partitions)
+
+    def _drop_buffered_events(self, topic_partitions: Set[Tuple[str, int]]) -> None:
+        # Events of revoked partitions which the pipeline has not taken yet would only be processed twice.
+        if self._poll_buffer is None:
+            return
+        with self._poll_buffer.mutex:
+            buffered = self._poll_buffer.queue
+            kept = [
+                item
+                for item in buffered
+                if isinstance(item, Exception)
+                or (item.meta["kafka"]["topic"], item.meta["kafka"]["partition"])
+                not in topic_partitions
+            ]
+            dropped_count = len(buffered) - len(kept)
+            buffered.clear()
+            buffered.extend(kept)
+        if dropped_count:
+            logger.info(
+                f"Dropped {dropped_count} buffered events of revoked Kafka partitions"
+            )
+
+    def _is_revoked(self, topic: str, partition: int) -> bool:
+        return (topic, partition) in self._revoked_partitions
+
+    def is_ready(self) -> bool:
+        return self._lag_monitor is None or self._lag_monitor.is_ready()
+
     def close(self) -> None:
         if self.consumer:
             self.running = False
+            if (
+                self._poll_thread is not None
+                and self._poll_thread is not threading.current_thread()
+            ):
+                # The consumer may not be closed while it is being polled.
+                self._poll_thread.join()
+            for committer in self._offset_committers():
+                committer.flush()
             self.consumer.close()
 
     def ack(self, event: EventEnvelope) -> None:
+        topic = event.meta["kafka"]["topic"]
+        partition = event.meta["kafka"]["partition"]
+        if self._is_revoked(topic, partition):
+            logger.debug(
+                f"Not committing offset of revoked partition: topic: {topic}, partition: {partition}"
+            )
+            return
+        offset = self._resolve_ack_offset(
+            topic, partition, event.meta["kafka"]["offset"]
+        )
+        if self._offset_committer is not None:
+            self._offset_committer.ack(topic, partition, offset)
+            return
+        self.consumer.commit(offsets=[TopicPartition(topic, partition, offset + 1)])
+        self._discard_skipped_offsets(topic, partition, offset)
+        logger.debug(
+            f"Successfully committed offsets at message: topic: {topic}, partition: {partition}, offset: {offset}"
+        )
+
+    def ack_batch(self, events: List[EventEnvelope]) -> None:
+        # Only the highest offset per topic partition needs to be committed.
+        highest_offsets: Dict[Tuple[str, int], int] = {}
+        for event in events:
+            topic_partition = (
+                event.meta["kafka"]["topic"],
+                event.meta["kafka"]["partition"],
+            )
+            if self._is_revoked(*topic_partition):
+                continue
+            offset = event.meta["kafka"]["offset"]
+            if offset > highest_offsets.get(topic_partition, -1):
+                highest_offsets[topic_partition] = offset
+        if not highest_offsets:
+            return
+        highest_offsets = {
+            (topic, partition): self._resolve_ack_offset(topic, partition, offset)
+            for (topic, partition), offset in highest_offsets.items()
+        }
+        if self._offset_committer is not None:
+            self._offset_committer.ack_many(
+                (
+                    (topic, partition, offset)
+                    for (topic, partition), offset in highest_offsets.items()
+                ),
+                event_count=len(events),
+            )
+            return
         self.consumer.commit(
             offsets=[
-                TopicPartition(
-                    event.meta["kafka"]["topic"],
-                    event.meta["kafka"]["partition"],
-                    event.meta["kafka"]["offset"] + 1,
-                )
+                TopicPartition(topic, partition, offset + 1)
+                for (topic, partition), offset in highest_offsets.items()
             ]
         )
+        for (topic, partition), offset in highest_offsets.items():
+            self._discard_skipped_offsets(topic, partition, offset)
         logger.debug(
-            f"Successfully committed offsets at message: topic: {event.meta['kafka']['topic']}, partition: {event.meta['kafka']['partition']}, offset: {event.meta['kafka']['offset']}"
+            f"Successfully committed offsets for batch of {len(events)} messages: {highest_offsets}"
         )
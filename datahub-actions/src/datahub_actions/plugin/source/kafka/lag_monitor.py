@@ -0,0 +1,126 @@
+# Copyright 2021 Acryl Data, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from confluent_kafka import TopicPartition
+from prometheus_client import Gauge
+
+logger = logging.getLogger(__name__)
+
+CONSUMER_LAG_METRIC = Gauge(
+    name="kafka_consumer_lag",
+    documentation="Number of kafka messages produced to a partition which the consumer has not fetched yet",
+    labelnames=["topic", "partition", "pipeline_name"],
+)
+
+TOTAL_CONSUMER_LAG_METRIC = Gauge(
+    name="kafka_consumer_total_lag",
+    documentation="Number of kafka messages produced to all assigned partitions which the consumer has not fetched yet",
+    labelnames=["pipeline_name"],
+)
+
+
+class ConsumerLagMonitor:
+    """
+    Periodically measures the lag of each assigned partition, as the distance between the consumer's position and
+    the partition's high watermark, and exports it as Prometheus gauges.
+
+    The high watermarks are read from the consumer's cache, which is refreshed by every fetch response, so that
+    measuring the lag never blocks the polling thread on a request to the broker.
+
+    If max_ready_lag is set, the consumer is only considered ready once its total lag has been measured to be at
+    most max_ready_lag messages.
+    """
+
+    def __init__(
+        self,
+        pipeline_name: str,
+        interval_ms: int,
+        max_ready_lag: Optional[int] = None,
+    ):
+        self.pipeline_name = pipeline_name
+        self.interval_ms = interval_ms
+        self.max_ready_lag = max_ready_lag
+        self._total_lag_gauge = TOTAL_CONSUMER_LAG_METRIC.labels(
+            pipeline_name=pipeline_name
+        )
+        self._lag_gauges: Dict[Tuple[str, int], Any] = {}
+        self._last_update_at: Optional[float] = None
+        self._total_lag: Optional[int] = None
+
+    @property
+    def total_lag(self) -> Optional[int]:
+        return self._total_lag
+
+    def is_ready(self) -> bool:
+        if self.max_ready_lag is None:
+            return True
+        total_lag = self._total_lag
+        return total_lag is not None and total_lag <= self.max_ready_lag
+
+    def maybe_update(self, consumer: Any) -> None:
+        """
+        Measures the lag, if interval_ms has passed since it was last measured. Must be called from the polling thread.
+        """
+        now = time.monotonic()
+        if (
+            self._last_update_at is not None
+            and (now - self._last_update_at) * 1000 < self.interval_ms
+        ):
+            return
+        self._last_update_at = now
+        try:
+            self.update(consumer)
+        except Exception:
+            # Lag is best effort, and must never interrupt consumption.
+            logger.exception("Failed to measure Kafka consumer lag")
+
+    def update(self, consumer: Any) -> None:
+        total_lag = 0
+        for position in consumer.position(consumer.assignment()):
+            if position.offset < 0:
+                # Nothing was fetched from the partition yet.
+                continue
+            _, high_watermark = consumer.get_watermark_offsets(
+                TopicPartition(position.topic, position.partition), cached=True
+            )
+            if high_watermark < 0:
+                # No fetch response reported the end of the partition yet.
+                continue
+            lag = max(high_watermark - position.offset, 0)
+            self._get_lag_gauge(position.topic, position.partition).set(lag)
+            total_lag += lag
+        self._total_lag_gauge.set(total_lag)
+        self._total_lag = total_lag
+
+    def forget(self, topic_partitions: Iterable[Tuple[str, int]]) -> None:
+        # Revoked partitions are reported by their new owner.
+        for topic_partition in topic_partitions:
+            if self._lag_gauges.pop(topic_partition, None) is not None:
+                CONSUMER_LAG_METRIC.remove(
+                    topic_partition[0], str(topic_partition[1]), self.pipeline_name
+                )
+
+    def _get_lag_gauge(self, topic: str, partition: int) -> Any:
+        lag_gauge = self._lag_gauges.get((topic, partition))
+        if lag_gauge is None:
+            lag_gauge = self._lag_gauges[
+                (topic, partition)
+            ] = CONSUMER_LAG_METRIC.labels(
+                topic=topic, partition=partition, pipeline_name=self.pipeline_name
+            )
+        return lag_gauge
@@ -0,0 +1,129 @@
+# Copyright 2021 Acryl Data, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from confluent_kafka import TopicPartition
+
+logger = logging.getLogger(__name__)
+
+
+class OffsetCommitter:
+    """
+    Coalesces the offsets of acked Kafka messages, and commits them asynchronously.
+
+    Only the highest acked offset per topic partition is kept. The pending offsets are committed without waiting
+    for the broker once max_events messages have been acked, or once interval_ms has passed since the last commit,
+    whichever comes first. flush() commits synchronously, and must be called before partitions are revoked and
+    before the consumer is closed. Messages acked but not yet committed are redelivered after a crash, so delivery
+    remains at-least-once.
+    """
+
+    def __init__(self, consumer: Any, max_events: int, interval_ms: int):
+        self.consumer = consumer
+        self.max_events = max_events
+        self.interval_ms = interval_ms
+        self._lock = threading.Lock()
+        self._pending_offsets: Dict[Tuple[str, int], int] = {}
+        self._pending_events = 0
+        self._last_commit_at = time.monotonic()
+
+    def ack(self, topic: str, partition: int, offset: int) -> None:
+        self.ack_many([(topic, partition, offset)])
+
+    def ack_many(
+        self, offsets: Iterable[Tuple[str, int, int]], event_count: Optional[int] = None
+    ) -> None:
+        """
+        Acks the given (topic, partition, offset) tuples, which may stand in for a larger number of acked events.
+        """
+        with self._lock:
+            offset_count = 0
+            for topic, partition, offset in offsets:
+                if offset > self._pending_offsets.get((topic, partition), -1):
+                    self._pending_offsets[(topic, partition)] = offset
+                offset_count += 1
+            self._pending_events += (
+                event_count if event_count is not None else offset_count
+            )
+        self.maybe_commit()
+
+    def discard(self, topic: str, partition: int, offset: int) -> None:
+        """
+        Drops the pending offset of a topic partition if it is no higher than an offset committed elsewhere,
+        so that committing it would not move the committed offset backwards.
+        """
+        with self._lock:
+            if self._pending_offsets.get((topic, partition), offset + 1) <= offset:
+                del self._pending_offsets[(topic, partition)]
+
+    def forget(self, topic_partitions: Iterable[Tuple[str, int]]) -> None:
+        """
+        Drops the pending offsets of topic partitions which are no longer assigned, without committing them.
+        """
+        with self._lock:
+            for topic_partition in topic_partitions:
+                self._pending_offsets.pop(topic_partition, None)
+
+    def maybe_commit(self) -> None:
+        """
+        Commits the pending offsets asynchronously, if enough events or time have accumulated since the last commit.
+        """
+        with self._lock:
+            if not self._pending_offsets:
+                return
+            elapsed_ms = (time.monotonic() - self._last_commit_at) * 1000
+            if self._pending_events < self.max_events and elapsed_ms < self.interval_ms:
+                return
+            offsets = self._take_pending_offsets()
+        self._commit(offsets, asynchronous=True)
+
+    def flush(self) -> None:
+        """
+        Synchronously commits the pending offsets.
+        """
+        with self._lock:
+            if not self._pending_offsets:
+                return
+            offsets = self._take_pending_offsets()
+        self._commit(offsets, asynchronous=False)
+
+    def _take_pending_offsets(self) -> List[TopicPartition]:
+        offsets = [
+            TopicPartition(topic, partition, offset + 1)
+            for (topic, partition), offset in self._pending_offsets.items()
+        ]
+        self._pending_offsets = {}
+        self._pending_events = 0
+        self._last_commit_at = time.monotonic()
+        return offsets
+
+    def _commit(self, offsets: List[TopicPartition], asynchronous: bool) -> None:
+        try:
+            self.consumer.commit(offsets=offsets, asynchronous=asynchronous)
+            logger.debug(
+                f"Committed offsets {'asynchronously' if asynchronous else 'synchronously'}: {offsets}"
+            )
+        except Exception:
+            # Later commits of higher offsets supersede the failed one. Until then, the messages may be redelivered.
+            logger.exception(f"Failed to commit offsets: {offsets}")
+
+
+def log_commit_result(error: Optional[Any], partitions: List[TopicPartition]) -> None:
+    # Invoked by the consumer once an asynchronous commit completes.
+    if error is not None:
+        logger.warning(f"Failed to commit offsets {partitions}: {error}")
@@ -0,0 +1,319 @@
+# Copyright 2021 Acryl Data, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import queue
+import threading
+from typing import Dict, Iterable, List, Optional, Union
+
+from datahub.configuration import ConfigModel
+from datahub.configuration.common import ConfigurationError
+
+from datahub_actions.event.event_envelope import EventEnvelope
+from datahub_actions.pipeline.offset_tracker import OffsetTracker, TrackedEvent
+from datahub_actions.pipeline.pipeline_config import FilterConfig, SourceConfig
+from datahub_actions.pipeline.pipeline_context import PipelineContext
+from datahub_actions.pipeline.pipeline_util import (
+    create_event_source,
+    get_partition_key,
+)
+from datahub_actions.plugin.transform.filter.filter_index import FilterIndex
+from datahub_actions.source.event_source import EventSource
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUFFER_SIZE = 1000
+
+# How often a blocked dispatch re-checks whether the pipeline it is waiting on is still around.
+PUT_TIMEOUT_SECONDS = 1.0
+
+# Marks the end of the shared event stream in each pipeline's buffer.
+_END_OF_STREAM = object()
+
+
+class SharedEventSourceConfig(ConfigModel):
+    # The name under which the source is shared. Pipelines using the same name read from one underlying source.
+    name: str
+
+    # The underlying Event Source, e.g. a Kafka source. It is created with the shared name as its pipeline name.
+    source: SourceConfig
+
+    # The max number of routed events buffered for each pipeline.
+    buffer_size: int = DEFAULT_BUFFER_SIZE
+
+
+class _RoutedEvent:
+    __slots__ = ("tracked_event", "recipients")
+
+    def __init__(
+        self, tracked_event: TrackedEvent, recipients: Dict[str, EventEnvelope]
+    ):
+        self.tracked_event = tracked_event
+        # The envelope handed to each pipeline which has not acked the event yet.
+        self.recipients = recipients
+
+
+class EventRouter:
+    """
+    Reads events from a single Event Source on behalf of many pipelines.
+
+    Each event is matched against the filters of all pipelines at once using a FilterIndex, and handed to the
+    buffers of the matching pipelines only. An event matched by several pipelines is handed to each in its own
+    envelope, which shares the decoded event but has its own meta, so acks are tracked per pipeline. An event is acked on the underlying
+    source once every pipeline it was routed to has acked it, and only after every earlier event on the same
+    partition, so the underlying source keeps its at-least-once guarantee for all pipelines.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        source_config: SourceConfig,
+        source: EventSource,
+        buffer_size: int,
+    ):
+        self.name = name
+        self.source_config = source_config
+        self.source = source
+        self.filter_index = FilterIndex()
+        self._buffer_size = buffer_size
+        self._lock = threading.Lock()
+        self._buffers: Dict[str, queue.Queue] = {}
+        # The events handed out which are still waiting for acks, keyed by the identity of each recipient's envelope.
+        self._pending: Dict[int, _RoutedEvent] = {}
+        # Events which are done with, waiting to be acked on the underlying source in order.
+        self._ackable: List[EventEnvelope] = []
+        # Serializes acks on the underlying source, without holding up routing while they are committed.
+        self._ack_lock = threading.Lock()
+        self._offset_tracker = OffsetTracker()
+        self._dispatch_thread: Optional[threading.Thread] = None
+        self._running = True
+
+    def register(self, pipeline_name: str) -> None:
+        with self._lock:
+            if pipeline_name in self._buffers:
+                raise ConfigurationError(
+                    f"Pipeline {pipeline_name} is already reading from shared source {self.name}"
+                )
+            self._buffers[pipeline_name] = queue.Queue(maxsize=self._buffer_size)
+        # Pipelines which don't push down a filter receive every event.
+        self.filter_index.add(pipeline_name, None)
+
+    def events(self, pipeline_name: str) -> Iterable[EventEnvelope]:
+        with self._lock:
+            buffer = self._buffers.get(pipeline_name)
+            if buffer is None:
+                return
+            if self._dispatch_thread is None:
+                self._dispatch_thread = threading.Thread(
+                    target=self._dispatch,
+                    name=f"shared-source-{self.name}",
+                    daemon=True,
+                )
+                self._dispatch_thread.start()
+        while True:
+            item = buffer.get()
+            if item is _END_OF_STREAM:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def ack(self, pipeline_name: str, events: List[EventEnvelope]) -> None:
+        with self._lock:
+            for event in events:
+                self._ackable.extend(self._complete(pipeline_name, event))
+        self._forward_acks()
+
+    def release(self, pipeline_name: str) -> None:
+        """
+        Stops routing events to a pipeline. Events it has not acked yet are left pending, so the underlying source
+        never acks past them and they are delivered again once the source restarts.
+        Once the last pipeline is released, the underlying source is closed.
+        """
+        self.filter_index.remove(pipeline_name)
+        with self._lock:
+            buffer = self._buffers.pop(pipeline_name, None)
+            if buffer is None:
+                return
+            last_pipeline = not self._buffers
+        _drain(buffer)
+        buffer.put(_END_OF_STREAM)
+        if last_pipeline:
+            self._running = False
+            _unregister_router(self)
+            self.source.close()
+
+    def is_ready(self) -> bool:
+        return self.source.is_ready()
+
+    def _complete(
+        self, pipeline_name: str, event: EventEnvelope
+    ) -> List[EventEnvelope]:
+        routed_event = self._pending.get(id(event))
+        if (
+            routed_event is None
+            or routed_event.recipients.get(pipeline_name) is not event
+        ):
+            return []
+        del self._pending[id(event)]
+        del routed_event.recipients[pipeline_name]
+        if routed_event.recipients:
+            return []
+        return self._offset_tracker.complete(routed_event.tracked_event)
+
+    def _forward_acks(self) -> None:
+        # Whoever holds the ack lock forwards all acks collected so far, so the underlying source sees them in order.
+        with self._ack_lock:
+            with self._lock:
+                ackable = self._ackable
+                self._ackable = []
+            if ackable:
+                self.source.ack_batch(ackable)
+
+    def _dispatch(self) -> None:
+        end_of_stream: Union[object, Exception] = _END_OF_STREAM
+        try:
+            for enveloped_event in self.source.events():
+                if not self._running:
+                    break
+                self._route(enveloped_event)
+        except Exception as e:
+            logger.exception(f"Shared source {self.name} failed to read events")
+            end_of_stream = e
+        finally:
+            with self._lock:
+                buffers = list(self._buffers.items())
+            for pipeline_name, buffer in buffers:
+                self._put(pipeline_name, buffer, end_of_stream)
+
+    def _route(self, enveloped_event: EventEnvelope) -> None:
+        matched = self.filter_index.match(
+            enveloped_event.event_type, enveloped_event.event
+        )
+        tracked_event = self._offset_tracker.track(
+            enveloped_event, get_partition_key(enveloped_event)
+        )
+        with self._lock:
+            buffers = [
+                (name, buffer)
+                for name, buffer in self._buffers.items()
+                if name in matched
+            ]
+            recipients = {
+                name: _copy_envelope(enveloped_event)
+                if len(buffers) > 1
+                else enveloped_event
+                for name, _ in buffers
+            }
+            if recipients:
+                routed_event = _RoutedEvent(tracked_event, recipients)
+                for envelope in recipients.values():
+                    self._pending[id(envelope)] = routed_event
+            else:
+                # Nobody is interested, so the event is immediately done with.
+                self._ackable.extend(self._offset_tracker.complete(tracked_event))
+        if not recipients:
+            self._forward_acks()
+        for pipeline_name, buffer in buffers:
+            self._put(pipeline_name, buffer, recipients[pipeline_name])
+
+    def _put(self, pipeline_name: str, buffer: queue.Queue, item: object) -> None:
+        # A full buffer holds back every pipeline, but never one which has been released meanwhile.
+        while True:
+            try:
+                buffer.put(item, timeout=PUT_TIMEOUT_SECONDS)
+                return
+            except queue.Full:
+                with self._lock:
+                    if self._buffers.get(pipeline_name) is not buffer:
+                        return
+
+
+def _copy_envelope(enveloped_event: EventEnvelope) -> EventEnvelope:
+    # The original envelope is acked on the underlying source, so it is never handed out when copies are.
+    # Transformers return new events rather than changing them in place, so the decoded event is shared.
+    return EventEnvelope(
+        enveloped_event.event_type,
+        enveloped_event.event,
+        dict(enveloped_event.meta),
+    )
+
+
+def _drain(buffer: queue.Queue) -> None:
+    while True:
+        try:
+            buffer.get_nowait()
+        except queue.Empty:
+            return
+
+
+_routers: Dict[str, EventRouter] = {}
+_routers_lock = threading.Lock()
+
+
+def get_event_router(
+    config: SharedEventSourceConfig, ctx: PipelineContext
+) -> EventRouter:
+    with _routers_lock:
+        router = _routers.get(config.name)
+        if router is None:
+            source = create_event_source(
+                config.source, PipelineContext(config.name, ctx.graph)
+            )
+            router = EventRouter(config.name, config.source, source, config.buffer_size)
+            _routers[config.name] = router
+        elif router.source_config != config.source:
+            raise ConfigurationError(
+                f"Shared source {config.name} is already configured with a different underlying source"
+            )
+        return router
+
+
+def _unregister_router(router: EventRouter) -> None:
+    with _routers_lock:
+        if _routers.get(router.name) is router:
+            del _routers[router.name]
+
+
+# Lets many pipelines read from one underlying Event Source, e.g. a single Kafka consumer, instead of each
+# consuming and decoding every event on its own. Events are only handed to the pipelines whose filter matches.
+class SharedEventSource(EventSource):
+    def __init__(self, router: EventRouter, pipeline_name: str):
+        self.router = router
+        self.pipeline_name = pipeline_name
+
+    @classmethod
+    def create(cls, config_dict: dict, ctx: PipelineContext) -> "EventSource":
+        config = SharedEventSourceConfig.parse_obj(config_dict)
+        router = get_event_router(config, ctx)
+        router.register(ctx.pipeline_name)
+        return cls(router, ctx.pipeline_name)
+
+    def push_down_filter(self, filter_config: FilterConfig) -> None:
+        self.router.filter_index.add(self.pipeline_name, filter_config)
+
+    def events(self) -> Iterable[EventEnvelope]:
+        yield from self.router.events(self.pipeline_name)
+
+    def ack(self, event: EventEnvelope) -> None:
+        self.router.ack(self.pipeline_name, [event])
+
+    def ack_batch(self, events: List[EventEnvelope]) -> None:
+        self.router.ack(self.pipeline_name, events)
+
+    def is_ready(self) -> bool:
+        return self.router.is_ready()
+
+    def close(self) -> None:
+        self.router.release(self.pipeline_name)
@@ -0,0 +1,209 @@
+# Copyright 2021 Acryl Data, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import threading
+from collections import Counter
+from typing import Any, Dict, FrozenSet, Hashable, List, Optional, Set, Tuple
+
+from datahub_actions.event.event import Event
+from datahub_actions.pipeline.pipeline_config import FilterConfig
+from datahub_actions.plugin.transform.filter.filter_transformer import (
+    Predicate,
+    as_json_value,
+    compile_fields,
+    get_event_field_getter,
+)
+
+# For each indexed field, the string values it may take.
+Conditions = Dict[str, FrozenSet[str]]
+
+
+class _IndexEntry:
+    __slots__ = ("key", "residual_id")
+
+    def __init__(self, key: Hashable, residual_id: Optional[str]):
+        self.key = key
+        # The parts of the filter which cannot be matched through lookups. None if there are none.
+        self.residual_id = residual_id
+
+
+class _IndexNode:
+    __slots__ = ("field", "branches", "wildcard", "entries")
+
+    def __init__(self) -> None:
+        # The field this node discriminates on, if any.
+        self.field: Optional[str] = None
+        # The child node for each value of the field.
+        self.branches: Dict[str, "_IndexNode"] = {}
+        # The child node of the filters which do not test the field.
+        self.wildcard: Optional["_IndexNode"] = None
+        # The filters whose indexed conditions are all satisfied once this node is reached.
+        self.entries: List[_IndexEntry] = []
+
+
+def _split_filter(event_filter: Dict[str, Any]) -> Tuple[Conditions, Dict[str, Any]]:
+    # Top level fields matched against strings, or lists of them, are indexed. Anything else is evaluated as is.
+    conditions: Conditions = {}
+    residual: Dict[str, Any] = {}
+    for field, match_val in event_filter.items():
+        if isinstance(match_val, str):
+            conditions[field] = frozenset([match_val])
+        elif isinstance(match_val, list):
+            conditions[field] = frozenset(
+                val for val in match_val if isinstance(val, str)
+            )
+        else:
+            residual[field] = match_val
+    return conditions, residual
+
+
+def _build_node(entries: List[Tuple[_IndexEntry, Conditions]]) -> _IndexNode:
+    node = _IndexNode()
+    remaining = []
+    for entry, conditions in entries:
+        if conditions:
+            remaining.append((entry, conditions))
+        else:
+            node.entries.append(entry)
+    if not remaining:
+        return node
+
+    # Discriminate on the field tested by the most filters, so that it is looked up once for all of them.
+    field_counts = Counter(field for _, conditions in remaining for field in conditions)
+    node.field = max(sorted(field_counts), key=lambda field: field_counts[field])
+    branches: Dict[str, List[Tuple[_IndexEntry, Conditions]]] = {}
+    wildcard = []
+    for entry, conditions in remaining:
+        values = conditions.get(node.field)
+        if values is None:
+            wildcard.append((entry, conditions))
+            continue
+        rest = {
+            field: vals for field, vals in conditions.items() if field != node.field
+        }
+        for value in values:
+            branches.setdefault(value, []).append((entry, rest))
+    node.branches = {value: _build_node(group) for value, group in branches.items()}
+    if wildcard:
+        node.wildcard = _build_node(wildcard)
+    return node
+
+
+class FilterIndex:
+    """
+    Merges the filters of many consumers, e.g. pipelines, into a single discrimination index, so that each event
+    is matched against all of them at once.
+
+    Events are routed through hash lookups, on the event type and then on each top level field which filters
+    match against strings, ordered by the number of filters testing them. The remaining parts of the filters,
+    e.g. nested fields, are compiled as the FilterTransformer does, and evaluated once per event for each
+    distinct remaining filter. The cost of matching an event thus grows with the number of distinct conditions,
+    rather than with the number of filters. Matching is equivalent to running each filter's FilterTransformer.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._filters: Dict[Hashable, Optional[FilterConfig]] = {}
+        # The keys without a filter, the root node per event type and the compiled residual filters.
+        # Replaced as a whole, so that readers never see a partially built index.
+        self._index: Tuple[
+            FrozenSet[Hashable],
+            Dict[str, _IndexNode],
+            Dict[str, List[Tuple[str, Predicate]]],
+        ] = (frozenset(), {}, {})
+
+    def add(self, key: Hashable, filter_config: Optional[FilterConfig]) -> None:
+        """
+        Adds or replaces the filter of a consumer. Consumers without a filter match every event.
+        """
+        with self._lock:
+            self._filters[key] = filter_config
+            self._rebuild()
+
+    def remove(self, key: Hashable) -> None:
+        with self._lock:
+            if key in self._filters:
+                del self._filters[key]
+                self._rebuild()
+
+    def match(self, event_type: str, event: Event) -> Set[Hashable]:
+        """
+        Returns the keys of the consumers whose filter matches the event.
+        """
+        unfiltered, roots, residuals = self._index
+        matched = set(unfiltered)
+        node = roots.get(event_type)
+        if node is None:
+            return matched
+        get_event_field = get_event_field_getter(event)
+        field_values: Dict[str, Any] = {}
+        residual_results: Dict[str, bool] = {}
+        nodes = [node]
+        while nodes:
+            node = nodes.pop()
+            for entry in node.entries:
+                residual_id = entry.residual_id
+                if residual_id is not None:
+                    residual_result = residual_results.get(residual_id)
+                    if residual_result is None:
+                        residual_result = residual_results[residual_id] = all(
+                            predicate(get_event_field(field))
+                            for field, predicate in residuals[residual_id]
+                        )
+                    if not residual_result:
+                        continue
+                matched.add(entry.key)
+            if node.field is None:
+                continue
+            if node.field not in field_values:
+                field_values[node.field] = as_json_value(get_event_field(node.field))
+            value = field_values[node.field]
+            if isinstance(value, str):
+                child = node.branches.get(value)
+                if child is not None:
+                    nodes.append(child)
+            if node.wildcard is not None:
+                nodes.append(node.wildcard)
+        return matched
+
+    def _rebuild(self) -> None:
+        unfiltered = set()
+        entries_by_event_type: Dict[str, List[Tuple[_IndexEntry, Conditions]]] = {}
+        residuals: Dict[str, List[Tuple[str, Predicate]]] = {}
+        for key, filter_config in self._filters.items():
+            if filter_config is None:
+                unfiltered.add(key)
+                continue
+            conditions, residual = _split_filter(filter_config.event or {})
+            residual_id = None
+            if residual:
+                # Identical residual filters are evaluated once.
+                residual_id = json.dumps(residual, sort_keys=True, default=str)
+                if residual_id not in residuals:
+                    residuals[residual_id] = compile_fields(residual)
+            event_types = (
+                filter_config.event_type
+                if isinstance(filter_config.event_type, list)
+                else [filter_config.event_type]
+            )
+            for event_type in set(event_types):
+                entries_by_event_type.setdefault(event_type, []).append(
+                    (_IndexEntry(key, residual_id), conditions)
+                )
+        roots = {
+            event_type: _build_node(entries)
+            for event_type, entries in entries_by_event_type.items()
+        }
+        self._index = (frozenset(unfiltered), roots, residuals)
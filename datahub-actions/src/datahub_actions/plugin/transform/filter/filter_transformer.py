@@ -12,27 +12,237 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import fnmatch
+import functools
 import json
 import logging
-from typing import Any, Dict, List, Optional, Union
+import re
+from typing import Any, Callable, Dict, List, Optional, Pattern, Set, Tuple, Union
 
 from datahub.configuration import ConfigModel
+from datahub.configuration.common import ConfigurationError
+from datahub.metadata.schema_classes import DictWrapper
 
+from datahub_actions.event.event import Event
 from datahub_actions.event.event_envelope import EventEnvelope
+from datahub_actions.event.event_registry import EntityChangeEvent
 from datahub_actions.pipeline.pipeline_context import PipelineContext
 from datahub_actions.transform.transformer import Transformer
 
 logger = logging.getLogger(__name__)
 
+# Matches a value of an event, as read from the event's fields.
+Predicate = Callable[[Any], bool]
+
 
 class FilterTransformerConfig(ConfigModel):
     event_type: Union[str, List[str]]
     event: Optional[Dict[str, Any]]
 
 
+def as_json_value(value: Any) -> Any:
+    # Bytes fields are strings in the JSON representation of an event.
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+    return value
+
+
+def is_operator_filter(match_val: Any) -> bool:
+    # Operators are distinguished from nested fields by their leading "$", e.g. {"$prefix": "urn:li:tag:"}.
+    return isinstance(match_val, dict) and any(
+        isinstance(key, str) and key.startswith("$") for key in match_val
+    )
+
+
+def _compile(match_val: Any) -> Predicate:
+    if is_operator_filter(match_val):
+        return _compile_operators(match_val)
+    if isinstance(match_val, dict):
+        return _compile_dict(match_val)
+    if isinstance(match_val, list):
+        return _compile_list(match_val)
+    return lambda value: match_val == as_json_value(value)
+
+
+def _compile_list(match_filters: List) -> Predicate:
+    """When matching lists we do ANY not ALL match"""
+    # Only strings are matched against lists, so other filters can never match.
+    match_vals = frozenset(val for val in match_filters if isinstance(val, str))
+
+    def _matches(value: Any) -> bool:
+        value = as_json_value(value)
+        return isinstance(value, str) and value in match_vals
+
+    return _matches
+
+
+def _compile_dict(match_filters: Dict[str, Any]) -> Predicate:
+    field_predicates = compile_fields(match_filters)
+
+    def _matches(value: Any) -> bool:
+        if isinstance(value, (str, bytes)):
+            # Nested JSON strings, e.g. the value of an aspect, are parsed once per filter node.
+            try:
+                value = json.loads(value)
+            except ValueError:
+                return False
+        if not isinstance(value, (dict, DictWrapper)):
+            return False
+        for key, predicate in field_predicates:
+            if not predicate(value.get(key)):
+                return False
+        return True
+
+    return _matches
+
+
+def _compile_operators(operators: Dict[str, Any]) -> Predicate:
+    """When combining operators we do ALL not ANY match"""
+    predicates = []
+    for operator, operand in operators.items():
+        compile_operator = OPERATORS.get(operator)
+        if compile_operator is None:
+            raise ConfigurationError(
+                f"Unsupported filter operator {operator}. Supported operators are {sorted(OPERATORS)}."
+            )
+        predicates.append(compile_operator(operator, operand))
+    if len(predicates) == 1:
+        return predicates[0]
+    return lambda value: all(predicate(value) for predicate in predicates)
+
+
+def _string_operands(operator: str, operand: Any) -> List[str]:
+    operands = operand if isinstance(operand, list) else [operand]
+    if not operands or not all(isinstance(val, str) for val in operands):
+        raise ConfigurationError(
+            f"Filter operator {operator} expects a string, or a list of them. Got {operand!r}."
+        )
+    return operands
+
+
+# Patterns are shared between the filters of all pipelines, and recompiled whenever a filter index is rebuilt.
+@functools.lru_cache(maxsize=None)
+def _cached_pattern(pattern: str) -> Pattern[str]:
+    return re.compile(pattern)
+
+
+def _compile_regex(operator: str, operand: Any) -> Predicate:
+    """Matches strings containing a match of ANY of the regular expressions"""
+    try:
+        patterns = [_cached_pattern(val) for val in _string_operands(operator, operand)]
+    except re.error as e:
+        raise ConfigurationError(
+            f"Filter operator {operator} got an invalid regular expression: {e}"
+        ) from e
+
+    def _matches(value: Any) -> bool:
+        value = as_json_value(value)
+        return isinstance(value, str) and any(
+            pattern.search(value) for pattern in patterns
+        )
+
+    return _matches
+
+
+def _compile_glob(operator: str, operand: Any) -> Predicate:
+    """Matches strings matching ANY of the shell style wildcard patterns, e.g. urn:li:tag:pii.*"""
+    # The patterns are translated into a single regular expression, so each value is scanned once.
+    pattern = _cached_pattern(
+        "|".join(fnmatch.translate(val) for val in _string_operands(operator, operand))
+    )
+
+    def _matches(value: Any) -> bool:
+        value = as_json_value(value)
+        return isinstance(value, str) and pattern.match(value) is not None
+
+    return _matches
+
+
+def _compile_prefix(operator: str, operand: Any) -> Predicate:
+    """Matches strings starting with ANY of the prefixes"""
+    # Prefixes are grouped by length, so that a value is tested with one lookup per distinct prefix length,
+    # rather than once per prefix.
+    prefixes_by_length: Dict[int, Set[str]] = {}
+    for prefix in _string_operands(operator, operand):
+        prefixes_by_length.setdefault(len(prefix), set()).add(prefix)
+    buckets = sorted(prefixes_by_length.items())
+
+    def _matches(value: Any) -> bool:
+        value = as_json_value(value)
+        if not isinstance(value, str):
+            return False
+        for length, prefixes in buckets:
+            if length > len(value):
+                return False
+            if value[:length] in prefixes:
+                return True
+        return False
+
+    return _matches
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _compile_range(operator: str, operand: Any) -> Predicate:
+    if not _is_number(operand):
+        raise ConfigurationError(
+            f"Filter operator {operator} expects a number. Got {operand!r}."
+        )
+    compare = RANGE_OPERATORS[operator]
+    return lambda value: _is_number(value) and compare(value, operand)
+
+
+def _compile_not(operator: str, operand: Any) -> Predicate:
+    predicate = _compile(operand)
+    return lambda value: not predicate(value)
+
+
+RANGE_OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "$gt": lambda value, bound: value > bound,
+    "$gte": lambda value, bound: value >= bound,
+    "$lt": lambda value, bound: value < bound,
+    "$lte": lambda value, bound: value <= bound,
+}
+
+OPERATORS: Dict[str, Callable[[str, Any], Predicate]] = {
+    "$regex": _compile_regex,
+    "$glob": _compile_glob,
+    "$prefix": _compile_prefix,
+    "$not": _compile_not,
+    **{operator: _compile_range for operator in RANGE_OPERATORS},
+}
+
+
+def compile_fields(match_filters: Dict[str, Any]) -> List[Tuple[str, Predicate]]:
+    return [(key, _compile(val)) for key, val in match_filters.items()]
+
+
+def get_event_field_getter(event: Event) -> Callable[[str], Any]:
+    # Reads fields straight from the event, rather than from a round trip through its JSON representation.
+    if isinstance(event, EntityChangeEvent):
+        parameters = event._inner_dict.get("__parameters_json")
+        if parameters is not None:
+            get = event.get
+            return lambda key: parameters if key == "parameters" else get(key)
+    if isinstance(event, DictWrapper):
+        return event.get
+    return event.as_json_obj().get
+
+
 class FilterTransformer(Transformer):
     def __init__(self, config: FilterTransformerConfig):
         self.config: FilterTransformerConfig = config
+        # The filter is compiled once, rather than interpreted for every event.
+        self._event_types = frozenset(
+            config.event_type
+            if isinstance(config.event_type, list)
+            else [config.event_type]
+        )
+        self._field_predicates: Optional[List[Tuple[str, Predicate]]] = (
+            compile_fields(config.event) if config.event is not None else None
+        )
 
     @classmethod
     def create(cls, config_dict: dict, ctx: PipelineContext) -> "Transformer":
@@ -40,46 +250,17 @@ class FilterTransformer(Transformer):
         return cls(config)
 
     def transform(self, env_event: EventEnvelope) -> Optional[EventEnvelope]:
-        logger.debug(f"Preparing to filter event {env_event}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Preparing to filter event {env_event}")
 
         # Match Event Type.
-        if not self._matches(self.config.event_type, env_event.event_type):
+        if env_event.event_type not in self._event_types:
             return None
 
         # Match Event Body.
-        if self.config.event is not None:
-            body_as_json_dict = json.loads(env_event.event.as_json())
-            for key, val in self.config.event.items():
-                if not self._matches(val, body_as_json_dict.get(key)):
+        if self._field_predicates is not None:
+            get_field = get_event_field_getter(env_event.event)
+            for key, predicate in self._field_predicates:
+                if not predicate(get_field(key)):
                     return None
         return env_event
-
-    def _matches(self, match_val: Any, match_val_to: Any) -> bool:
-        if isinstance(match_val, dict):
-            return self._matches_dict(match_val, match_val_to)
-        if isinstance(match_val, list):
-            return self._matches_list(match_val, match_val_to)
-        return match_val == match_val_to
-
-    def _matches_list(self, match_filters: List, match_with: Any) -> bool:
-        """When matching lists we do ANY not ALL match"""
-        if not isinstance(match_with, str):
-            return False
-        for filter in match_filters:
-            if filter == match_with:
-                return True
-        return False
-
-    def _matches_dict(self, match_filters: Dict[str, Any], match_with: Any) -> bool:
-        if isinstance(match_with, str):
-            try:
-                match_with = json.loads(match_with)
-            except ValueError:
-                pass
-        if not isinstance(match_with, dict):
-            return False
-        for key, val in match_filters.items():
-            curr = match_with.get(key)
-            if not self._matches(val, curr):
-                return False
-        return True
@@ -0,0 +1,118 @@
+# Copyright 2021 Acryl Data, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import asyncio
+import threading
+from abc import ABCMeta, abstractmethod
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Coroutine,
+    Iterable,
+    List,
+    Optional,
+    TypeVar,
+)
+
+from datahub_actions.event.event_envelope import EventEnvelope
+from datahub_actions.source.event_source import EventSource
+
+T = TypeVar("T")
+
+
+class AsyncEventSource(EventSource, metaclass=ABCMeta):
+    """
+    The base class for DataHub Event Sources which are natively asynchronous.
+
+    When a Pipeline is run on an asyncio event loop, `events_async` is consumed directly on the loop.
+    Synchronous Event Sources are instead iterated from a dedicated thread pool executor.
+
+    An AsyncEventSource can also be consumed by a synchronous Pipeline, in which case `events` and `ack`
+    submit the asynchronous methods to a private event loop running on its own thread. Acks may thus be made
+    from any thread while events are being iterated, e.g. when the Pipeline prefetches or processes events
+    concurrently.
+    """
+
+    _sync_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @abstractmethod
+    def events_async(self) -> AsyncIterable[EventEnvelope]:
+        """
+        Returns an asynchronous iterable of enveloped events.
+
+        In most cases this should be implemented via an async generator function which
+        can produce a continuous stream of events.
+        """
+
+    @abstractmethod
+    async def ack_async(self, event: EventEnvelope) -> None:
+        """
+        Acknowledges the processing of an individual event by the Actions Framework
+        """
+
+    async def ack_batch_async(self, events: List[EventEnvelope]) -> None:
+        """
+        Acknowledges the processing of a batch of events. By default, awaits `ack_async` on each event.
+        """
+        for event in events:
+            await self.ack_async(event)
+
+    def events(self) -> Iterable[EventEnvelope]:
+        loop = asyncio.new_event_loop()
+        loop_thread = threading.Thread(
+            target=loop.run_forever, name="async-event-source-loop", daemon=True
+        )
+        loop_thread.start()
+        self._sync_loop = loop
+        iterator: AsyncIterator[EventEnvelope] = self.events_async().__aiter__()
+        try:
+            while True:
+                try:
+                    yield self._run_on_loop(loop, iterator.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            self._sync_loop = None
+            aclose = getattr(iterator, "aclose", None)
+            if aclose is not None:
+                self._run_on_loop(loop, aclose())
+            loop.call_soon_threadsafe(loop.stop)
+            loop_thread.join()
+            loop.close()
+
+    def ack(self, event: EventEnvelope) -> None:
+        self._run_sync(self.ack_async(event))
+
+    def ack_batch(self, events: List[EventEnvelope]) -> None:
+        self._run_sync(self.ack_batch_async(events))
+
+    def _run_sync(self, coroutine: Coroutine[Any, Any, None]) -> None:
+        # Reuse the loop driving the events iterator, so that sources may bind resources to it.
+        loop = self._sync_loop
+        if loop is not None:
+            self._run_on_loop(loop, coroutine)
+        else:
+            asyncio.run(coroutine)
+
+    @staticmethod
+    def _run_on_loop(loop: asyncio.AbstractEventLoop, awaitable: Awaitable[T]) -> T:
+        return asyncio.run_coroutine_threadsafe(_await(awaitable), loop).result()
+
+
+async def _await(awaitable: Awaitable[T]) -> T:
+    # Wraps awaitables which are not coroutines, e.g. those of async generators, to submit them to a loop.
+    return await awaitable
@@ -13,11 +13,12 @@
 # limitations under the License.
 
 from abc import ABCMeta, abstractmethod
-from typing import Iterable
+from typing import Iterable, List
 
 from datahub.ingestion.api.closeable import Closeable
 
 from datahub_actions.event.event_envelope import EventEnvelope
+from datahub_actions.pipeline.pipeline_config import FilterConfig
 from datahub_actions.pipeline.pipeline_context import PipelineContext
 
 
@@ -52,3 +53,31 @@ class EventSource(Closeable, metaclass=ABCMeta):
         """
         Acknowledges the processing of an individual event by the Actions Framework
         """
+
+    def ack_batch(self, events: List[EventEnvelope]) -> None:
+        """
+        Acknowledges the processing of a batch of events by the Actions Framework.
+
+        The default implementation acks each event individually. Event Sources which are able to
+        acknowledge progress more cheaply (e.g. a single commit per partition) should override this method.
+        """
+        for event in events:
+            self.ack(event)
+
+    def push_down_filter(self, filter_config: FilterConfig) -> None:
+        """
+        Offers the pipeline's filter to the Event Source, before any events are requested.
+
+        Event Sources may use it to skip events which cannot match the filter without fully decoding them,
+        in which case they remain responsible for acknowledging the skipped events. The filter is still applied
+        to every produced event by the pipeline, so Event Sources only need to evaluate the parts of it they
+        can do cheaply. The default implementation ignores the filter.
+        """
+
+    def is_ready(self) -> bool:
+        """
+        Returns whether the Event Source is caught up enough to be considered ready, e.g. to serve a readiness probe.
+
+        The default implementation is always ready.
+        """
+        return True
@@ -14,9 +14,18 @@
 
 from datahub.ingestion.api.registry import PluginRegistry
 
+from datahub_actions.plugin.source.failed_events.failed_events_source import (
+    FailedEventsSource,
+)
 from datahub_actions.plugin.source.kafka.kafka_event_source import KafkaEventSource
 from datahub_actions.source.event_source import EventSource
 
 event_source_registry = PluginRegistry[EventSource]()
 event_source_registry.register_from_entrypoint("datahub_actions.source.plugins")
 event_source_registry.register("kafka", KafkaEventSource)
+event_source_registry.register("failed_events", FailedEventsSource)
+# Loaded lazily, since it creates its underlying Event Source through this registry.
+event_source_registry.register_lazy(
+    "shared",
+    "datahub_actions.plugin.source.shared.shared_event_source:SharedEventSource",
+)
@@ -13,27 +13,43 @@
 # limitations under the License.
 
 import json
+from typing import Dict
 
+from datahub_actions.utils.sharded_counter import ShardedCounter
 
-# Class that stores running statistics for a single Actions Transformer.
+
+# Class that stores running statistics for a single Actions Transformer. Safe to increment from multiple threads.
 class TransformerStats:
-    # The number of exceptions raised by the Transformer.
-    exception_count: int = 0
+    def __init__(self) -> None:
+        # The number of exceptions raised by the Transformer.
+        self._exception_count = ShardedCounter()
+
+        # The total number of events that were received by the transformer.
+        self._processed_count = ShardedCounter()
+
+        # The number of events filtered by the Transformer. The total transformed count is equal to processed count - filtered count.
+        self._filtered_count = ShardedCounter()
 
-    # The total number of events that were received by the transformer.
-    processed_count: int = 0
+    @property
+    def exception_count(self) -> int:
+        return self._exception_count.value
 
-    # The number of events filtered by the Transformer. The total transformed count is equal to processed count - filtered count.
-    filtered_count: int = 0
+    @property
+    def processed_count(self) -> int:
+        return self._processed_count.value
+
+    @property
+    def filtered_count(self) -> int:
+        return self._filtered_count.value
 
     def increment_exception_count(self) -> None:
-        self.exception_count = self.exception_count + 1
+        self._exception_count.increment()
 
     def increment_processed_count(self) -> None:
-        self.processed_count = self.processed_count + 1
+        self._processed_count.increment()
 
     def increment_filtered_count(self) -> None:
-        self.filtered_count = self.filtered_count + 1
+        self._filtered_count.increment()
 
     def get_exception_count(self) -> int:
         return self.exception_count
@@ -44,5 +60,12 @@ class TransformerStats:
     def get_filtered_count(self) -> int:
         return self.filtered_count
 
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            "exception_count": self.exception_count,
+            "filtered_count": self.filtered_count,
+            "processed_count": self.processed_count,
+        }
+
     def as_string(self) -> str:
-        return json.dumps(self.__dict__, indent=4, sort_keys=True)
+        return json.dumps(self.as_dict(), indent=4, sort_keys=True)
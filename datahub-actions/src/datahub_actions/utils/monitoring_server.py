@@ -0,0 +1,69 @@
+# Copyright 2021 Acryl Data, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+from socketserver import ThreadingMixIn
+from typing import Any, Callable, Iterable
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from prometheus_client import make_wsgi_app
+
+# The path of the readiness probe. Any other path serves the Prometheus metrics.
+READINESS_PATH = "/ready"
+
+
+class _ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class _SilentHandler(WSGIRequestHandler):
+    # Probes and scrapes are too frequent to be logged.
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+def make_monitoring_app(readiness_check: Callable[[], bool]) -> Callable:
+    """
+    Builds a WSGI app serving Prometheus metrics, and a readiness probe which responds with a 503 status
+    while readiness_check returns False.
+    """
+    metrics_app = make_wsgi_app()
+
+    def app(environ: dict, start_response: Callable) -> Iterable[bytes]:
+        if environ.get("PATH_INFO") == READINESS_PATH:
+            ready = readiness_check()
+            start_response(
+                "200 OK" if ready else "503 Service Unavailable",
+                [("Content-Type", "text/plain")],
+            )
+            return [b"ready" if ready else b"not ready"]
+        return metrics_app(environ, start_response)
+
+    return app
+
+
+def start_monitoring_server(port: int, readiness_check: Callable[[], bool]) -> None:
+    """
+    Serves Prometheus metrics on :<port>/metrics, and the readiness probe on :<port>/ready, from a daemon thread.
+    """
+    httpd = make_server(
+        "",
+        port,
+        make_monitoring_app(readiness_check),
+        _ThreadingWSGIServer,
+        handler_class=_SilentHandler,
+    )
+    threading.Thread(
+        target=httpd.serve_forever, name="monitoring-server", daemon=True
+    ).start()
@@ -0,0 +1,51 @@
+# Copyright 2021 Acryl Data, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+from typing import List
+
+
+class ShardedCounter:
+    """
+    A counter which can be incremented concurrently from many threads without locking.
+
+    Each thread increments its own shard, which only that thread ever writes to. Reading the value sums the
+    shards of all threads, so it may lag behind increments still in progress on other threads, but never
+    loses them.
+    """
+
+    def __init__(self) -> None:
+        self._local = threading.local()
+        self._shards: List[List[int]] = []
+        self._lock = threading.Lock()
+
+    def increment(self, count: int = 1) -> None:
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._new_shard()
+        shard[0] += count
+
+    def _new_shard(self) -> List[int]:
+        shard = [0]
+        with self._lock:
+            self._shards.append(shard)
+        self._local.shard = shard
+        return shard
+
+    @property
+    def value(self) -> int:
+        with self._lock:
+            shards = list(self._shards)
+        return sum(shard[0] for shard in shards)
@@ -0,0 +1,89 @@
+# Copyright 2021 Acryl Data, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Compares decoding MetadataChangeLog messages with confluent's AvroDeserializer against the CachingAvroDecoder
+used by the Kafka event source, including building the typed event.
+
+Usage: python -m tests.performance.bench_avro_decoder [--messages N]
+"""
+
+import argparse
+import time
+from typing import Any, Callable
+from unittest.mock import MagicMock
+
+from confluent_kafka.schema_registry import Schema
+from confluent_kafka.schema_registry.avro import AvroDeserializer
+from confluent_kafka.serialization import MessageField, SerializationContext
+
+from datahub_actions.plugin.source.kafka.avro_decoder import CachingAvroDecoder
+from datahub_actions.plugin.source.kafka.kafka_event_source import (
+    build_metadata_change_log_event,
+)
+from tests.unit.plugin.source.kafka.test_avro_decoder import (
+    MCL_VALUE,
+    _encode,
+    _load_schema_str,
+)
+from tests.unit.test_helpers import TestMessage
+
+
+def _run(
+    name: str, decode: Callable[[bytes, Any], Any], messages: int, build_event: bool
+) -> float:
+    encoded = _encode(1, MCL_VALUE)
+    ctx = SerializationContext("MetadataChangeLog_Versioned_v1", MessageField.VALUE)
+    # Warm up schema caches.
+    build_metadata_change_log_event(TestMessage(decode(encoded, ctx)))
+    started_at = time.perf_counter()
+    for _ in range(messages):
+        value = decode(encoded, ctx)
+        if build_event:
+            build_metadata_change_log_event(TestMessage(value))
+    elapsed = time.perf_counter() - started_at
+    print(
+        f"{name}: {messages / elapsed:,.0f} msgs/s ({elapsed / messages * 1e6:.1f} us/msg)"
+    )
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=20000)
+    args = parser.parse_args()
+
+    schema_registry_client = MagicMock()
+    schema_registry_client.get_schema.return_value = Schema(_load_schema_str(), "AVRO")
+    schema_registry_client.get_latest_version.side_effect = Exception("No subject")
+    avro_deserializer = AvroDeserializer(
+        schema_registry_client=schema_registry_client, return_record_name=True
+    )
+    caching_decoder = CachingAvroDecoder(
+        schema_registry_client, fallback=avro_deserializer
+    )
+
+    for build_event in (False, True):
+        suffix = " + build event" if build_event else ""
+        baseline = _run(
+            f"AvroDeserializer{suffix}", avro_deserializer, args.messages, build_event
+        )
+        cached = _run(
+            f"CachingAvroDecoder{suffix}", caching_decoder, args.messages, build_event
+        )
+        print(f"Speedup{suffix}: {baseline / cached:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
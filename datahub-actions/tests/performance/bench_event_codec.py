@@ -0,0 +1,116 @@
+# Copyright 2021 Acryl Data, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Measures the encode and decode throughput of the event codecs, per event type, against the standard library
+serialization EventEnvelope used before codecs were introduced.
+
+Usage: python -m tests.performance.bench_event_codec [--events N]
+"""
+
+import argparse
+import json
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from datahub_actions.event.event_codec import EventCodec, event_codec_registry
+from datahub_actions.event.event_envelope import EventEnvelope
+from datahub_actions.event.event_registry import (
+    ENTITY_CHANGE_EVENT_V1_TYPE,
+    METADATA_CHANGE_LOG_EVENT_V1_TYPE,
+    event_registry,
+)
+from tests.unit.test_helpers import (
+    entity_change_event,
+    metadata_change_log_event,
+)
+
+
+def _stdlib_encode(envelope: EventEnvelope) -> bytes:
+    # Serializes the event anew each time, as the envelope did before caching it.
+    event_json = json.dumps(envelope.event.as_json_obj())
+    meta_json = json.dumps(envelope.meta)
+    return f'{{ "event_type": "{envelope.event_type}", "event": {event_json}, "meta": {meta_json} }}'.encode(
+        "utf-8"
+    )
+
+
+def _stdlib_decode(data: bytes) -> EventEnvelope:
+    # Parses the event twice, as the envelope did before decoding parsed objects.
+    json_obj = json.loads(data)
+    event_class = event_registry.get(json_obj["event_type"])
+    event = event_class.from_json(json.dumps(json_obj["event"]))
+    return EventEnvelope(json_obj["event_type"], event, json_obj.get("meta", {}))
+
+
+def _run(name: str, func: Callable[[Any], Any], items: List[Any]) -> float:
+    started_at = time.perf_counter()
+    for item in items:
+        func(item)
+    elapsed = time.perf_counter() - started_at
+    print(f"  {name}: {elapsed / len(items) * 1e6:,.1f} us/event")
+    return elapsed
+
+
+def _copy(envelope: EventEnvelope) -> EventEnvelope:
+    # A fresh envelope, so that cached serialized forms are not reused across iterations.
+    return EventEnvelope(envelope.event_type, envelope.event, dict(envelope.meta))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=20000)
+    args = parser.parse_args()
+
+    codecs: Dict[str, Optional[EventCodec]] = {"stdlib": None}
+    for name in ["json", "msgpack"]:
+        try:
+            codecs[name] = event_codec_registry.get(name)()
+        except Exception as e:
+            print(f"Skipping the {name} codec: {e}")
+
+    envelopes = [
+        EventEnvelope(
+            METADATA_CHANGE_LOG_EVENT_V1_TYPE,
+            metadata_change_log_event,
+            {"kafka": {"topic": "topic", "partition": 0, "offset": 1}},
+        ),
+        EventEnvelope(ENTITY_CHANGE_EVENT_V1_TYPE, entity_change_event, {}),
+    ]
+    for envelope in envelopes:
+        event_type = envelope.event_type
+        print(f"{event_type}:")
+        baselines: Dict[str, float] = {}
+        for name, codec in codecs.items():
+            copies = [_copy(envelope) for _ in range(args.events)]
+            encode: Callable[[EventEnvelope], bytes] = _stdlib_encode
+            decode: Callable[[bytes], EventEnvelope] = _stdlib_decode
+            if codec is not None:
+                encode, decode = codec.encode, codec.decode
+            encoded = encode(envelope)
+            encoded_items = [encoded] * args.events
+            encode_elapsed = _run(f"{name} encode", encode, copies)
+            decode_elapsed = _run(f"{name} decode", decode, encoded_items)
+            print(f"  {name} size: {len(encoded)} bytes")
+            if codec is None:
+                baselines = {"encode": encode_elapsed, "decode": decode_elapsed}
+            else:
+                print(
+                    f"  {name} speedup: {baselines['encode'] / encode_elapsed:.1f}x encode, "
+                    f"{baselines['decode'] / decode_elapsed:.1f}x decode"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# Copyright 2021 Acryl Data, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Measures the per-message overhead of recording Kafka message metrics, comparing label lookups on every message
+against the KafkaMessageObserver used by the Kafka event source, which caches label children.
+
+Usage: python -m tests.performance.bench_message_observer [--messages N]
+"""
+
+import argparse
+import logging
+import time
+from typing import Any, Callable, List
+
+from datahub_actions.plugin.source.kafka.kafka_event_source import (
+    MESSAGE_COUNTER_METRIC,
+    OFFSET_METRIC,
+    KafkaMessageObserver,
+)
+from tests.unit.test_helpers import TestMessage
+
+logger = logging.getLogger(__name__)
+
+
+def _uncached_observer(pipeline_name: str) -> Callable[[Any], None]:
+    # Resolves label children on every message, as the observer did before caching them.
+    def _observe(message: Any) -> None:
+        topic = message.topic()
+        partition = message.partition()
+        offset = message.offset()
+        logger.debug(f"Kafka msg received: {topic}, {partition}, {offset}")
+        OFFSET_METRIC.labels(
+            topic=topic, partition=partition, pipeline_name=pipeline_name
+        ).set(offset)
+        MESSAGE_COUNTER_METRIC.labels(
+            error=message.error() is not None, pipeline_name=pipeline_name
+        ).inc()
+
+    return _observe
+
+
+def _run(
+    name: str, observe: Callable[[Any], None], items: List[Any], messages: int
+) -> float:
+    started_at = time.perf_counter()
+    for item in items:
+        observe(item)
+    elapsed = time.perf_counter() - started_at
+    print(f"{name}: {elapsed / messages * 1e9:,.0f} ns/msg")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=200000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    messages = [
+        TestMessage(
+            {
+                "topic": "MetadataChangeLog_Versioned_v1",
+                "partition": offset % 8,
+                "offset": offset,
+            }
+        )
+        for offset in range(args.messages)
+    ]
+    batches = [
+        messages[i : i + args.batch_size]
+        for i in range(0, len(messages), args.batch_size)
+    ]
+    observer = KafkaMessageObserver("bench_cached")
+
+    baseline = _run(
+        "Label lookup per message",
+        _uncached_observer("bench_uncached"),
+        messages,
+        args.messages,
+    )
+    cached = _run(
+        "KafkaMessageObserver.observe", observer.observe, messages, args.messages
+    )
+    print(f"Speedup: {baseline / cached:.1f}x")
+    batched = _run(
+        f"KafkaMessageObserver.observe_batch ({args.batch_size} msgs per batch)",
+        observer.observe_batch,
+        batches,
+        args.messages,
+    )
+    print(f"Speedup: {baseline / batched:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
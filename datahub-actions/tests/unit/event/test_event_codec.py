@@ -0,0 +1,140 @@
+# Copyright 2021 Acryl Data, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+import json
+import math
+from typing import Any
+
+import pytest
+from datahub.configuration.common import ConfigurationError
+
+from datahub_actions.event import event_codec
+from datahub_actions.event.event_codec import (
+    EventCodec,
+    JsonEventCodec,
+    MsgpackEventCodec,
+    event_codec_registry,
+)
+from datahub_actions.event.event_envelope import EventEnvelope
+from datahub_actions.event.event_registry import (
+    ENTITY_CHANGE_EVENT_V1_TYPE,
+    METADATA_CHANGE_LOG_EVENT_V1_TYPE,
+    EntityChangeEvent,
+)
+from datahub_actions.event.json_util import json_dumps, json_loads
+from tests.unit.test_helpers import metadata_change_log_event
+
+
+def _build_envelopes():
+    entity_change_event = EntityChangeEvent.from_json(
+        json.dumps(
+            {
+                "entityType": "dataset",
+                "entityUrn": "urn:li:dataset:abc",
+                "category": "TAG",
+                "operation": "ADD",
+                "auditStamp": {"actor": "urn:li:corpuser:jdoe", "time": 0},
+                "version": 0,
+                "parameters": {"tagUrn": "urn:li:tag:pii"},
+            }
+        )
+    )
+    return [
+        EventEnvelope(
+            METADATA_CHANGE_LOG_EVENT_V1_TYPE,
+            metadata_change_log_event,
+            {"kafka": {"topic": "topic", "partition": 0, "offset": 1}},
+        ),
+        EventEnvelope(ENTITY_CHANGE_EVENT_V1_TYPE, entity_change_event, {}),
+    ]
+
+
+def test_json_codec_round_trips_envelopes():
+    codec = event_codec_registry.get("json")()
+    for envelope in _build_envelopes():
+        data = codec.encode(envelope)
+
+        assert codec.decode(data) == envelope
+        assert EventEnvelope.from_json(data.decode("utf-8")) == envelope
+        assert codec.loads(codec.dumps(envelope.as_dict())) == envelope.as_dict()
+
+
+def test_entity_change_event_parameters_survive_round_trip():
+    envelope = _build_envelopes()[1]
+    json_obj = envelope.as_dict()
+
+    decoded = EventEnvelope.from_json_obj(json_obj)
+
+    assert decoded.event.as_json_obj()["parameters"] == {"tagUrn": "urn:li:tag:pii"}
+    # The parsed envelope is not modified while decoding it.
+    assert json_obj["event"]["parameters"] == {"tagUrn": "urn:li:tag:pii"}
+
+
+def test_msgpack_codec_round_trips_envelopes():
+    pytest.importorskip("msgpack")
+    codec = MsgpackEventCodec()
+    for envelope in _build_envelopes():
+        data = codec.encode(envelope)
+
+        assert codec.decode(data) == envelope
+        assert len(data) < len(JsonEventCodec().encode(envelope))
+
+
+class LengthPrefixedJsonCodec(EventCodec):
+    # Relies on the default framing of records, as binary codecs do.
+    file_suffix = ".bin"
+
+    def dumps(self, obj: Any) -> bytes:
+        return json_dumps(obj).encode("utf-8")
+
+    def loads(self, data: bytes) -> Any:
+        return json_loads(data)
+
+
+def test_records_round_trip_through_a_log():
+    envelopes = _build_envelopes()
+    for codec in [JsonEventCodec(), LengthPrefixedJsonCodec()]:
+        log = b"".join(codec.encode_record(envelope) for envelope in envelopes)
+
+        records = list(codec.read_records(io.BytesIO(log)))
+
+        assert [codec.decode(record) for record in records] == envelopes
+
+    # JSON records are lines of text.
+    assert JsonEventCodec().encode_record(envelopes[0]).count(b"\n") == 1
+
+
+def test_partially_written_record_is_not_read():
+    codec = LengthPrefixedJsonCodec()
+    envelopes = _build_envelopes()
+    log = b"".join(codec.encode_record(envelope) for envelope in envelopes)
+
+    records = list(codec.read_records(io.BytesIO(log[:-1])))
+
+    assert [codec.decode(record) for record in records] == envelopes[:1]
+
+
+def test_msgpack_codec_requires_msgpack(monkeypatch):
+    monkeypatch.setattr(event_codec, "msgpack", None)
+
+    with pytest.raises(ConfigurationError):
+        MsgpackEventCodec()
+
+
+def test_json_util_falls_back_to_standard_library():
+    # Values orjson does not support are still serialized as the standard library does.
+    for obj in [{"big": 2**70}, {1: "non string key"}, {"nested": [1.5, None, "a"]}]:
+        assert json_loads(json_dumps(obj)) == json.loads(json.dumps(obj))
+    assert math.isnan(json_loads(b'{"value": NaN}')["value"])
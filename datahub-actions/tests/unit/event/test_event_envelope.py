@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import dataclasses
 import json
 import pprint
 
@@ -52,10 +53,69 @@ def test_event_envelope_from_json():
     event_envelope_json_str = event_envelope.as_json()
     event_envelope_from_json = EventEnvelope.from_json(event_envelope_json_str)
 
+    # The cached serialized form of the event is not part of the envelope's value.
     diff = deepdiff.DeepDiff(
-        event_envelope, event_envelope_from_json, ignore_order=True
+        event_envelope,
+        event_envelope_from_json,
+        ignore_order=True,
+        exclude_paths={"root._event_json", "root._event_json_source"},
     )
 
     assert (
         not diff
     ), f"EventEnvelopes differ\n{pprint.pformat(diff)} \n output was: {event_envelope_from_json.as_json()}"
+
+
+def test_event_envelope_caches_serialized_event():
+    event = MetadataChangeLogEvent(
+        entityType="dataset",
+        changeType=ChangeTypeClass.UPSERT,
+        entityUrn="urn:li:dataset:(urn:li:dataPlatform:foo,bar,PROD)",
+    )
+    event_envelope = EventEnvelope(
+        event_type=METADATA_CHANGE_LOG_EVENT_V1_TYPE,
+        event=event,
+        meta={"kafka": {"offset": 1}},
+    )
+
+    first_json = event_envelope.as_json()
+    event_envelope.meta["kafka"]["offset"] = 2
+    assert event_envelope.as_dict() == json.loads(event_envelope.as_json())
+    assert event_envelope.as_dict()["meta"] == {"kafka": {"offset": 2}}
+    assert json.loads(first_json)["event"] == event_envelope.as_dict()["event"]
+
+    # Modifications of the event in place are only seen once the cache is invalidated.
+    event.entityType = "chart"
+    assert event_envelope.as_dict()["event"]["entityType"] == "dataset"
+    event_envelope.invalidate()
+    assert event_envelope.as_dict()["event"]["entityType"] == "chart"
+
+    event_envelope.event = MetadataChangeLogEvent(
+        entityType="dashboard", changeType=ChangeTypeClass.DELETE
+    )
+    assert json.loads(event_envelope.as_json())["event"]["entityType"] == "dashboard"
+    assert event_envelope == EventEnvelope.from_json(event_envelope.as_json())
+
+
+def test_event_envelope_is_a_dataclass():
+    event = MetadataChangeLogEvent(
+        entityType="dataset",
+        changeType=ChangeTypeClass.UPSERT,
+        entityUrn="urn:li:dataset:(urn:li:dataPlatform:foo,bar,PROD)",
+    )
+    event_envelope = EventEnvelope(
+        event_type=METADATA_CHANGE_LOG_EVENT_V1_TYPE, event=event, meta={}
+    )
+    event_envelope.as_json()
+
+    replaced = dataclasses.replace(event_envelope, meta={"kafka": {"offset": 1}})
+    assert replaced.event is event
+    assert replaced.as_dict()["meta"] == {"kafka": {"offset": 1}}
+    assert dataclasses.asdict(event_envelope)["event_type"] == (
+        METADATA_CHANGE_LOG_EVENT_V1_TYPE
+    )
+
+    # The parsed representation is a copy, which does not affect the envelope when modified.
+    event_dict = event_envelope.as_dict()
+    event_dict["event"]["entityType"] = "chart"
+    assert event_envelope.as_dict()["event"]["entityType"] == "dataset"
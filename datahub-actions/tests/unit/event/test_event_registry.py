@@ -25,6 +25,7 @@ from datahub.metadata.schema_classes import (
 
 from datahub_actions.event.event_registry import (
     EntityChangeEvent,
+    LazyMetadataChangeLogEvent,
     MetadataChangeLogEvent,
 )
 
@@ -82,3 +83,52 @@ def test_metadata_change_log_event_from_json():
     assert (
         not diff
     ), f"MetadataChangeLogEvents differ\n{pprint.pformat(diff)} \n output was: {event_from_json.as_json()}"
+
+
+def test_lazy_metadata_change_log_event():
+    event = MetadataChangeLogEvent(
+        entityType="dataset",
+        changeType=ChangeTypeClass.UPSERT,
+        entityUrn="urn:li:dataset:(urn:li:dataPlatform:foo,bar,PROD)",
+        aspectName="status",
+        aspect=GenericAspectClass(
+            value=json.dumps(StatusClass(removed=False).to_obj()).encode(),
+            contentType="application/json",
+        ),
+        created=AuditStampClass(
+            time=0,
+            actor="urn:li:corpuser:unknown",
+        ),
+    )
+    lazy_event = LazyMetadataChangeLogEvent(event.to_obj(tuples=True))
+
+    # Header fields are read without building the typed event.
+    assert lazy_event.entityType == "dataset"
+    assert lazy_event.entityUrn == event.entityUrn
+    assert lazy_event.aspectName == "status"
+    assert lazy_event.changeType == ChangeTypeClass.UPSERT
+    assert not lazy_event.is_materialized
+
+    # Any other field builds it.
+    assert lazy_event.aspect is not None
+    assert lazy_event.aspect.contentType == "application/json"
+    assert lazy_event.is_materialized
+    assert isinstance(lazy_event, MetadataChangeLogEvent)
+    assert lazy_event == event
+    assert json.loads(lazy_event.as_json()) == json.loads(event.as_json())
+
+
+def test_lazy_metadata_change_log_event_set_header_field():
+    lazy_event = LazyMetadataChangeLogEvent(
+        {
+            "entityType": "dataset",
+            "entityUrn": "urn:li:dataset:(urn:li:dataPlatform:foo,bar,PROD)",
+            "changeType": "UPSERT",
+        }
+    )
+
+    lazy_event.entityUrn = "urn:li:dataset:(urn:li:dataPlatform:foo,baz,PROD)"
+
+    assert lazy_event.is_materialized
+    assert lazy_event.entityUrn == "urn:li:dataset:(urn:li:dataPlatform:foo,baz,PROD)"
+    assert lazy_event.entityType == "dataset"
@@ -0,0 +1,122 @@
+# Copyright 2021 Acryl Data, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from datahub_actions.pipeline.concurrency_limiter import AdaptiveConcurrencyLimiter
+
+
+def _saturate(limiter: AdaptiveConcurrencyLimiter) -> None:
+    while limiter.try_acquire():
+        pass
+
+
+def test_limit_grows_while_fast_and_successful():
+    limiter = AdaptiveConcurrencyLimiter("test-grow", min_limit=1, max_limit=4)
+    assert limiter.limit == 1
+
+    for _ in range(50):
+        _saturate(limiter)
+        limiter.record(0.01, failed=False)
+
+    # The limit grows up to, but never beyond, the max.
+    assert limiter.limit == 4
+
+
+def test_limit_shrinks_on_failure():
+    limiter = AdaptiveConcurrencyLimiter("test-failure", min_limit=2, max_limit=10)
+    for _ in range(200):
+        _saturate(limiter)
+        limiter.record(0.01, failed=False)
+    assert limiter.limit == 10
+
+    limiter.record(0.01, failed=True)
+    assert limiter.limit == 9
+
+    # The limit never drops below the min.
+    for _ in range(200):
+        limiter.record(0.01, failed=True)
+    assert limiter.limit == 2
+
+
+def test_limit_shrinks_at_most_once_per_window():
+    limiter = AdaptiveConcurrencyLimiter("test-window", min_limit=1, max_limit=10)
+    for _ in range(200):
+        _saturate(limiter)
+        limiter.record(0.01, failed=False)
+    assert limiter.limit == 10
+
+    # Every event in flight fails at once, which only counts as a single overload.
+    for _ in range(9):
+        limiter.record(0.01, failed=True)
+    assert limiter.limit == 9
+
+    # Once a limit's worth of samples has been recorded, the limit is cut again.
+    limiter.record(0.01, failed=True)
+    assert limiter.limit == 8
+
+
+def test_limit_shrinks_when_latency_rises():
+    limiter = AdaptiveConcurrencyLimiter("test-latency", min_limit=1, max_limit=10)
+    for _ in range(200):
+        _saturate(limiter)
+        limiter.record(0.01, failed=False)
+    assert limiter.limit == 10
+
+    # A sustained rise in latency, e.g. due to a saturated downstream system.
+    for _ in range(10):
+        limiter.record(1.0, failed=False)
+    assert limiter.limit < 10
+
+
+def test_overloaded_latency_does_not_move_baseline():
+    limiter = AdaptiveConcurrencyLimiter("test-baseline", min_limit=1, max_limit=10)
+    for _ in range(200):
+        _saturate(limiter)
+        limiter.record(0.01, failed=False)
+    baseline_latency = limiter._baseline_latency
+
+    # A sustained overload is never mistaken for the new normal while the limit is being cut.
+    for _ in range(90):
+        limiter.record(1.0, failed=False)
+    assert limiter._baseline_latency == baseline_latency
+    assert limiter.limit == 1
+
+
+def test_limit_grows_again_after_latency_rises_for_good():
+    limiter = AdaptiveConcurrencyLimiter("test-latency-step", min_limit=1, max_limit=10)
+    for _ in range(200):
+        _saturate(limiter)
+        limiter.record(0.01, failed=False)
+    assert limiter.limit == 10
+
+    # The downstream system becomes slower for good, so latency stays high even at the min limit.
+    for _ in range(200):
+        _saturate(limiter)
+        limiter.record(0.1, failed=False)
+    assert limiter._baseline_latency is not None and limiter._baseline_latency > 0.05
+
+    # The higher latency is the new baseline, so the limit grows again.
+    for _ in range(200):
+        _saturate(limiter)
+        limiter.record(0.1, failed=False)
+    assert limiter.limit == 10
+
+
+def test_acquire_blocks_at_limit():
+    limiter = AdaptiveConcurrencyLimiter("test-acquire", min_limit=1, max_limit=1)
+
+    assert limiter.acquire(timeout=0.01)
+    assert not limiter.acquire(timeout=0.01)
+    limiter.release()
+    assert limiter.acquire(timeout=0.01)
@@ -0,0 +1,65 @@
+# Copyright 2021 Acryl Data, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from datahub_actions.event.event_envelope import EventEnvelope
+from datahub_actions.pipeline.offset_tracker import OffsetTracker
+from tests.unit.test_helpers import metadata_change_log_event
+
+
+def _build_event(offset: int) -> EventEnvelope:
+    return EventEnvelope(
+        "MetadataChangeLogEvent_v1",
+        metadata_change_log_event,
+        {"kafka": {"topic": "mcl", "partition": 0, "offset": offset}},
+    )
+
+
+def test_complete_in_order():
+    tracker = OffsetTracker()
+    first = tracker.track(_build_event(0), ("mcl", 0))
+    second = tracker.track(_build_event(1), ("mcl", 0))
+
+    assert tracker.complete(first) == [first.envelope]
+    assert tracker.complete(second) == [second.envelope]
+    assert tracker.in_flight_count() == 0
+
+
+def test_complete_out_of_order_waits_for_earlier_events():
+    tracker = OffsetTracker()
+    first = tracker.track(_build_event(0), ("mcl", 0))
+    second = tracker.track(_build_event(1), ("mcl", 0))
+    third = tracker.track(_build_event(2), ("mcl", 0))
+
+    # Later events can't be acked while the first is still in flight.
+    assert tracker.complete(third) == []
+    assert tracker.complete(second) == []
+    assert tracker.in_flight_count() == 3
+
+    # Once the first completes, the whole contiguous run is released in order.
+    assert tracker.complete(first) == [
+        first.envelope,
+        second.envelope,
+        third.envelope,
+    ]
+    assert tracker.in_flight_count() == 0
+
+
+def test_streams_are_tracked_independently():
+    tracker = OffsetTracker()
+    blocked = tracker.track(_build_event(0), ("mcl", 0))
+    other = tracker.track(_build_event(0), ("mcl", 1))
+
+    assert tracker.complete(other) == [other.envelope]
+    assert tracker.complete(blocked) == [blocked.envelope]
@@ -12,12 +12,20 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
 import json
 import os
 
 import pytest
+from datahub.metadata.schema_classes import ChangeTypeClass
+from prometheus_client import REGISTRY
 from pydantic import ValidationError
 
+from datahub_actions.event.event_envelope import EventEnvelope
+from datahub_actions.event.event_registry import (
+    METADATA_CHANGE_LOG_EVENT_V1_TYPE,
+    MetadataChangeLogEvent,
+)
 from datahub_actions.pipeline.pipeline import Pipeline, PipelineException
 from datahub_actions.pipeline.pipeline_config import FailureMode
 from datahub_actions.plugin.transform.filter.filter_transformer import FilterTransformer
@@ -99,6 +107,316 @@ def test_run():
     assert valid_pipeline.source.ack_count == 3  # type: ignore
 
 
+def test_stats_are_per_pipeline():
+    first_pipeline = Pipeline.create(_build_basic_pipeline_config())
+    second_pipeline = Pipeline.create(_build_basic_pipeline_config())
+
+    first_pipeline.run()
+
+    assert first_pipeline.stats().success_count == 3
+    assert first_pipeline.stats().action_stats.success_count == 3
+    assert second_pipeline.stats().success_count == 0
+    assert second_pipeline.stats().action_stats.success_count == 0
+    assert (
+        second_pipeline.stats()
+        .get_transformer_stats(second_pipeline.transforms[0])
+        .processed_count
+        == 0
+    )
+
+
+def test_run_records_latency_metrics():
+    config = _build_basic_pipeline_config()
+    config["name"] = "latency-metrics-pipeline"
+    pipeline = Pipeline.create(config)
+
+    pipeline.run()
+
+    labels = {"pipeline_name": "latency-metrics-pipeline"}
+    assert (
+        REGISTRY.get_sample_value(
+            "pipeline_transformer_latency_seconds_count",
+            {**labels, "transformer": "TestTransformer"},
+        )
+        == 3
+    )
+    assert (
+        REGISTRY.get_sample_value(
+            "pipeline_action_latency_seconds_count",
+            {**labels, "action": "TestAction"},
+        )
+        == 3
+    )
+    assert (
+        REGISTRY.get_sample_value(
+            "pipeline_ack_latency_seconds_count",
+            {**labels, "source": "TestEventSource"},
+        )
+        == 3
+    )
+    # Test events carry no produce timestamp, so their end-to-end latency is unknown.
+    assert (
+        REGISTRY.get_sample_value("pipeline_event_latency_seconds_count", labels) == 0
+    )
+
+
+def test_transformers_drop_cached_serialized_event():
+    pipeline = Pipeline.create(_build_basic_pipeline_config())
+    event = MetadataChangeLogEvent(
+        entityType="dataset",
+        changeType=ChangeTypeClass.UPSERT,
+        entityUrn="urn:li:dataset:(urn:li:dataPlatform:foo,bar,PROD)",
+    )
+    enveloped_event = EventEnvelope(METADATA_CHANGE_LOG_EVENT_V1_TYPE, event, {})
+    enveloped_event.as_json()
+
+    # A transformer which modifies the event in place.
+    def transform(env: EventEnvelope) -> EventEnvelope:
+        env.event.entityType = "chart"  # type: ignore
+        return env
+
+    transformer = pipeline._transformer_handles[0][0]
+    transformer.transform = transform  # type: ignore
+    transformed_event = pipeline._execute_transformers(enveloped_event)
+
+    assert transformed_event is not None
+    assert json.loads(transformed_event.as_json())["event"]["entityType"] == "chart"
+
+
+def test_run_with_prefetch():
+    prefetch_config = _build_basic_pipeline_config()
+    prefetch_config["options"]["prefetch_size"] = 2
+    prefetch_pipeline = Pipeline.create(prefetch_config)
+
+    # Run the pipeline
+    prefetch_pipeline.run()
+
+    # Verify that the test action processed all events, and that all events were acked.
+    assert prefetch_pipeline.action.total_event_count == 3  # type: ignore
+    assert prefetch_pipeline.action.smiley_count == 3  # type: ignore
+    assert prefetch_pipeline.source.ack_count == 3  # type: ignore
+
+
+def test_run_batched():
+    batched_config = _build_basic_pipeline_config()
+    batched_config["options"]["batch_size"] = 2
+    batched_pipeline = Pipeline.create(batched_config)
+
+    # Run the pipeline
+    batched_pipeline.run()
+
+    # Verify that the events were handed to the action in 2 batches (2 + 1 remaining).
+    assert batched_pipeline.action.batch_count == 2  # type: ignore
+    assert batched_pipeline.action.total_event_count == 3  # type: ignore
+    assert batched_pipeline.action.smiley_count == 3  # type: ignore
+
+    # Verify that the event source received ack calls on all events
+    assert batched_pipeline.source.ack_count == 3  # type: ignore
+
+
+def test_failed_batch_falls_back_to_individual_events():
+    throwing_action_config = _build_throwing_action_pipeline_config(
+        failure_mode="CONTINUE"
+    )
+    throwing_action_config["options"]["batch_size"] = 3
+    throwing_action_pipeline = Pipeline.create(throwing_action_config)
+    throwing_action_pipeline.run()
+
+    # Ensure that every event was handled as an individual failure, and then acked.
+    assert throwing_action_pipeline.source.ack_count == 3  # type: ignore
+
+
+def test_run_concurrently():
+    concurrent_config = _build_basic_pipeline_config()
+    concurrent_config["options"]["max_concurrency"] = 4
+    concurrent_pipeline = Pipeline.create(concurrent_config)
+
+    # Run the pipeline, which blocks until all in-flight events are finished.
+    concurrent_pipeline.run()
+
+    # Verify that the test action processed the correct events (via counters)
+    assert concurrent_pipeline.action.total_event_count == 3  # type: ignore
+    assert concurrent_pipeline.action.smiley_count == 3  # type: ignore
+
+    # Verify that the event source received ack calls on all events
+    assert concurrent_pipeline.source.ack_count == 3  # type: ignore
+
+
+def test_run_with_adaptive_concurrency():
+    concurrent_config = _build_basic_pipeline_config()
+    concurrent_config["options"]["max_concurrency"] = 4
+    concurrent_config["options"]["adaptive_concurrency"] = True
+    concurrent_pipeline = Pipeline.create(concurrent_config)
+    concurrent_pipeline.run()
+
+    # Verify that every event was processed and acked.
+    assert concurrent_pipeline.action.total_event_count == 3  # type: ignore
+    assert concurrent_pipeline.source.ack_count == 3  # type: ignore
+
+
+def test_run_concurrently_throw_mode():
+    throwing_action_config = _build_throwing_action_pipeline_config(
+        failure_mode="THROW"
+    )
+    throwing_action_config["options"]["max_concurrency"] = 4
+    throwing_action_pipeline = Pipeline.create(throwing_action_config)
+    with pytest.raises(
+        PipelineException, match="Failed to process event after maximum retries"
+    ):
+        throwing_action_pipeline.run()
+    # Ensure that the message was NOT acked.
+    assert throwing_action_pipeline.source.ack_count == 0  # type: ignore
+
+
+def test_start_on_event_loop():
+    valid_config = _build_basic_pipeline_config()
+    valid_config["options"]["max_concurrency"] = 2
+    valid_pipeline = Pipeline.create(valid_config)
+
+    # Run the pipeline on an event loop, until the source is exhausted.
+    asyncio.run(valid_pipeline.start())
+
+    # Verify that the synchronous test action processed all events, and that all events were acked.
+    assert valid_pipeline.action.total_event_count == 3  # type: ignore
+    assert valid_pipeline.action.smiley_count == 3  # type: ignore
+    assert valid_pipeline.source.ack_count == 3  # type: ignore
+
+
+def test_start_on_event_loop_ignores_batch_size(caplog):
+    batched_config = _build_basic_pipeline_config()
+    batched_config["options"]["batch_size"] = 2
+    batched_pipeline = Pipeline.create(batched_config)
+
+    asyncio.run(batched_pipeline.start())
+
+    # Verify that the operator was warned, and that events were handed to the action one at a time.
+    assert "batch_size is not supported on an event loop" in caplog.text
+    assert batched_pipeline.action.batch_count == 0  # type: ignore
+    assert batched_pipeline.action.total_event_count == 3  # type: ignore
+    assert batched_pipeline.source.ack_count == 3  # type: ignore
+
+
+def test_start_on_event_loop_with_adaptive_concurrency():
+    async_action_config = _build_basic_pipeline_config()
+    async_action_config["action"] = {"type": "test_async_action", "config": {}}
+    async_action_config["options"]["max_concurrency"] = 4
+    async_action_config["options"]["adaptive_concurrency"] = True
+    async_action_pipeline = Pipeline.create(async_action_config)
+
+    asyncio.run(async_action_pipeline.start())
+
+    assert async_action_pipeline.action.total_event_count == 3  # type: ignore
+    assert async_action_pipeline.source.ack_count == 3  # type: ignore
+
+
+def test_start_on_event_loop_with_async_action():
+    async_action_config = _build_basic_pipeline_config()
+    async_action_config["action"] = {"type": "test_async_action"}
+    async_action_pipeline = Pipeline.create(async_action_config)
+
+    # Run the pipeline on an event loop, until the source is exhausted.
+    asyncio.run(async_action_pipeline.start())
+
+    assert async_action_pipeline.action.total_event_count == 3  # type: ignore
+    assert async_action_pipeline.source.ack_count == 3  # type: ignore
+
+    # Async actions can also be run by the synchronous engine.
+    async_action_pipeline.run()
+    assert async_action_pipeline.action.total_event_count == 6  # type: ignore
+
+
+def test_async_event_source():
+    async_source_config = _build_basic_pipeline_config()
+    async_source_config["source"] = {"type": "test_async_source"}
+    async_source_pipeline = Pipeline.create(async_source_config)
+
+    # Run the pipeline on an event loop, until the source is exhausted.
+    asyncio.run(async_source_pipeline.start())
+    assert async_source_pipeline.action.total_event_count == 3  # type: ignore
+    assert async_source_pipeline.source.ack_count == 3  # type: ignore
+
+    # Async sources can also be consumed by the synchronous engine.
+    async_source_pipeline.run()
+    assert async_source_pipeline.action.total_event_count == 6  # type: ignore
+    assert async_source_pipeline.source.ack_count == 6  # type: ignore
+
+
+def test_async_event_source_with_prefetch_and_concurrency():
+    async_source_config = _build_basic_pipeline_config()
+    async_source_config["source"] = {"type": "test_async_source"}
+    async_source_config["options"]["prefetch_size"] = 2
+    async_source_config["options"]["max_concurrency"] = 4
+    async_source_pipeline = Pipeline.create(async_source_config)
+    # Events are awaited on the source's loop while acks arrive from other threads.
+    async_source_pipeline.source.event_delay_s = 0.05  # type: ignore
+
+    async_source_pipeline.run()
+
+    assert async_source_pipeline.stats().failed_ack_count == 0
+    assert async_source_pipeline.action.total_event_count == 3  # type: ignore
+    assert async_source_pipeline.source.ack_count == 3  # type: ignore
+
+
+def test_start_on_event_loop_throw_mode():
+    throwing_action_config = _build_throwing_action_pipeline_config(
+        failure_mode="THROW"
+    )
+    throwing_action_pipeline = Pipeline.create(throwing_action_config)
+    with pytest.raises(
+        PipelineException, match="Failed to process event after maximum retries"
+    ):
+        asyncio.run(throwing_action_pipeline.start())
+    # Ensure that the message was NOT acked.
+    assert throwing_action_pipeline.source.ack_count == 0  # type: ignore
+
+
+def test_retry_queue_does_not_block_later_events():
+    flaky_action_config = _build_basic_pipeline_config()
+    flaky_action_config["action"] = {"type": "flaky_test_action", "config": {}}
+    flaky_action_config["options"]["retry_mode"] = "MEMORY"
+    flaky_action_config["options"]["retry_initial_backoff_ms"] = 100
+    flaky_action_pipeline = Pipeline.create(flaky_action_config)
+    flaky_action_pipeline.run()
+
+    # The first event failed once, and was retried only after the events behind it were processed.
+    assert flaky_action_pipeline.action.processed_event_types == [  # type: ignore
+        "EntityChangeLogEvent_v1",
+        "TestEvent",
+        "MetadataChangeLogEvent_v1",
+    ]
+    assert flaky_action_pipeline.source.ack_count == 3  # type: ignore
+
+
+def test_retry_queue_spooled_to_disk():
+    retry_queue_dir = "/tmp/datahub/test/test_retry_queue_spooled_to_disk/retry_queue"
+    throwing_action_config = _build_throwing_action_pipeline_config(
+        pipeline_name="test_retry_queue_spooled_to_disk", failure_mode="CONTINUE"
+    )
+    throwing_action_config["options"]["retry_mode"] = "DISK"
+    throwing_action_config["options"]["retry_initial_backoff_ms"] = 10
+    throwing_action_pipeline = Pipeline.create(throwing_action_config)
+    throwing_action_pipeline.run()
+
+    # Every event was acked once spooled, and the spool is empty once retries are exhausted.
+    assert throwing_action_pipeline.source.ack_count == 3  # type: ignore
+    assert os.listdir(retry_queue_dir) == []
+
+
+def test_retry_queue_throw_mode():
+    throwing_action_config = _build_throwing_action_pipeline_config(
+        failure_mode="THROW"
+    )
+    throwing_action_config["options"]["retry_mode"] = "MEMORY"
+    throwing_action_config["options"]["max_concurrency"] = 2
+    throwing_action_pipeline = Pipeline.create(throwing_action_config)
+    with pytest.raises(
+        PipelineException, match="Failed to process event after maximum retries"
+    ):
+        throwing_action_pipeline.run()
+    # Ensure that the message was NOT acked.
+    assert throwing_action_pipeline.source.ack_count == 0  # type: ignore
+
+
 def test_stop():
     # Configure a pipeline with a long-running event source
     stoppable_pipeline_config = _build_stoppable_pipeline_config()
@@ -184,9 +502,58 @@ def test_failed_events_file():
         # Simply verify the event can be loaded.
         assert json.loads(line.strip())
         index = index + 1
+    # Ensure that each failed event was logged exactly once, regardless of retries.
+    assert index == 3
     os.remove(failed_events_file_path)
 
 
+def test_failed_events_configured_dead_letter_writer():
+    dead_letter_dir = "/tmp/datahub/test/test_configured_dead_letter_writer"
+    throwing_action_config = _build_throwing_action_pipeline_config(
+        failure_mode="CONTINUE"
+    )
+    throwing_action_config["dead_letter"] = {
+        "type": "file",
+        "config": {"directory": dead_letter_dir, "file_name": "dead_letters.log"},
+    }
+    throwing_action_pipeline = Pipeline.create(throwing_action_config)
+    throwing_action_pipeline.run()
+
+    # Ensure that every failed event was written to the configured file by the end of the run.
+    dead_letters_file_path = os.path.join(dead_letter_dir, "dead_letters.log")
+    with open(dead_letters_file_path, "r") as f:
+        assert len(f.readlines()) == 3
+    os.remove(dead_letters_file_path)
+
+
+def test_stop_closes_dead_letter_writer_after_processing_drains():
+    dead_letter_dir = "/tmp/datahub/test/test_stop_closes_dead_letter_writer"
+    throwing_action_config = _build_throwing_action_pipeline_config(
+        failure_mode="CONTINUE"
+    )
+    throwing_action_config["dead_letter"] = {
+        "type": "file",
+        "config": {"directory": dead_letter_dir, "file_name": "dead_letters.log"},
+    }
+    throwing_action_pipeline = Pipeline.create(throwing_action_config)
+
+    # Stop the pipeline while an event is being processed, which then fails.
+    def act(event_env):
+        throwing_action_pipeline.stop()
+        raise Exception("Failed while stopping")
+
+    throwing_action_pipeline.action.act = act  # type: ignore
+    throwing_action_pipeline.run()
+
+    # Ensure that the event failing during shutdown was still written, and that the writer was closed afterwards.
+    dead_letters_file_path = os.path.join(dead_letter_dir, "dead_letters.log")
+    with open(dead_letters_file_path, "r") as f:
+        assert len(f.readlines()) == throwing_action_pipeline.stats().failed_event_count
+    assert throwing_action_pipeline.stats().failed_event_count >= 1
+    assert throwing_action_pipeline._dead_letter_writer._closed.is_set()  # type: ignore
+    os.remove(dead_letters_file_path)
+
+
 def _build_valid_pipeline_config() -> dict:
     return {
         "name": "sample-pipeline",
@@ -68,6 +68,45 @@ def test_stop_all():
     assert len(pipeline_manager.pipeline_registry.keys()) == 0
 
 
+def test_start_and_stop_pipeline_on_event_loop():
+    # Create test pipelines, hosted on a single event loop.
+    config = _build_valid_pipeline_config()
+    pipeline_1 = Pipeline.create(config)
+    pipeline_2 = Pipeline.create(config)
+
+    pipeline_manager.start_pipeline("test_loop_1", pipeline_1, use_event_loop=True)
+    pipeline_manager.start_pipeline("test_loop_2", pipeline_2, use_event_loop=True)
+
+    # Verify that the pipelines are running
+    assert len(pipeline_manager.pipeline_registry.keys()) == 2
+    assert pipeline_manager.pipeline_registry["test_loop_1"].future is not None
+
+    # Stop all pipelines
+    pipeline_manager.stop_all()
+
+    # Verify that no pipelines are running
+    assert len(pipeline_manager.pipeline_registry.keys()) == 0
+
+
+def test_ready_while_all_pipelines_are_ready():
+    manager = PipelineManager()
+    assert not manager.is_ready()
+
+    config = _build_valid_pipeline_config()
+    pipeline_1 = Pipeline.create(config)
+    pipeline_2 = Pipeline.create(config)
+    manager.start_pipeline("test_ready_1", pipeline_1)
+    manager.start_pipeline("test_ready_2", pipeline_2)
+    assert manager.is_ready()
+
+    # A stopped pipeline is no longer ready.
+    pipeline_2.stop()
+    assert not manager.is_ready()
+
+    manager.stop_all()
+    assert not manager.is_ready()
+
+
 def _build_valid_pipeline_config() -> dict:
     return {
         "name": "stoppable-pipeline",
@@ -0,0 +1,85 @@
+# Copyright 2021 Acryl Data, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from datahub_actions.pipeline.pipeline_stats import PipelineStats, PipelineStatsSnapshot
+from tests.unit.test_helpers import TestTransformer
+
+
+def test_stats_are_not_shared_between_instances():
+    first = PipelineStats()
+    second = PipelineStats()
+    transformer = TestTransformer.create({}, None)  # type: ignore
+
+    first.increment_success_count(2)
+    first.increment_action_success_count()
+    first.increment_transformer_processed_count(transformer)
+
+    assert first.success_count == 2
+    assert first.action_stats.success_count == 1
+    assert first.get_transformer_stats(transformer).processed_count == 1
+    assert second.success_count == 0
+    assert second.action_stats.success_count == 0
+    assert second.get_transformer_stats(transformer).processed_count == 0
+
+
+def test_transformer_stats_handle_is_stable():
+    stats = PipelineStats()
+    transformer = TestTransformer.create({}, None)  # type: ignore
+    handle = stats.get_transformer_stats(transformer)
+
+    handle.increment_filtered_count()
+    stats.increment_transformer_filtered_count(transformer)
+
+    assert stats.get_transformer_stats(transformer) is handle
+    assert handle.filtered_count == 2
+
+
+def test_snapshot_rates():
+    previous = PipelineStatsSnapshot(
+        taken_at=1000,
+        failed_event_count=0,
+        failed_ack_count=0,
+        success_count=10,
+        action_success_count=10,
+        action_exception_count=0,
+    )
+    current = PipelineStatsSnapshot(
+        taken_at=3000,
+        failed_event_count=2,
+        failed_ack_count=0,
+        success_count=50,
+        action_success_count=52,
+        action_exception_count=4,
+    )
+
+    rates = current.rates(previous)
+
+    assert rates["success_rate"] == 20.0
+    assert rates["failed_event_rate"] == 1.0
+    assert rates["failed_ack_rate"] == 0.0
+    assert rates["action_success_rate"] == 21.0
+    assert rates["action_exception_rate"] == 2.0
+
+
+def test_snapshot():
+    stats = PipelineStats()
+    stats.increment_success_count(3)
+    stats.increment_failed_event_count()
+
+    snapshot = stats.snapshot()
+
+    assert snapshot.success_count == 3
+    assert snapshot.failed_event_count == 1
+    assert snapshot.taken_at >= stats.started_at
+    assert stats.rates()["success_rate"] >= 0
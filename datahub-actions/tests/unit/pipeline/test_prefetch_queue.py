@@ -0,0 +1,122 @@
+# Copyright 2021 Acryl Data, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import threading
+import time
+from typing import Callable, Iterable, List
+
+import pytest
+
+from datahub_actions.event.event_envelope import EventEnvelope
+from datahub_actions.pipeline.prefetch_queue import PrefetchQueue
+from tests.unit.test_helpers import metadata_change_log_event
+
+
+def _build_events(count: int, size: int = 0) -> List[EventEnvelope]:
+    return [
+        EventEnvelope(
+            "MetadataChangeLogEvent_v1",
+            metadata_change_log_event,
+            {"kafka": {"topic": "mcl", "partition": 0, "offset": i, "size": size}},
+        )
+        for i in range(count)
+    ]
+
+
+def _get_size(enveloped_event: EventEnvelope) -> int:
+    return enveloped_event.meta["kafka"]["size"]
+
+
+def _wait_for(condition: Callable[[], bool], timeout: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_iterates_all_events_in_order():
+    events = _build_events(10)
+    prefetch_queue = PrefetchQueue(events, 3, 1024, _get_size, "test")
+
+    assert list(prefetch_queue) == events
+    assert prefetch_queue.done
+
+
+def test_applies_backpressure_on_event_count():
+    produced: List[EventEnvelope] = []
+
+    def counting_source() -> Iterable[EventEnvelope]:
+        for event in _build_events(10):
+            produced.append(event)
+            yield event
+
+    prefetch_queue = PrefetchQueue(counting_source(), 3, 1024, _get_size, "test")
+    _wait_for(lambda: len(produced) >= 4)
+
+    # 3 events buffered, plus 1 event waiting on a free slot.
+    assert len(produced) == 4
+    assert prefetch_queue.get() is not None
+    _wait_for(lambda: len(produced) >= 5)
+    assert len(produced) == 5
+    prefetch_queue.close()
+
+
+def test_applies_backpressure_on_bytes():
+    produced: List[EventEnvelope] = []
+
+    def counting_source() -> Iterable[EventEnvelope]:
+        for event in _build_events(10, size=400):
+            produced.append(event)
+            yield event
+
+    prefetch_queue = PrefetchQueue(counting_source(), 100, 1000, _get_size, "test")
+    _wait_for(lambda: len(produced) >= 3)
+
+    # 2 events (800 bytes) buffered, plus 1 event waiting for room.
+    assert len(produced) == 3
+    prefetch_queue.close()
+
+
+def test_admits_oversized_event_into_empty_buffer():
+    events = _build_events(2, size=5000)
+    prefetch_queue = PrefetchQueue(events, 100, 1000, _get_size, "test")
+
+    assert list(prefetch_queue) == events
+
+
+def test_get_times_out():
+    blocked = threading.Event()
+
+    def blocking_source() -> Iterable[EventEnvelope]:
+        blocked.wait()
+        yield from _build_events(1)
+
+    prefetch_queue = PrefetchQueue(blocking_source(), 10, 1024, _get_size, "test")
+    assert prefetch_queue.get(timeout=0.05) is None
+    assert not prefetch_queue.done
+
+    blocked.set()
+    assert prefetch_queue.get(timeout=2.0) is not None
+
+
+def test_raises_source_error_after_buffered_events():
+    def failing_source() -> Iterable[EventEnvelope]:
+        yield from _build_events(2)
+        raise ValueError("Source failed")
+
+    prefetch_queue = PrefetchQueue(failing_source(), 10, 1024, _get_size, "test")
+    assert prefetch_queue.get() is not None
+    assert prefetch_queue.get() is not None
+    with pytest.raises(ValueError, match="Source failed"):
+        prefetch_queue.get()
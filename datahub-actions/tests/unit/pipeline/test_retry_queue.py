@@ -0,0 +1,110 @@
+# Copyright 2021 Acryl Data, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import os
+import time
+from typing import Any
+
+from datahub_actions.event.event_codec import JsonEventCodec
+from datahub_actions.event.event_envelope import EventEnvelope
+from datahub_actions.pipeline.retry_queue import (
+    DiskRetryQueue,
+    MemoryRetryQueue,
+    RetryEntry,
+    RetryPolicy,
+)
+from tests.unit.test_helpers import metadata_change_log_event
+
+
+def _build_event(name: str) -> EventEnvelope:
+    return EventEnvelope(
+        "MetadataChangeLogEvent_v1", metadata_change_log_event, {"name": name}
+    )
+
+
+def test_backoff_grows_exponentially_up_to_max():
+    policy = RetryPolicy(initial_backoff_ms=100, max_backoff_ms=1000)
+
+    assert 0.05 <= policy.get_backoff_seconds(1) <= 0.1
+    assert 0.1 <= policy.get_backoff_seconds(2) <= 0.2
+    assert 0.2 <= policy.get_backoff_seconds(3) <= 0.4
+    assert 0.5 <= policy.get_backoff_seconds(10) <= 1.0
+
+
+def test_poll_ready_returns_due_entries_in_order():
+    retry_queue = MemoryRetryQueue()
+    now = time.time()
+    retry_queue.put(RetryEntry(_build_event("second"), 2, now - 1))
+    retry_queue.put(RetryEntry(_build_event("later"), 2, now + 60))
+    retry_queue.put(RetryEntry(_build_event("first"), 2, now - 2))
+
+    ready = retry_queue.poll_ready()
+
+    assert [entry.envelope.meta["name"] for entry in ready] == ["first", "second"]
+    assert len(retry_queue) == 1
+    assert retry_queue.get_next_ready_at() == now + 60
+
+
+def test_disk_retry_queue_survives_restart(tmp_path):
+    retry_queue_dir = str(tmp_path)
+    retry_queue = DiskRetryQueue(retry_queue_dir)
+    retry_queue.put(RetryEntry(_build_event("value"), 3, time.time() + 60))
+    assert len(os.listdir(retry_queue_dir)) == 1
+
+    # Spooled entries are reloaded, and are immediately ready to be retried.
+    restarted_retry_queue = DiskRetryQueue(retry_queue_dir)
+    ready = restarted_retry_queue.poll_ready()
+    assert len(ready) == 1
+    assert ready[0].attempt == 3
+    assert ready[0].envelope.meta == {"name": "value"}
+    assert ready[0].envelope.event == metadata_change_log_event
+
+    # Once resolved, the entry is removed from disk.
+    restarted_retry_queue.resolve(ready[0])
+    assert os.listdir(retry_queue_dir) == []
+
+
+class ReversedJsonEventCodec(JsonEventCodec):
+    file_suffix = ".reversed"
+
+    def dumps(self, obj: Any) -> bytes:
+        return super().dumps(obj)[::-1]
+
+    def loads(self, data: bytes) -> Any:
+        return super().loads(data[::-1])
+
+
+def test_disk_retry_queue_reads_entries_spooled_with_another_codec(tmp_path):
+    retry_queue_dir = str(tmp_path)
+    DiskRetryQueue(retry_queue_dir).put(
+        RetryEntry(_build_event("json"), 2, time.time() + 60)
+    )
+
+    retry_queue = DiskRetryQueue(retry_queue_dir, ReversedJsonEventCodec())
+    retry_queue.put(RetryEntry(_build_event("reversed"), 3, time.time() + 60))
+    assert sorted(
+        os.path.splitext(name)[1] for name in os.listdir(retry_queue_dir)
+    ) == [
+        ".json",
+        ".reversed",
+    ]
+
+    restarted_retry_queue = DiskRetryQueue(retry_queue_dir, ReversedJsonEventCodec())
+    ready = restarted_retry_queue.poll_ready()
+    assert sorted((entry.envelope.meta["name"], entry.attempt) for entry in ready) == [
+        ("json", 2),
+        ("reversed", 3),
+    ]
+    assert all(entry.envelope.event == metadata_change_log_event for entry in ready)
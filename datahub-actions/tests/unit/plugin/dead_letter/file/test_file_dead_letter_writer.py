@@ -0,0 +1,157 @@
+# Copyright 2021 Acryl Data, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import gzip
+import json
+import os
+
+import pytest
+
+from datahub_actions.event.event_envelope import EventEnvelope
+from datahub_actions.pipeline.pipeline_context import PipelineContext
+from datahub_actions.plugin.dead_letter.file.file_dead_letter_writer import (
+    FileDeadLetterWriter,
+    FileDeadLetterWriterConfig,
+)
+from datahub_actions.plugin.source.failed_events.failed_events_source import (
+    FailedEventsSource,
+    FailedEventsSourceConfig,
+)
+from tests.unit.test_helpers import metadata_change_log_event
+
+EVENT = EventEnvelope("MetadataChangeLogEvent_v1", metadata_change_log_event, {})
+
+
+def _read_lines(file_path: str) -> list:
+    opener = gzip.open if file_path.endswith(".gz") else open
+    with opener(file_path, "rt") as f:  # type: ignore
+        return [json.loads(line) for line in f.readlines()]
+
+
+def test_buffers_until_flushed(tmp_path):
+    writer = FileDeadLetterWriter(
+        FileDeadLetterWriterConfig(directory=str(tmp_path), flush_max_events=3)
+    )
+    file_path = os.path.join(str(tmp_path), "failed_events.log")
+
+    writer.write(EVENT)
+    writer.write(EVENT)
+    assert os.path.getsize(file_path) == 0
+
+    # Filling the buffer writes it out.
+    writer.write(EVENT)
+    assert len(_read_lines(file_path)) == 3
+
+    # Closing writes out whatever remains.
+    writer.write(EVENT)
+    writer.close()
+    assert len(_read_lines(file_path)) == 4
+
+    # Nothing may be written once the writer has been closed.
+    with pytest.raises(Exception, match="writer has been closed"):
+        writer.write(EVENT)
+
+
+def test_rotates_compresses_and_prunes(tmp_path):
+    writer = FileDeadLetterWriter(
+        FileDeadLetterWriterConfig(
+            directory=str(tmp_path),
+            flush_max_events=1,
+            max_file_size_bytes=1,
+            compression="GZIP",
+            max_rotated_files=2,
+        )
+    )
+    for _ in range(3):
+        writer.write(EVENT)
+    writer.close()
+
+    # Each write exceeded the max size, so was rotated out. Only the 2 most recent rotated files are kept.
+    file_names = sorted(os.listdir(str(tmp_path)))
+    assert len(file_names) == 3
+    assert file_names[0] == "failed_events.log"
+    assert os.path.getsize(os.path.join(str(tmp_path), file_names[0])) == 0
+    for rotated_file_name in file_names[1:]:
+        assert rotated_file_name.endswith(".gz")
+        rotated_lines = _read_lines(os.path.join(str(tmp_path), rotated_file_name))
+        assert rotated_lines == [json.loads(EVENT.as_json())]
+
+
+def test_prunes_only_compressed_files_one_flush_at_a_time(tmp_path):
+    # A rotated file which is yet to be compressed, and would otherwise be the first one pruned.
+    uncompressed_file_path = os.path.join(
+        str(tmp_path), "failed_events.log.20000101T000000000000"
+    )
+    with open(uncompressed_file_path, "w") as f:
+        f.write(EVENT.as_json() + "\n")
+    writer = FileDeadLetterWriter(
+        FileDeadLetterWriterConfig(
+            directory=str(tmp_path),
+            flush_max_events=1,
+            max_file_size_bytes=1,
+            compression="GZIP",
+            max_rotated_files=1,
+        )
+    )
+    prune = writer._prune
+    locked_while_pruning = []
+
+    def recording_prune() -> None:
+        locked_while_pruning.append(writer._maintenance_lock.locked())
+        prune()
+
+    writer._prune = recording_prune  # type: ignore
+    for _ in range(3):
+        writer.write(EVENT)
+    writer.close()
+
+    assert locked_while_pruning == [True, True, True]
+    assert os.path.exists(uncompressed_file_path)
+    assert (
+        len([name for name in os.listdir(str(tmp_path)) if name.endswith(".gz")]) == 1
+    )
+
+
+def test_keeps_rotated_files_by_default(tmp_path):
+    writer = FileDeadLetterWriter(
+        FileDeadLetterWriterConfig(
+            directory=str(tmp_path), flush_max_events=1, max_file_size_bytes=1
+        )
+    )
+    for _ in range(12):
+        writer.write(EVENT)
+    writer.close()
+
+    # The active file, and every rotated file.
+    assert len(os.listdir(str(tmp_path))) == 13
+
+
+def test_writes_events_in_configured_format(tmp_path):
+    pytest.importorskip("msgpack")
+    writer = FileDeadLetterWriter(
+        FileDeadLetterWriterConfig(directory=str(tmp_path), format="msgpack")
+    )
+    writer.write(EVENT)
+    writer.write(EVENT)
+    writer.close()
+
+    # Events are written as length-prefixed records, which can be replayed.
+    source = FailedEventsSource(
+        FailedEventsSourceConfig(paths=[str(tmp_path)], format="msgpack"),
+        PipelineContext(pipeline_name="test-replay", graph=None),
+    )
+    events = list(source.events())
+    assert [event.event for event in events] == [EVENT.event, EVENT.event]
+    assert [event.meta["replay"]["line"] for event in events] == [0, 1]
@@ -0,0 +1,81 @@
+# Copyright 2021 Acryl Data, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from datahub_actions.event.event_envelope import EventEnvelope
+from datahub_actions.pipeline.pipeline_context import PipelineContext
+from datahub_actions.plugin.dead_letter.kafka.kafka_dead_letter_writer import (
+    KafkaDeadLetterWriter,
+    KafkaDeadLetterWriterConfig,
+)
+from tests.unit.test_helpers import metadata_change_log_event
+
+
+def test_write_produces_to_dead_letter_topic():
+    writer = KafkaDeadLetterWriter(
+        KafkaDeadLetterWriterConfig(topic="FailedEvents_v1"),
+        PipelineContext(pipeline_name="test-pipeline", graph=None),
+    )
+    writer.producer = MagicMock()
+    writer.producer.flush.return_value = 0
+    event = EventEnvelope("MetadataChangeLogEvent_v1", metadata_change_log_event, {})
+
+    writer.write(event)
+    writer.close()
+
+    writer.producer.produce.assert_called_once()
+    args, kwargs = writer.producer.produce.call_args
+    assert args == ("FailedEvents_v1",)
+    assert kwargs["value"] == event.as_json().encode("utf-8")
+    assert kwargs["headers"] == [("pipeline_name", b"test-pipeline")]
+    writer.producer.flush.assert_called_once()
+
+    # Nothing may be written once the writer has been closed.
+    with pytest.raises(Exception, match="writer has been closed"):
+        writer.write(event)
+
+
+def test_delivery_failures_are_raised_from_flush_with_the_failed_event():
+    writer = KafkaDeadLetterWriter(
+        KafkaDeadLetterWriterConfig(topic="FailedEvents_v1"),
+        PipelineContext(pipeline_name="test-pipeline", graph=None),
+    )
+    producer = MagicMock()
+    writer.producer = producer
+    failed_event = EventEnvelope(
+        "MetadataChangeLogEvent_v1", metadata_change_log_event, {"name": "failed"}
+    )
+    next_event = EventEnvelope(
+        "MetadataChangeLogEvent_v1", metadata_change_log_event, {"name": "next"}
+    )
+
+    writer.write(failed_event)
+    _, kwargs = producer.produce.call_args
+    kwargs["on_delivery"]("Broker: Message size too large", None)
+
+    # The failure isn't blamed on the next event written.
+    writer.write(next_event)
+    producer.flush.return_value = 0
+    with pytest.raises(
+        Exception,
+        match="Failed to deliver 1 failed events .* Message size too large: .*'name': 'failed'",
+    ):
+        writer.flush()
+
+    # Each failure is only reported once.
+    writer.flush()
@@ -0,0 +1,145 @@
+# Copyright 2021 Acryl Data, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import gzip
+import os
+import time
+
+from datahub_actions.event.event_envelope import EventEnvelope
+from datahub_actions.pipeline.pipeline_context import PipelineContext
+from datahub_actions.plugin.source.failed_events.failed_events_source import (
+    FailedEventsSource,
+    FailedEventsSourceConfig,
+)
+from tests.unit.test_helpers import metadata_change_log_event
+
+
+def _build_line(name: str) -> str:
+    return (
+        EventEnvelope(
+            "MetadataChangeLogEvent_v1", metadata_change_log_event, {"name": name}
+        ).as_json()
+        + "\n"
+    )
+
+
+def _write_failed_events(directory: str) -> None:
+    # A rotated, compressed file followed by the active file.
+    rotated_file_path = os.path.join(directory, "failed_events.log.20240101T000000")
+    with gzip.open(rotated_file_path + ".gz", "wt") as f:
+        f.write(_build_line("first") + _build_line("second"))
+    time.sleep(0.01)
+    with open(os.path.join(directory, "failed_events.log"), "w") as f:
+        f.write(_build_line("third") + "not json\n" + _build_line("fourth"))
+
+
+def _create_source(directory: str, checkpoint_file: str) -> FailedEventsSource:
+    return FailedEventsSource(
+        FailedEventsSourceConfig(paths=[directory], checkpoint_file=checkpoint_file),
+        PipelineContext(pipeline_name="test-replay", graph=None),
+    )
+
+
+def test_replays_rotated_and_active_files_in_order(tmp_path):
+    _write_failed_events(str(tmp_path))
+    source = _create_source(str(tmp_path), str(tmp_path / "checkpoint.json"))
+
+    events = list(source.events())
+
+    # Malformed lines are skipped.
+    assert [event.meta["name"] for event in events] == [
+        "first",
+        "second",
+        "third",
+        "fourth",
+    ]
+    assert events[0].meta["replay"]["line"] == 0
+    assert events[3].meta["replay"]["line"] == 2
+
+
+def test_resumes_from_checkpoint(tmp_path):
+    failed_events_dir = tmp_path / "failed_events"
+    failed_events_dir.mkdir()
+    _write_failed_events(str(failed_events_dir))
+    checkpoint_file = str(tmp_path / "checkpoint.json")
+
+    # Ack the first and third events only, then stop.
+    source = _create_source(str(failed_events_dir), checkpoint_file)
+    events = list(source.events())
+    source.ack(events[0])
+    source.ack(events[2])
+    source.close()
+
+    # Each file resumes from its first event which was not acked.
+    resumed_source = _create_source(str(failed_events_dir), checkpoint_file)
+    resumed_events = list(resumed_source.events())
+    assert [event.meta["name"] for event in resumed_events] == ["second", "fourth"]
+
+
+def test_resumes_from_checkpoint_after_rotation(tmp_path):
+    failed_events_dir = tmp_path / "failed_events"
+    failed_events_dir.mkdir()
+    _write_failed_events(str(failed_events_dir))
+    checkpoint_file = str(tmp_path / "checkpoint.json")
+
+    # Ack the first event of the active file only, then stop.
+    source = _create_source(str(failed_events_dir), checkpoint_file)
+    events = list(source.events())
+    for event in events[:3]:
+        source.ack(event)
+    source.close()
+
+    # Meanwhile, the active file is rotated and compressed, and a new active file is started.
+    active_file_path = os.path.join(str(failed_events_dir), "failed_events.log")
+    with open(active_file_path, "r") as f:
+        active_lines = f.read()
+    with gzip.open(active_file_path + ".20240102T000000.gz", "wt") as f:
+        f.write(active_lines)
+    time.sleep(0.01)
+    with open(active_file_path, "w") as f:
+        f.write(_build_line("fifth"))
+
+    # The rotated file resumes where the active file left off, and the new active file is replayed in full.
+    resumed_source = _create_source(str(failed_events_dir), checkpoint_file)
+    resumed_events = list(resumed_source.events())
+    assert [event.meta["name"] for event in resumed_events] == ["fourth", "fifth"]
+
+
+def test_files_starting_with_the_same_event_are_checkpointed_apart(tmp_path):
+    # The active file starts with the same event as the rotated one, e.g. because its replay failed again.
+    rotated_file_path = tmp_path / "failed_events.log.20240101T000000"
+    rotated_file_path.write_text(_build_line("first") + _build_line("second"))
+    time.sleep(0.01)
+    active_file_path = tmp_path / "failed_events.log"
+    active_file_path.write_text(_build_line("first") + _build_line("third"))
+    # The checkpoint is kept alongside the failed events files.
+    checkpoint_file = str(tmp_path / "replay.checkpoint")
+    (tmp_path / ".hidden").write_text(_build_line("hidden"))
+
+    source = _create_source(str(tmp_path), checkpoint_file)
+    events = list(source.events())
+    for event in events[:2]:
+        source.ack(event)
+    source.close()
+    (tmp_path / "replay.checkpoint.tmp").write_text("{}")
+
+    # Only the rotated file was fully replayed, and neither the checkpoint nor other files are read as failed events.
+    resumed_source = _create_source(str(tmp_path), checkpoint_file)
+    assert resumed_source._file_paths == [
+        str(rotated_file_path),
+        str(active_file_path),
+    ]
+    resumed_events = list(resumed_source.events())
+    assert [event.meta["name"] for event in resumed_events] == ["first", "third"]
@@ -0,0 +1,119 @@
+# Copyright 2021 Acryl Data, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+import json
+import os
+from typing import Tuple
+from unittest.mock import MagicMock
+
+import datahub.metadata.schemas
+from confluent_kafka.schema_registry import Schema
+from fastavro import parse_schema, schemaless_writer
+
+from datahub_actions.plugin.source.kafka.avro_decoder import CachingAvroDecoder
+from datahub_actions.plugin.source.kafka.kafka_event_source import (
+    build_metadata_change_log_event,
+)
+from tests.unit.test_helpers import TestMessage
+
+MCL_SCHEMA_PATH = os.path.join(
+    os.path.dirname(datahub.metadata.schemas.__file__), "MetadataChangeLog.avsc"
+)
+
+MCL_VALUE = {
+    "auditHeader": None,
+    "entityType": "dataset",
+    "entityUrn": "urn:li:dataset:(urn:li:dataPlatform:hdfs,SampleHdfsDataset,PROD)",
+    "entityKeyAspect": None,
+    "changeType": "UPSERT",
+    "aspectName": "status",
+    "aspect": {"value": b'{"removed": false}', "contentType": "application/json"},
+    "systemMetadata": None,
+    "previousAspectValue": None,
+    "previousSystemMetadata": None,
+    "created": {"time": 1651593944068, "actor": "urn:li:corpuser:UNKNOWN"},
+}
+
+
+def _load_schema_str() -> str:
+    with open(MCL_SCHEMA_PATH) as schema_file:
+        return schema_file.read()
+
+
+def _encode(schema_id: int, value: dict) -> bytes:
+    out = io.BytesIO()
+    out.write(bytes([0]) + schema_id.to_bytes(4, "big"))
+    schemaless_writer(out, parse_schema(json.loads(_load_schema_str())), value)
+    return out.getvalue()
+
+
+def _build_decoder() -> Tuple[CachingAvroDecoder, MagicMock, MagicMock]:
+    schema_registry_client = MagicMock()
+    schema_registry_client.get_schema.return_value = Schema(_load_schema_str(), "AVRO")
+    fallback = MagicMock()
+    return (
+        CachingAvroDecoder(schema_registry_client, fallback=fallback),
+        schema_registry_client,
+        fallback,
+    )
+
+
+def test_decodes_into_metadata_change_log_event():
+    decoder, _, _ = _build_decoder()
+
+    value = decoder(_encode(42, MCL_VALUE), None)
+
+    assert value["entityUrn"] == MCL_VALUE["entityUrn"]
+    # Unions decode to (record name, value) tuples, as with confluent's AvroDeserializer.
+    assert value["aspect"][0] == "com.linkedin.pegasus2avro.mxe.GenericAspect"
+    event = build_metadata_change_log_event(TestMessage(value))
+    assert event.entityType == "dataset"
+    assert event.aspectName == "status"
+    assert event.created is not None and event.created.time == 1651593944068
+
+
+def test_caches_writer_schema_per_schema_id():
+    decoder, schema_registry_client, fallback = _build_decoder()
+
+    for _ in range(3):
+        decoder(_encode(42, MCL_VALUE), None)
+    decoder(_encode(43, MCL_VALUE), None)
+
+    assert [
+        call.args[0] for call in schema_registry_client.get_schema.call_args_list
+    ] == [42, 43]
+    fallback.assert_not_called()
+
+
+def test_falls_back_on_unknown_framing():
+    decoder, schema_registry_client, fallback = _build_decoder()
+    fallback.return_value = {"decoded": "by fallback"}
+
+    assert decoder(b"\x01unframed value", None) == {"decoded": "by fallback"}
+    assert decoder(None, None) is None
+    schema_registry_client.get_schema.assert_not_called()
+
+
+def test_falls_back_on_schema_references():
+    decoder, schema_registry_client, fallback = _build_decoder()
+    schema_registry_client.get_schema.return_value = Schema(
+        _load_schema_str(), "AVRO", references=[MagicMock()]
+    )
+    fallback.return_value = {"decoded": "by fallback"}
+
+    encoded = _encode(42, MCL_VALUE)
+    assert decoder(encoded, None) == {"decoded": "by fallback"}
+    assert decoder(encoded, None) == {"decoded": "by fallback"}
+    schema_registry_client.get_schema.assert_called_once()
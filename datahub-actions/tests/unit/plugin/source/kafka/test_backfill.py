@@ -0,0 +1,158 @@
+# Copyright 2021 Acryl Data, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from unittest.mock import MagicMock
+
+from confluent_kafka import OFFSET_END, OFFSET_INVALID, TopicPartition
+
+from datahub_actions.plugin.source.kafka.backfill import KafkaBackfill
+from datahub_actions.plugin.source.kafka.kafka_event_source import (
+    KafkaEventSource,
+    KafkaEventSourceConfig,
+    SizeRecordingDeserializer,
+)
+from tests.unit.test_helpers import TestMessage, pipeline_context
+
+
+def test_assign_seeks_to_start_bounds():
+    consumer = MagicMock()
+    consumer.offsets_for_times.return_value = [
+        TopicPartition("mcl", 0, 42),
+        TopicPartition("mcl", 1, -1),
+    ]
+    backfill = KafkaBackfill(
+        start_timestamp=1000,
+        start_offsets={"pe": {0: 7}},
+        end_offsets={"mcl": {0: 45, 1: 10}},
+    )
+    partitions = [
+        TopicPartition("mcl", 0),
+        TopicPartition("mcl", 1),
+        TopicPartition("pe", 0),
+    ]
+
+    backfill.assign(consumer, partitions)
+
+    # Explicit offsets take precedence over timestamps.
+    lookups = consumer.offsets_for_times.call_args.args[0]
+    assert [(tp.topic, tp.partition, tp.offset) for tp in lookups] == [
+        ("mcl", 0, 1000),
+        ("mcl", 1, 1000),
+    ]
+    assert [tp.offset for tp in partitions] == [42, OFFSET_END, 7]
+
+
+def test_assign_resumes_from_committed_offsets_within_bounds():
+    consumer = MagicMock()
+    backfill = KafkaBackfill(
+        start_offsets={"mcl": {0: 10, 1: 10, 2: 10, 3: 10}},
+        end_offsets={"mcl": {0: 50, 1: 50, 2: 50, 3: 50}},
+    )
+    partitions = [TopicPartition("mcl", partition) for partition in range(4)]
+    consumer.committed.return_value = [TopicPartition("mcl", 0, OFFSET_INVALID)]
+
+    backfill.assign(consumer, partitions)
+    assert [tp.offset for tp in partitions] == [10, 10, 10, 10]
+
+    # The partitions are reassigned after partial progress, e.g. after a rebalance or a restart.
+    backfill.release([("mcl", partition) for partition in range(4)])
+    consumer.committed.return_value = [
+        TopicPartition("mcl", 0, 25),
+        TopicPartition("mcl", 1, 50),
+        TopicPartition("mcl", 2, 5),
+        TopicPartition("mcl", 3, OFFSET_INVALID),
+    ]
+    partitions = [TopicPartition("mcl", partition) for partition in range(4)]
+
+    backfill.assign(consumer, partitions)
+
+    # Committed offsets outside the bounds, e.g. from before the backfill, are ignored.
+    assert [tp.offset for tp in partitions] == [25, 50, 10, 10]
+    assert backfill.is_finished("mcl", 1)
+    assert not backfill.is_finished("mcl", 0)
+
+
+def test_partitions_finish_at_end_offsets():
+    backfill = KafkaBackfill(end_offsets={"mcl": {0: 45, 1: 10}})
+    backfill.assign(MagicMock(), [TopicPartition("mcl", 0), TopicPartition("mcl", 1)])
+    assert backfill.is_bounded
+
+    assert backfill.accepts("mcl", 0, 44, None)
+    assert not backfill.accepts("mcl", 0, 45, None)
+    assert not backfill.accepts("mcl", 0, 44, None)
+    assert not backfill.finished
+
+    # A partition whose end bound is the end of its log finishes without a message beyond it.
+    backfill.on_partition_eof("mcl", 1, 10)
+    assert backfill.finished
+
+
+def test_partitions_finish_at_end_timestamp():
+    consumer = MagicMock()
+    consumer.offsets_for_times.return_value = [
+        TopicPartition("mcl", 0, 12),
+        TopicPartition("mcl", 1, -1),
+    ]
+    consumer.get_watermark_offsets.return_value = (0, 30)
+    backfill = KafkaBackfill(end_timestamp=1000)
+    backfill.assign(consumer, [TopicPartition("mcl", 0), TopicPartition("mcl", 1)])
+
+    assert backfill.accepts("mcl", 0, 11, 999)
+    assert not backfill.accepts("mcl", 0, 12, 1000)
+
+    # Nothing was produced on partition 1 since the end timestamp, so it ends at its high watermark.
+    assert backfill.accepts("mcl", 1, 29, 999)
+    backfill.on_partition_eof("mcl", 1, 30)
+    assert backfill.finished
+
+
+def test_source_stops_once_backfill_range_is_consumed():
+    source = KafkaEventSource(
+        KafkaEventSourceConfig.parse_obj(
+            {
+                "connection": {"bootstrap": "localhost:9092"},
+                "topic_routes": {"pe": "pe_topic"},
+                "max_batch_size": 10,
+                "start_offsets": {"pe_topic": {0: 1}},
+                "end_offsets": {"pe_topic": {0: 3}},
+            }
+        ),
+        pipeline_context,
+    )
+    source.consumer.close()
+    source._value_deserializer = SizeRecordingDeserializer(
+        lambda value, ctx: {
+            "name": "entityChangeEvent",
+            "payload": {
+                "contentType": "application/json",
+                "value": b'{"entityUrn": "urn:li:dataset:abc","entityType": "dataset","category": "TAG","operation": "ADD","modifier": "urn:li:tag:PII","auditStamp": {"actor": "urn:li:corpuser:jdoe","time": 1649953100653},"version":0}',
+            },
+        }
+    )
+    source.consumer = MagicMock()
+    messages = [
+        TestMessage({"topic": "pe_topic", "partition": 0, "offset": offset})
+        for offset in range(1, 5)
+    ]
+    source.consumer.consume.return_value = messages
+    partitions = [TopicPartition("pe_topic", 0)]
+    source._on_assign(source.consumer, partitions)
+    source.consumer.assign.assert_called_once_with(partitions)
+    assert partitions[0].offset == 1
+
+    events = list(source.events())
+
+    assert [event.meta["kafka"]["offset"] for event in events] == [1, 2]
+    source.consumer.pause.assert_called_once_with([TopicPartition("pe_topic", 0)])
+    assert not source.running
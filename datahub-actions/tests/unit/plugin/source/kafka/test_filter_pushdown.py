@@ -0,0 +1,187 @@
+# Copyright 2021 Acryl Data, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from unittest.mock import MagicMock
+
+from datahub_actions.pipeline.pipeline_config import FilterConfig
+from datahub_actions.plugin.source.kafka.filter_pushdown import (
+    KafkaFilterPushdown,
+    SkippedOffsetTracker,
+)
+from datahub_actions.plugin.source.kafka.kafka_event_source import (
+    KafkaEventSource,
+    KafkaEventSourceConfig,
+    SizeRecordingDeserializer,
+)
+from tests.unit.test_helpers import TestMessage, pipeline_context
+
+
+def _build_mcl_value(entity_type: str) -> dict:
+    return {
+        "auditHeader": None,
+        "entityType": entity_type,
+        "entityUrn": f"urn:li:{entity_type}:abc",
+        "entityKeyAspect": None,
+        "changeType": "UPSERT",
+        "aspectName": "status",
+        "aspect": None,
+        "systemMetadata": None,
+        "previousAspectValue": None,
+        "previousSystemMetadata": None,
+        "created": None,
+    }
+
+
+def test_pushdown_event_type():
+    pushdown = KafkaFilterPushdown(
+        FilterConfig(event_type="MetadataChangeLogEvent_v1", event=None)
+    )
+    assert pushdown.accepts_mcl
+    assert not pushdown.accepts_pe
+    assert pushdown.matches_mcl(_build_mcl_value("dataset"))
+
+    pushdown = KafkaFilterPushdown(
+        FilterConfig(
+            event_type=["EntityChangeEvent_v1", "MetadataChangeLogEvent_v1"],
+            event=None,
+        )
+    )
+    assert pushdown.accepts_mcl
+    assert pushdown.accepts_pe
+
+    pushdown = KafkaFilterPushdown(
+        FilterConfig(event_type="EntityChangeEvent_v1", event=None)
+    )
+    assert not pushdown.matches_mcl(_build_mcl_value("dataset"))
+
+
+def test_pushdown_mcl_fields():
+    pushdown = KafkaFilterPushdown(
+        FilterConfig(
+            event_type="MetadataChangeLogEvent_v1",
+            event={
+                "entityType": "dataHubExecutionRequest",
+                "changeType": ["UPSERT", "CREATE"],
+            },
+        )
+    )
+    assert pushdown.matches_mcl(_build_mcl_value("dataHubExecutionRequest"))
+    assert not pushdown.matches_mcl(_build_mcl_value("dataset"))
+
+
+def test_pushdown_mcl_field_operators():
+    pushdown = KafkaFilterPushdown(
+        FilterConfig(
+            event_type="MetadataChangeLogEvent_v1",
+            event={
+                "entityUrn": {"$prefix": ["urn:li:dataset:", "urn:li:chart:"]},
+                "entityType": {"$not": "chart"},
+            },
+        )
+    )
+    assert pushdown.matches_mcl(_build_mcl_value("dataset"))
+    assert not pushdown.matches_mcl(_build_mcl_value("chart"))
+    assert not pushdown.matches_mcl(_build_mcl_value("dashboard"))
+
+
+def test_pushdown_ignores_fields_it_cannot_evaluate():
+    # Nested and non primitive fields are left to the FilterTransformer.
+    pushdown = KafkaFilterPushdown(
+        FilterConfig(
+            event_type="MetadataChangeLogEvent_v1",
+            event={
+                "aspect": {"value": {"status": True}},
+                "systemMetadata": {"runId": "run"},
+            },
+        )
+    )
+    assert pushdown.matches_mcl(_build_mcl_value("dataset"))
+
+
+def test_skipped_offsets_wait_for_outstanding_events():
+    tracker = SkippedOffsetTracker()
+
+    # Nothing outstanding, the skipped offset can be committed right away.
+    assert tracker.on_skip("mcl", 0, 1)
+
+    tracker.on_yield("mcl", 0, 2)
+    # Event 2 is still being processed, so skipped offsets behind it must wait for its ack.
+    assert not tracker.on_skip("mcl", 0, 3)
+    assert not tracker.on_skip("mcl", 0, 4)
+    assert tracker.resolve_ack("mcl", 0, 2) == 4
+
+    # Other partitions are tracked independently.
+    assert tracker.on_skip("mcl", 1, 7)
+
+
+def test_skipped_offsets_are_not_folded_into_earlier_acks():
+    tracker = SkippedOffsetTracker()
+    tracker.on_yield("mcl", 0, 1)
+    tracker.on_yield("mcl", 0, 2)
+    assert not tracker.on_skip("mcl", 0, 3)
+
+    # Event 2 is still outstanding when event 1 is acked.
+    assert tracker.resolve_ack("mcl", 0, 1) == 1
+    assert tracker.resolve_ack("mcl", 0, 2) == 3
+
+
+def test_source_skips_messages_which_cannot_match():
+    source = KafkaEventSource(
+        KafkaEventSourceConfig.parse_obj(
+            {
+                "connection": {"bootstrap": "localhost:9092"},
+                "topic_routes": {"mcl": "mcl_topic"},
+                "max_batch_size": 10,
+            }
+        ),
+        pipeline_context,
+    )
+    source.consumer.close()
+    consumer = MagicMock()
+    source.consumer = consumer
+    source._value_deserializer = SizeRecordingDeserializer(lambda value, ctx: value)
+    source.push_down_filter(
+        FilterConfig(
+            event_type="MetadataChangeLogEvent_v1",
+            event={"entityType": "dataHubExecutionRequest"},
+        )
+    )
+    messages = []
+    for offset, entity_type in enumerate(
+        ["dataset", "dataHubExecutionRequest", "dataset", "dataset"], start=1
+    ):
+        message = TestMessage({"topic": "mcl_topic", "partition": 0, "offset": offset})
+        message.set_value(_build_mcl_value(entity_type))
+        messages.append(message)
+
+    def consume(num_messages: int, timeout: float) -> list:
+        if consumer.consume.call_count == 1:
+            return messages
+        source.running = False
+        return []
+
+    consumer.consume.side_effect = consume
+
+    events = list(source.events())
+    assert [event.meta["kafka"]["offset"] for event in events] == [2]
+    consumer.commit.assert_not_called()
+
+    # Acking the only event also commits the messages skipped after it.
+    source.ack(events[0])
+    consumer.commit.assert_called_once()
+    assert consumer.commit.call_args.kwargs["offsets"][0].offset == 5
+
+    # The skipped message before it is superseded, so closing doesn't move the committed offset backwards.
+    source.close()
+    consumer.commit.assert_called_once()
@@ -12,8 +12,29 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from datahub_actions.plugin.source.kafka.kafka_event_source import KafkaEventSource
-from tests.unit.test_helpers import TestMessage
+import queue
+import time
+from typing import Callable, Optional
+from unittest.mock import MagicMock
+
+from confluent_kafka import DeserializingConsumer, TopicPartition
+from prometheus_client import REGISTRY
+
+from datahub_actions.event.event_envelope import EventEnvelope
+from datahub_actions.plugin.source.kafka.kafka_event_source import (
+    KafkaEventSource,
+    KafkaEventSourceConfig,
+    KafkaMessageObserver,
+    SizeRecordingDeserializer,
+    build_kafka_meta,
+    with_message_size,
+)
+from datahub_actions.plugin.source.kafka.offset_committer import OffsetCommitter
+from tests.unit.test_helpers import (
+    TestMessage,
+    metadata_change_log_event,
+    pipeline_context,
+)
 
 
 def test_handle_mcl():
@@ -71,3 +92,347 @@ def test_handle_entity_event():
     result = list(KafkaEventSource.handle_pe(msg))[0]
     assert result is not None
     assert result.event_type == "EntityChangeEvent_v1"
+
+
+def test_ack_batch_commits_highest_offset_per_partition():
+    source = KafkaEventSource.__new__(KafkaEventSource)
+    source.consumer = MagicMock()
+
+    events = [
+        EventEnvelope(
+            "MetadataChangeLogEvent_v1",
+            metadata_change_log_event,
+            {"kafka": {"topic": "mcl", "partition": partition, "offset": offset}},
+        )
+        for partition, offset in [(0, 5), (1, 3), (0, 7), (0, 6), (1, 2)]
+    ]
+    source.ack_batch(events)
+
+    source.consumer.commit.assert_called_once()
+    committed = {
+        (tp.topic, tp.partition): tp.offset
+        for tp in source.consumer.commit.call_args.kwargs["offsets"]
+    }
+    assert committed == {("mcl", 0): 8, ("mcl", 1): 4}
+    assert all(
+        isinstance(tp, TopicPartition)
+        for tp in source.consumer.commit.call_args.kwargs["offsets"]
+    )
+
+
+def test_records_message_size():
+    deserializer = SizeRecordingDeserializer(lambda value, ctx: {"decoded": True})
+    assert deserializer(b"0123456789", None) == {"decoded": True}
+    assert deserializer.last_value_size == 10
+
+    events = list(
+        with_message_size(
+            [
+                EventEnvelope(
+                    "MetadataChangeLogEvent_v1",
+                    metadata_change_log_event,
+                    {"kafka": {"topic": "mcl"}},
+                )
+            ],
+            deserializer.last_value_size,
+        )
+    )
+    assert events[0].meta["kafka"]["size"] == 10
+
+
+def test_records_deserialize_latency():
+    latency_metric = MagicMock()
+    deserializer = SizeRecordingDeserializer(
+        lambda value, ctx: {"decoded": True}, latency_metric
+    )
+    assert deserializer(b"0123456789", None) == {"decoded": True}
+    latency_metric.observe.assert_called_once()
+    assert latency_metric.observe.call_args.args[0] >= 0
+
+
+def test_configured_value_deserializer_takes_precedence():
+    def value_deserializer(value: Optional[bytes], ctx: object) -> dict:
+        return {"decoded": "by configured deserializer"}
+
+    for max_batch_size in [1, 10]:
+        source = KafkaEventSource(
+            KafkaEventSourceConfig.parse_obj(
+                {
+                    "connection": {
+                        "bootstrap": "localhost:9092",
+                        "consumer_config": {"value.deserializer": value_deserializer},
+                    },
+                    "max_batch_size": max_batch_size,
+                }
+            ),
+            pipeline_context,
+        )
+        source.consumer.close()
+        assert source._value_deserializer.deserializer is value_deserializer
+
+
+def test_build_kafka_meta_records_timestamp():
+    msg = TestMessage({"timestamp": 1651593944068})
+    assert build_kafka_meta(msg)["kafka"]["timestamp"] == 1651593944068
+
+
+def test_message_observer_records_offsets_and_counts():
+    observer = KafkaMessageObserver("observer_pipeline")
+
+    def sample(name: str, labels: dict) -> Optional[float]:
+        return REGISTRY.get_sample_value(
+            name, {"pipeline_name": "observer_pipeline", **labels}
+        )
+
+    observer.observe(TestMessage({"topic": "mcl", "partition": 0, "offset": 4}))
+    observer.observe(None)
+    assert sample("kafka_offset", {"topic": "mcl", "partition": "0"}) == 4
+    assert sample("kafka_messages_total", {"error": "False"}) == 1
+
+    error_message = MagicMock()
+    error_message.error.return_value = "Broker unavailable"
+    observer.observe_batch(
+        [
+            TestMessage({"topic": "mcl", "partition": 0, "offset": 6}),
+            TestMessage({"topic": "mcl", "partition": 0, "offset": 5}),
+            TestMessage({"topic": "mcl", "partition": 1, "offset": 2}),
+            error_message,
+        ]
+    )
+    assert sample("kafka_offset", {"topic": "mcl", "partition": "0"}) == 6
+    assert sample("kafka_offset", {"topic": "mcl", "partition": "1"}) == 2
+    assert sample("kafka_messages_total", {"error": "False"}) == 4
+    assert sample("kafka_messages_total", {"error": "True"}) == 1
+
+
+def test_consume_batches():
+    source = KafkaEventSource(
+        KafkaEventSourceConfig.parse_obj(
+            {
+                "connection": {"bootstrap": "localhost:9092"},
+                "topic_routes": {"pe": "pe_topic"},
+                "max_batch_size": 10,
+            }
+        ),
+        pipeline_context,
+    )
+    # Batches are consumed through a plain consumer, which leaves deserialization to the source.
+    assert not isinstance(source.consumer, DeserializingConsumer)
+    source.consumer.close()
+
+    entity_change_event_value = {
+        "name": "entityChangeEvent",
+        "payload": {
+            "contentType": "application/json",
+            "value": b'{"entityUrn": "urn:li:dataset:abc","entityType": "dataset","category": "TAG","operation": "ADD","modifier": "urn:li:tag:PII","auditStamp": {"actor": "urn:li:corpuser:jdoe","time": 1649953100653},"version":0}',
+        },
+    }
+    source._value_deserializer = SizeRecordingDeserializer(
+        lambda value, ctx: entity_change_event_value
+    )
+    messages = [
+        TestMessage({"topic": "pe_topic", "offset": 1}),
+        TestMessage({"topic": "unknown_topic", "offset": 2}),
+        TestMessage({"topic": "pe_topic", "offset": 3}),
+    ]
+    for message in messages:
+        message.set_value(b"0123456789")
+
+    def consume(num_messages: int, timeout: float) -> list:
+        assert num_messages == 10
+        if consumer.consume.call_count == 1:
+            return messages
+        source.running = False
+        return []
+
+    consumer = MagicMock()
+    consumer.consume.side_effect = consume
+    source.consumer = consumer
+
+    events = list(source.events())
+
+    assert [event.meta["kafka"]["offset"] for event in events] == [1, 3]
+    assert all(event.event_type == "EntityChangeEvent_v1" for event in events)
+    assert all(event.meta["kafka"]["size"] == 10 for event in events)
+
+
+def _wait_until(condition: Callable[[], bool], timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "Timed out waiting for condition"
+        time.sleep(0.01)
+
+
+def test_poll_thread_pauses_partitions_while_buffer_is_full():
+    source = KafkaEventSource(
+        KafkaEventSourceConfig.parse_obj(
+            {
+                "connection": {"bootstrap": "localhost:9092"},
+                "topic_routes": {"mcl": "mcl_topic"},
+                "poll_buffer_size": 2,
+            }
+        ),
+        pipeline_context,
+    )
+    source.consumer.close()
+    consumer = MagicMock()
+    source.consumer = consumer
+    assignment = [TopicPartition("mcl_topic", 0)]
+    consumer.assignment.return_value = assignment
+    offsets = iter(range(6))
+
+    def poll(timeout: float) -> Optional[TestMessage]:
+        # Paused partitions return no messages.
+        offset = None if source._paused else next(offsets, None)
+        if offset is None:
+            time.sleep(timeout)
+            return None
+        message = TestMessage({"topic": "mcl_topic", "partition": 0, "offset": offset})
+        message.set_value({"entityType": "dataset", "changeType": "UPSERT"})
+        return message
+
+    consumer.poll.side_effect = poll
+    events = iter(source.events())
+
+    # The action is slow to take events, so the poll thread fills the buffer and pauses the partitions.
+    assert next(events).meta["kafka"]["offset"] == 0
+    _wait_until(lambda: consumer.pause.called)
+    consumer.pause.assert_called_with(assignment)
+    consumer.resume.assert_not_called()
+
+    # Once the buffer drains, the partitions are resumed and the remaining events are fetched.
+    received = [next(events).meta["kafka"]["offset"] for _ in range(5)]
+    assert received == [1, 2, 3, 4, 5]
+    consumer.resume.assert_called_with(assignment)
+
+    source.close()
+    assert source._poll_thread is not None and not source._poll_thread.is_alive()
+    consumer.close.assert_called_once()
+
+
+def test_backpressure_only_resumes_partitions_it_paused():
+    source = KafkaEventSource(
+        KafkaEventSourceConfig.parse_obj(
+            {
+                "connection": {"bootstrap": "localhost:9092"},
+                "topic_routes": {"mcl": "mcl_topic"},
+                "poll_buffer_size": 2,
+                "end_offsets": {"mcl_topic": {0: 10, 1: 10}},
+            }
+        ),
+        pipeline_context,
+    )
+    source.consumer.close()
+    consumer = MagicMock()
+    source.consumer = consumer
+    partitions = [TopicPartition("mcl_topic", 0), TopicPartition("mcl_topic", 1)]
+    source._on_assign(consumer, partitions)
+    consumer.assignment.return_value = partitions
+    poll_buffer: "queue.Queue[EventEnvelope]" = queue.Queue()
+    source._poll_buffer = poll_buffer
+
+    # Filling the buffer pauses all assigned partitions.
+    poll_buffer.put(_build_event(0, 0))
+    poll_buffer.put(_build_event(1, 0))
+    source._apply_backpressure()
+    consumer.pause.assert_called_once_with(partitions)
+
+    # Meanwhile, a buffered message beyond the end of the backfill range pauses partition 1 for good.
+    message = TestMessage({"topic": "mcl_topic", "partition": 1, "offset": 10})
+    assert not source._in_backfill_range(message)
+
+    # Once the buffer drains, only the partition which is still being backfilled is resumed.
+    poll_buffer.get()
+    source._apply_backpressure()
+    consumer.resume.assert_called_once_with([TopicPartition("mcl_topic", 0)])
+    assert not source._paused
+
+
+def _build_event(partition: int, offset: int) -> EventEnvelope:
+    return EventEnvelope(
+        "MetadataChangeLogEvent_v1",
+        metadata_change_log_event,
+        {"kafka": {"topic": "mcl", "partition": partition, "offset": offset}},
+    )
+
+
+def test_cooperative_sticky_assigns_incrementally():
+    source = KafkaEventSource(
+        KafkaEventSourceConfig.parse_obj(
+            {
+                "connection": {
+                    "bootstrap": "localhost:9092",
+                    "consumer_config": {
+                        "partition.assignment.strategy": "cooperative-sticky"
+                    },
+                },
+            }
+        ),
+        pipeline_context,
+    )
+    source.consumer.close()
+    consumer = MagicMock()
+    partitions = [TopicPartition("mcl", 1)]
+
+    source._on_assign(consumer, partitions)
+
+    consumer.incremental_assign.assert_called_once_with(partitions)
+    consumer.assign.assert_not_called()
+    consumer.pause.assert_not_called()
+
+    # Partitions assigned while the poll buffer is full are paused straight away.
+    source._paused = True
+    source._on_assign(consumer, partitions)
+    consumer.pause.assert_called_once_with(partitions)
+
+
+def test_revoke_flushes_offsets_and_drops_events_of_revoked_partitions():
+    source = KafkaEventSource.__new__(KafkaEventSource)
+    source.consumer = MagicMock()
+    source._offset_committer = OffsetCommitter(
+        source.consumer, max_events=1000, interval_ms=60000
+    )
+    source._poll_buffer = queue.Queue()
+    for partition, offset in [(0, 3), (1, 7), (0, 4)]:
+        source._poll_buffer.put(_build_event(partition, offset))
+    source.ack(_build_event(0, 2))
+
+    source._on_revoke(source.consumer, [TopicPartition("mcl", 0)])
+
+    # Progress on the revoked partition is committed before it changes owner.
+    source.consumer.commit.assert_called_once()
+    assert source.consumer.commit.call_args.kwargs["asynchronous"] is False
+    assert [
+        event.meta["kafka"]["partition"] for event in source._poll_buffer.queue
+    ] == [1]
+
+    # Events of the revoked partition acked afterwards are no longer committed.
+    source.ack(_build_event(0, 3))
+    source.ack(_build_event(1, 7))
+    source.close()
+    assert source.consumer.commit.call_count == 2
+    committed = {
+        (tp.topic, tp.partition): tp.offset
+        for tp in source.consumer.commit.call_args.kwargs["offsets"]
+    }
+    assert committed == {("mcl", 1): 8}
+
+    # Once assigned again, the partition's events are committed as usual.
+    source._on_assign(source.consumer, [TopicPartition("mcl", 0)])
+    source.ack_batch([_build_event(0, 5)])
+    source._offset_committer.flush()
+    assert source.consumer.commit.call_count == 3
+
+
+def test_lost_partitions_are_not_committed():
+    source = KafkaEventSource.__new__(KafkaEventSource)
+    source.consumer = MagicMock()
+    source._offset_committer = OffsetCommitter(
+        source.consumer, max_events=1000, interval_ms=60000
+    )
+    source.ack(_build_event(0, 2))
+
+    source._on_lost(source.consumer, [TopicPartition("mcl", 0)])
+    source.close()
+
+    source.consumer.commit.assert_not_called()
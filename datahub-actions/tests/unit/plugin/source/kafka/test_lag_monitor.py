@@ -0,0 +1,105 @@
+# Copyright 2021 Acryl Data, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Optional
+from unittest.mock import MagicMock
+
+from confluent_kafka import OFFSET_INVALID, TopicPartition
+from prometheus_client import REGISTRY
+
+from datahub_actions.plugin.source.kafka.lag_monitor import ConsumerLagMonitor
+
+
+def _lag(pipeline_name: str, partition: int) -> Optional[float]:
+    return REGISTRY.get_sample_value(
+        "kafka_consumer_lag",
+        {"topic": "mcl", "partition": str(partition), "pipeline_name": pipeline_name},
+    )
+
+
+def _build_consumer() -> MagicMock:
+    consumer = MagicMock()
+    consumer.position.return_value = [
+        TopicPartition("mcl", 0, 90),
+        TopicPartition("mcl", 1, 40),
+        TopicPartition("mcl", 2, OFFSET_INVALID),
+        TopicPartition("mcl", 3, 10),
+    ]
+    consumer.get_watermark_offsets.side_effect = lambda tp, cached: {
+        0: (0, 100),
+        1: (0, 40),
+        3: (OFFSET_INVALID, OFFSET_INVALID),
+    }[tp.partition]
+    return consumer
+
+
+def test_exports_lag_per_partition_and_in_total():
+    monitor = ConsumerLagMonitor("lag_pipeline", interval_ms=60000)
+
+    monitor.update(_build_consumer())
+
+    assert _lag("lag_pipeline", 0) == 10
+    assert _lag("lag_pipeline", 1) == 0
+    # Partitions nothing was fetched from yet are not reported.
+    assert _lag("lag_pipeline", 2) is None
+    assert _lag("lag_pipeline", 3) is None
+    assert monitor.total_lag == 10
+    assert (
+        REGISTRY.get_sample_value(
+            "kafka_consumer_total_lag", {"pipeline_name": "lag_pipeline"}
+        )
+        == 10
+    )
+
+    monitor.forget([("mcl", 0)])
+    assert _lag("lag_pipeline", 0) is None
+    assert _lag("lag_pipeline", 1) == 0
+
+
+def test_measures_lag_once_per_interval():
+    consumer = _build_consumer()
+    monitor = ConsumerLagMonitor("interval_pipeline", interval_ms=60000)
+
+    monitor.maybe_update(consumer)
+    monitor.maybe_update(consumer)
+
+    consumer.position.assert_called_once()
+    # Watermarks are read from the consumer's cache, rather than requested from the broker.
+    for _, kwargs in consumer.get_watermark_offsets.call_args_list:
+        assert kwargs == {"cached": True}
+
+
+def test_ready_once_lag_is_below_threshold():
+    consumer = _build_consumer()
+    assert ConsumerLagMonitor("ready_pipeline", interval_ms=0).is_ready()
+
+    monitor = ConsumerLagMonitor("ready_pipeline", interval_ms=0, max_ready_lag=5)
+    # Not ready until the lag has been measured.
+    assert not monitor.is_ready()
+    monitor.maybe_update(consumer)
+    assert not monitor.is_ready()
+
+    consumer.position.return_value = [TopicPartition("mcl", 0, 97)]
+    monitor.maybe_update(consumer)
+    assert monitor.is_ready()
+
+
+def test_failed_measurement_does_not_interrupt_polling():
+    consumer = MagicMock()
+    consumer.position.side_effect = Exception("Broker unavailable")
+    monitor = ConsumerLagMonitor("failing_pipeline", interval_ms=0, max_ready_lag=5)
+
+    monitor.maybe_update(consumer)
+
+    assert not monitor.is_ready()
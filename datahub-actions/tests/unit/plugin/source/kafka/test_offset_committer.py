@@ -0,0 +1,113 @@
+# Copyright 2021 Acryl Data, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from unittest.mock import MagicMock
+
+from datahub_actions.event.event_envelope import EventEnvelope
+from datahub_actions.plugin.source.kafka.kafka_event_source import KafkaEventSource
+from datahub_actions.plugin.source.kafka.offset_committer import OffsetCommitter
+from tests.unit.test_helpers import metadata_change_log_event
+
+
+def _committed(consumer: MagicMock) -> dict:
+    return {
+        (tp.topic, tp.partition): tp.offset
+        for tp in consumer.commit.call_args.kwargs["offsets"]
+    }
+
+
+def test_commits_highest_offset_once_max_events_acked():
+    consumer = MagicMock()
+    committer = OffsetCommitter(consumer, max_events=3, interval_ms=60000)
+
+    committer.ack("mcl", 0, 5)
+    committer.ack("mcl", 0, 4)
+    consumer.commit.assert_not_called()
+
+    committer.ack("mcl", 1, 2)
+    consumer.commit.assert_called_once()
+    assert consumer.commit.call_args.kwargs["asynchronous"] is True
+    assert _committed(consumer) == {("mcl", 0): 6, ("mcl", 1): 3}
+
+
+def test_commits_once_interval_elapsed():
+    consumer = MagicMock()
+    committer = OffsetCommitter(consumer, max_events=1000, interval_ms=0)
+
+    committer.ack("mcl", 0, 5)
+
+    consumer.commit.assert_called_once()
+    assert _committed(consumer) == {("mcl", 0): 6}
+
+    # Nothing left to commit.
+    committer.maybe_commit()
+    consumer.commit.assert_called_once()
+
+
+def test_flush_commits_synchronously():
+    consumer = MagicMock()
+    committer = OffsetCommitter(consumer, max_events=1000, interval_ms=60000)
+
+    committer.ack_many([("mcl", 0, 7), ("pe", 2, 1)], event_count=10)
+    consumer.commit.assert_not_called()
+
+    committer.flush()
+    consumer.commit.assert_called_once()
+    assert consumer.commit.call_args.kwargs["asynchronous"] is False
+    assert _committed(consumer) == {("mcl", 0): 8, ("pe", 2): 2}
+
+
+def test_forget_drops_pending_offsets():
+    consumer = MagicMock()
+    committer = OffsetCommitter(consumer, max_events=1000, interval_ms=60000)
+
+    committer.ack_many([("mcl", 0, 7), ("mcl", 1, 1)])
+    committer.forget([("mcl", 0)])
+    committer.flush()
+
+    assert _committed(consumer) == {("mcl", 1): 2}
+
+
+def test_failed_commit_is_logged():
+    consumer = MagicMock()
+    consumer.commit.side_effect = Exception("Broker unavailable")
+    committer = OffsetCommitter(consumer, max_events=1, interval_ms=60000)
+
+    committer.ack("mcl", 0, 5)
+
+    consumer.commit.assert_called_once()
+
+
+def test_source_defers_commits_until_close():
+    source = KafkaEventSource.__new__(KafkaEventSource)
+    source.consumer = MagicMock()
+    source._offset_committer = OffsetCommitter(
+        source.consumer, max_events=1000, interval_ms=60000
+    )
+
+    for offset in range(3):
+        source.ack(
+            EventEnvelope(
+                "MetadataChangeLogEvent_v1",
+                metadata_change_log_event,
+                {"kafka": {"topic": "mcl", "partition": 0, "offset": offset}},
+            )
+        )
+    source.consumer.commit.assert_not_called()
+
+    source.close()
+
+    source.consumer.commit.assert_called_once()
+    assert _committed(source.consumer) == {("mcl", 0): 3}
+    source.consumer.close.assert_called_once()
@@ -0,0 +1,212 @@
+# Copyright 2021 Acryl Data, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Iterable, List
+
+from datahub_actions.event.event_envelope import EventEnvelope
+from datahub_actions.event.event_registry import (
+    ENTITY_CHANGE_EVENT_V1_TYPE,
+    EntityChangeEvent,
+)
+from datahub_actions.pipeline.pipeline_config import FilterConfig
+from datahub_actions.pipeline.pipeline_context import PipelineContext
+from datahub_actions.plugin.source.shared import shared_event_source
+from datahub_actions.plugin.source.shared.shared_event_source import (
+    SharedEventSource,
+)
+from datahub_actions.source.event_source import EventSource
+from datahub_actions.source.event_source_registry import event_source_registry
+
+
+class FakeEventSource(EventSource):
+    def __init__(self, events: List[EventEnvelope]):
+        self._events = events
+        self.acked: List[EventEnvelope] = []
+        self.closed = False
+
+    @classmethod
+    def create(cls, config_dict: dict, ctx: PipelineContext) -> "EventSource":
+        raise NotImplementedError()
+
+    def events(self) -> Iterable[EventEnvelope]:
+        yield from self._events
+
+    def ack(self, event: EventEnvelope) -> None:
+        self.acked.append(event)
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def _build_event(offset: int, category: str) -> EventEnvelope:
+    event = EntityChangeEvent.from_obj(
+        {
+            "entityType": "dataset",
+            "entityUrn": f"urn:li:dataset:(urn:li:dataPlatform:hive,table{offset},PROD)",
+            "category": category,
+            "operation": "ADD",
+            "auditStamp": {"time": 0, "actor": "urn:li:corpuser:datahub"},
+            "version": 0,
+        }
+    )
+    return EventEnvelope(
+        ENTITY_CHANGE_EVENT_V1_TYPE,
+        event,
+        {"kafka": {"topic": "topic", "partition": 0, "offset": offset}},
+    )
+
+
+def _create_sources(monkeypatch, underlying, categories):
+    monkeypatch.setattr(
+        shared_event_source, "create_event_source", lambda config, ctx: underlying
+    )
+    config = {"name": "shared", "source": {"type": "fake", "config": {}}}
+    sources = {}
+    for pipeline_name, category in categories.items():
+        source = SharedEventSource.create(config, PipelineContext(pipeline_name, None))
+        source.push_down_filter(
+            FilterConfig(
+                event_type=ENTITY_CHANGE_EVENT_V1_TYPE,
+                event={"category": category},
+            )
+        )
+        sources[pipeline_name] = source
+    return sources
+
+
+def test_shared_source_is_registered():
+    assert event_source_registry.get("shared") is SharedEventSource
+
+
+def test_routes_events_to_matching_pipelines_only(monkeypatch):
+    events = [
+        _build_event(0, "TAG"),
+        _build_event(1, "GLOSSARY_TERM"),
+        _build_event(2, "OWNER"),
+        _build_event(3, "TAG"),
+    ]
+    underlying = FakeEventSource(events)
+    sources = _create_sources(
+        monkeypatch, underlying, {"tags": "TAG", "terms": "GLOSSARY_TERM"}
+    )
+
+    tag_events = list(sources["tags"].events())
+    term_events = list(sources["terms"].events())
+
+    assert tag_events == [events[0], events[3]]
+    assert term_events == [events[1]]
+
+    for source in sources.values():
+        source.close()
+    assert underlying.closed
+
+
+def test_acks_underlying_source_in_order_once_all_pipelines_ack(monkeypatch):
+    events = [_build_event(0, "TAG"), _build_event(1, "OWNER"), _build_event(2, "TAG")]
+    underlying = FakeEventSource(events)
+    sources = _create_sources(
+        monkeypatch, underlying, {"first": "TAG", "second": "TAG"}
+    )
+
+    first_events = list(sources["first"].events())
+    second_events = list(sources["second"].events())
+    assert underlying.acked == []
+
+    sources["first"].ack_batch(first_events)
+    assert underlying.acked == []
+
+    # The unmatched event is only acked once the event before it is.
+    sources["second"].ack(second_events[0])
+    assert underlying.acked == events[:2]
+
+    sources["second"].close()
+    assert underlying.acked == events[:2]
+    assert not underlying.closed
+
+    sources["first"].close()
+    assert underlying.acked == events[:2]
+    assert underlying.closed
+
+
+def test_released_pipeline_holds_back_acks_of_events_it_did_not_process(monkeypatch):
+    events = [
+        _build_event(0, "TAG"),
+        _build_event(1, "TAG"),
+        _build_event(2, "OWNER"),
+        _build_event(3, "TAG"),
+    ]
+    underlying = FakeEventSource(events)
+    sources = _create_sources(
+        monkeypatch, underlying, {"failing": "TAG", "healthy": "TAG"}
+    )
+
+    failing_events = list(sources["failing"].events())
+    healthy_events = list(sources["healthy"].events())
+
+    # The failing pipeline processes the first event, then throws on the second and is released.
+    sources["failing"].ack(failing_events[0])
+    sources["failing"].close()
+    assert underlying.acked == []
+
+    # The healthy pipeline acking every event doesn't commit past the event the failing one never processed.
+    sources["healthy"].ack_batch(healthy_events)
+    assert underlying.acked == events[:1]
+
+    sources["healthy"].close()
+    assert underlying.acked == events[:1]
+    assert underlying.closed
+
+
+def test_each_pipeline_receives_its_own_envelope(monkeypatch):
+    events = [_build_event(0, "TAG")]
+    underlying = FakeEventSource(events)
+    sources = _create_sources(
+        monkeypatch, underlying, {"first": "TAG", "second": "TAG"}
+    )
+
+    first_event = list(sources["first"].events())[0]
+    second_event = list(sources["second"].events())[0]
+    assert first_event == second_event == events[0]
+    assert first_event is not second_event
+
+    # The decoded event is shared, while changing the meta of one envelope doesn't affect the others.
+    assert first_event.event is second_event.event is events[0].event
+    first_event.meta["replay"] = {"line": 1}
+    assert "replay" not in second_event.meta
+
+    sources["first"].ack(first_event)
+    sources["second"].ack(second_event)
+    assert underlying.acked == [events[0]]
+    assert "replay" not in underlying.acked[0].meta
+
+    for source in sources.values():
+        source.close()
+
+
+def test_acks_underlying_source_without_holding_router_lock(monkeypatch):
+    events = [_build_event(0, "TAG")]
+    underlying = FakeEventSource(events)
+    sources = _create_sources(monkeypatch, underlying, {"tags": "TAG"})
+    router = sources["tags"].router  # type: ignore
+    locked_while_acking = []
+    monkeypatch.setattr(
+        underlying,
+        "ack",
+        lambda event: locked_while_acking.append(router._lock.locked()),
+    )
+
+    sources["tags"].ack_batch(list(sources["tags"].events()))
+
+    assert locked_while_acking == [False]
+    sources["tags"].close()
@@ -0,0 +1,139 @@
+# Copyright 2021 Acryl Data, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import itertools
+import json
+from typing import Any
+
+from datahub.metadata.schema_classes import DictWrapper
+
+from datahub_actions.event.event import Event
+from datahub_actions.event.event_envelope import EventEnvelope
+from datahub_actions.pipeline.pipeline_config import FilterConfig
+from datahub_actions.plugin.transform.filter.filter_index import FilterIndex
+from datahub_actions.plugin.transform.filter.filter_transformer import (
+    FilterTransformer,
+    FilterTransformerConfig,
+)
+
+
+class TestEvent(Event, DictWrapper):
+    def __init__(self, field1: Any, field2: Any):
+        super().__init__()
+        self._inner_dict["field1"] = field1
+        self._inner_dict["field2"] = field2
+
+    @classmethod
+    def from_obj(cls, obj: dict, tuples: bool = False) -> "TestEvent":
+        return cls(obj["field1"], obj["field2"])
+
+    def to_obj(self, tuples: bool = False) -> dict:
+        return self._inner_dict
+
+    @classmethod
+    def from_json(cls, json_str: str) -> "TestEvent":
+        json_obj = json.loads(json_str)
+        return TestEvent.from_obj(json_obj)
+
+    def as_json(self) -> str:
+        return json.dumps(self.to_obj())
+
+
+FILTERS = {
+    "a": {"event_type": "TestEvent", "event": {"field1": "a"}},
+    "a_or_b": {"event_type": "TestEvent", "event": {"field1": ["a", "b"]}},
+    "a_and_x": {"event_type": "TestEvent", "event": {"field1": "a", "field2": "x"}},
+    "nested": {"event_type": "TestEvent", "event": {"field2": {"inner": "y"}}},
+    "a_and_nested": {
+        "event_type": "TestEvent",
+        "event": {"field1": "a", "field2": {"inner": "y"}},
+    },
+    "not_a_prefix": {
+        "event_type": "TestEvent",
+        "event": {"field1": {"$not": {"$prefix": "a"}}},
+    },
+    "b_and_not_nested": {
+        "event_type": "TestEvent",
+        "event": {"field1": "b", "field2": {"$not": {"inner": "y"}}},
+    },
+    "any_test_event": {"event_type": "TestEvent", "event": None},
+    "other_type": {"event_type": ["OtherEvent"], "event": {"field1": "a"}},
+    "both_types": {"event_type": ["TestEvent", "OtherEvent"], "event": None},
+}
+
+
+def _build_index() -> FilterIndex:
+    index = FilterIndex()
+    for key, filter_dict in FILTERS.items():
+        index.add(key, FilterConfig.parse_obj(filter_dict))
+    return index
+
+
+def test_matches_same_events_as_filter_transformer():
+    index = _build_index()
+    transformers = {
+        key: FilterTransformer(FilterTransformerConfig.parse_obj(filter_dict))
+        for key, filter_dict in FILTERS.items()
+    }
+
+    field1_values = ["a", "b", "c", None, 1]
+    field2_values = ["x", {"inner": "y"}, {"inner": "z"}, None]
+    for event_type in ["TestEvent", "OtherEvent", "UnknownEvent"]:
+        for field1, field2 in itertools.product(field1_values, field2_values):
+            event = TestEvent(field1, field2)
+            envelope = EventEnvelope(event_type=event_type, event=event, meta={})
+            expected = {
+                key
+                for key, transformer in transformers.items()
+                if transformer.transform(envelope) is not None
+            }
+            assert index.match(event_type, event) == expected, (event_type, event)
+
+
+def test_keys_without_filter_match_every_event():
+    index = _build_index()
+    index.add("everything", None)
+
+    assert "everything" in index.match("UnknownEvent", TestEvent("c", None))
+
+
+def test_remove_and_replace_filters():
+    index = _build_index()
+    index.remove("a")
+    index.remove("missing")
+    index.add("a_or_b", FilterConfig.parse_obj(FILTERS["a"]))
+
+    matched = index.match("TestEvent", TestEvent("b", "x"))
+
+    assert "a" not in matched
+    assert "a_or_b" not in matched
+    assert "any_test_event" in matched
+
+
+def test_identical_residual_filters_are_evaluated_once():
+    index = FilterIndex()
+    for key in range(10):
+        index.add(key, FilterConfig.parse_obj(FILTERS["nested"]))
+
+    reads = []
+
+    class CountingEvent(TestEvent):
+        def get(self, field: str, default: Any = None) -> Any:
+            reads.append(field)
+            return super().get(field, default)
+
+    matched = index.match("TestEvent", CountingEvent("a", {"inner": "y"}))
+
+    assert matched == set(range(10))
+    assert reads == ["field2"]
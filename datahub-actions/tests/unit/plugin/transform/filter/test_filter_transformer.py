@@ -13,15 +13,29 @@
 # limitations under the License.
 
 import json
-from typing import Any
-
-from datahub.metadata.schema_classes import DictWrapper
+import logging
+from typing import Any, List
+
+import pytest
+from datahub.configuration.common import ConfigurationError
+from datahub.metadata.schema_classes import (
+    AuditStampClass,
+    DictWrapper,
+    GenericAspectClass,
+    MetadataChangeLogClass,
+)
 
 from datahub_actions.event.event import Event
 from datahub_actions.event.event_envelope import EventEnvelope
 from datahub_actions.event.event_registry import (
     ENTITY_CHANGE_EVENT_V1_TYPE,
     METADATA_CHANGE_LOG_EVENT_V1_TYPE,
+    EntityChangeEvent,
+    LazyMetadataChangeLogEvent,
+    MetadataChangeLogEvent,
+)
+from datahub_actions.plugin.transform.filter import (
+    filter_transformer as filter_transformer_module,
 )
 from datahub_actions.plugin.transform.filter.filter_transformer import (
     FilterTransformer,
@@ -185,3 +199,203 @@ def test_no_match_when_list_filter_on_dict_obj():
         EventEnvelope(event_type=ENTITY_CHANGE_EVENT_V1_TYPE, event=test_event, meta={})
     )
     assert result is None
+
+
+def _execution_request_event() -> MetadataChangeLogEvent:
+    return MetadataChangeLogEvent.from_class(
+        MetadataChangeLogClass(
+            entityType="dataHubExecutionRequest",
+            changeType="UPSERT",
+            entityUrn="urn:li:dataHubExecutionRequest:1234",
+            aspectName="dataHubExecutionRequestInput",
+            aspect=GenericAspectClass(
+                value=b'{"task": "RUN_INGEST", "executorId": "default"}',
+                contentType="application/json",
+            ),
+            created=AuditStampClass(0, "urn:li:corpuser:datahub"),
+        )
+    )
+
+
+def test_matches_nested_json_aspect_value():
+    filter_transformer = FilterTransformer(
+        FilterTransformerConfig.parse_obj(
+            {
+                "event_type": "MetadataChangeLogEvent_v1",
+                "event": {
+                    "entityType": "dataHubExecutionRequest",
+                    "changeType": ["UPSERT", "CREATE"],
+                    "aspectName": "dataHubExecutionRequestInput",
+                    "aspect": {"value": {"executorId": "default"}},
+                },
+            }
+        )
+    )
+    event = _execution_request_event()
+    assert filter_transformer.transform(
+        EventEnvelope(METADATA_CHANGE_LOG_EVENT_V1_TYPE, event, {})
+    )
+
+    assert event.aspect is not None
+    event.aspect.value = b'{"task": "RUN_INGEST", "executorId": "remote"}'
+    assert (
+        filter_transformer.transform(
+            EventEnvelope(METADATA_CHANGE_LOG_EVENT_V1_TYPE, event, {})
+        )
+        is None
+    )
+
+
+def test_matches_same_events_as_json_representation():
+    event = _execution_request_event()
+    body = json.loads(event.as_json())
+    filters = [
+        {"aspect": {"contentType": "application/json"}},
+        {"aspect": {"value": {"task": ["RUN_INGEST"]}}},
+        {"aspect": {"value": "not json"}},
+        {"created": {"actor": "urn:li:corpuser:datahub", "time": 0}},
+        {"created": "urn:li:corpuser:datahub"},
+        {"previousAspectValue": None},
+        {"entityKeyAspect": {"value": "a"}},
+        {"changeType": ["UPSERT", 1]},
+    ]
+    for event_filter in filters:
+        filter_transformer = FilterTransformer(
+            FilterTransformerConfig.parse_obj(
+                {"event_type": METADATA_CHANGE_LOG_EVENT_V1_TYPE, "event": event_filter}
+            )
+        )
+        # The same event, with its fields as they appear in its JSON representation.
+        json_event = TestEvent(None, None)
+        json_event._inner_dict = body
+        assert (
+            filter_transformer.transform(
+                EventEnvelope(METADATA_CHANGE_LOG_EVENT_V1_TYPE, event, {})
+            )
+            is not None
+        ) == (
+            filter_transformer.transform(
+                EventEnvelope(METADATA_CHANGE_LOG_EVENT_V1_TYPE, json_event, {})
+            )
+            is not None
+        ), event_filter
+
+
+def test_matches_header_fields_without_building_lazy_event(caplog):
+    # Debug logging prints the whole event, which builds it.
+    caplog.set_level(logging.INFO, logger=filter_transformer_module.__name__)
+    filter_transformer = FilterTransformer(
+        FilterTransformerConfig.parse_obj(
+            {
+                "event_type": "MetadataChangeLogEvent_v1",
+                "event": {"entityType": "dataset", "changeType": "UPSERT"},
+            }
+        )
+    )
+    event = LazyMetadataChangeLogEvent(
+        {"entityType": "dataset", "changeType": "UPSERT", "aspectName": None}
+    )
+
+    assert filter_transformer.transform(
+        EventEnvelope(METADATA_CHANGE_LOG_EVENT_V1_TYPE, event, {})
+    )
+    assert not event.is_materialized
+
+
+def test_matches_entity_change_event_parameters():
+    filter_transformer = FilterTransformer(
+        FilterTransformerConfig.parse_obj(
+            {
+                "event_type": "EntityChangeEvent_v1",
+                "event": {
+                    "category": "TAG",
+                    "parameters": {"tagUrn": "urn:li:tag:pii"},
+                },
+            }
+        )
+    )
+    event = EntityChangeEvent.from_json(
+        json.dumps(
+            {
+                "entityType": "dataset",
+                "entityUrn": "urn:li:dataset:abc",
+                "category": "TAG",
+                "operation": "ADD",
+                "auditStamp": {"actor": "urn:li:corpuser:jdoe", "time": 0},
+                "version": 0,
+                "parameters": {"tagUrn": "urn:li:tag:pii"},
+            }
+        )
+    )
+
+    assert filter_transformer.transform(
+        EventEnvelope(ENTITY_CHANGE_EVENT_V1_TYPE, event, {})
+    )
+
+
+def _matches(event_filter: dict, field1: Any, field2: Any = None) -> bool:
+    filter_transformer = FilterTransformer(
+        FilterTransformerConfig.parse_obj(
+            {"event_type": "EntityChangeEvent_v1", "event": event_filter}
+        )
+    )
+    return (
+        filter_transformer.transform(
+            EventEnvelope(
+                event_type=ENTITY_CHANGE_EVENT_V1_TYPE,
+                event=TestEvent(field1, field2),
+                meta={},
+            )
+        )
+        is not None
+    )
+
+
+def test_matches_string_operators():
+    regex_filter = {"field1": {"$regex": ["^urn:li:tag:pii", "(?i)secret"]}}
+    assert _matches(regex_filter, "urn:li:tag:pii.email")
+    assert _matches(regex_filter, "urn:li:tag:TopSecret")
+    assert not _matches(regex_filter, "urn:li:tag:public")
+    assert not _matches(regex_filter, None)
+
+    glob_filter = {"field1": {"$glob": "urn:li:tag:tier?.*"}}
+    assert _matches(glob_filter, "urn:li:tag:tier1.gold")
+    assert not _matches(glob_filter, "urn:li:tag:tier10.gold")
+
+    prefix_filter = {"field1": {"$prefix": ["urn:li:tag:pii", "urn:li:tag:tier"]}}
+    assert _matches(prefix_filter, "urn:li:tag:pii")
+    assert _matches(prefix_filter, "urn:li:tag:tier1")
+    assert not _matches(prefix_filter, "urn:li:tag:p")
+    assert not _matches(prefix_filter, 1)
+
+
+def test_matches_range_and_negation_operators():
+    range_filter = {"field1": {"$gte": 1, "$lt": 10}}
+    assert _matches(range_filter, 1)
+    assert _matches(range_filter, 9.5)
+    assert not _matches(range_filter, 10)
+    assert not _matches(range_filter, "5")
+    assert not _matches(range_filter, True)
+
+    not_filter = {"field1": {"$not": ["a", "b"]}, "field2": {"$not": {"x": "y"}}}
+    assert _matches(not_filter, "c", {"x": "z"})
+    assert _matches(not_filter, None, None)
+    assert not _matches(not_filter, "a", {"x": "z"})
+    assert not _matches(not_filter, "c", {"x": "y"})
+
+    nested_filter = {"field2": {"name": {"$not": {"$prefix": "tmp_"}}}}
+    assert _matches(nested_filter, None, {"name": "orders"})
+    assert not _matches(nested_filter, None, {"name": "tmp_orders"})
+
+
+def test_rejects_invalid_operators():
+    event_filters: List[dict] = [
+        {"field1": {"$startswith": "a"}},
+        {"field1": {"$prefix": "a", "nested": "b"}},
+        {"field1": {"$regex": "("}},
+        {"field1": {"$prefix": []}},
+        {"field1": {"$gt": "1"}},
+    ]
+    for event_filter in event_filters:
+        with pytest.raises(ConfigurationError):
+            _matches(event_filter, "a")
@@ -12,9 +12,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
 import json
 import time
-from typing import Dict, Iterable, Optional
+from typing import Any, AsyncIterable, Dict, Iterable, List, Optional, Tuple
 
 from datahub.metadata.schema_classes import (
     AuditStampClass,
@@ -26,6 +27,7 @@ from datahub.metadata.schema_classes import (
 
 from datahub_actions.action.action import Action
 from datahub_actions.action.action_registry import action_registry
+from datahub_actions.action.async_action import AsyncAction
 from datahub_actions.event.event import Event
 from datahub_actions.event.event_envelope import EventEnvelope
 from datahub_actions.event.event_registry import (
@@ -33,6 +35,7 @@ from datahub_actions.event.event_registry import (
     MetadataChangeLogEvent,
 )
 from datahub_actions.pipeline.pipeline_context import PipelineContext
+from datahub_actions.source.async_event_source import AsyncEventSource
 from datahub_actions.source.event_source import EventSource
 from datahub_actions.source.event_source_registry import event_source_registry
 from datahub_actions.transform.transformer import Transformer
@@ -85,9 +88,19 @@ pipeline_context = PipelineContext(pipeline_name="test", graph=None)
 class TestMessage:
     def __init__(self, msg: Dict):
         self.msg: Dict = msg
+        self._value: Any = msg
 
-    def value(self) -> Dict:
-        return self.msg
+    def value(self) -> Any:
+        return self._value
+
+    def set_value(self, value: Any) -> None:
+        self._value = value
+
+    def error(self) -> None:
+        return None
+
+    def headers(self) -> None:
+        return None
 
     def topic(self) -> str:
         return self.msg.get("topic", "dummytopic")
@@ -98,6 +111,9 @@ class TestMessage:
     def partition(self) -> int:
         return self.msg.get("partition", 1)
 
+    def timestamp(self) -> Tuple[int, int]:
+        return (1, self.msg.get("timestamp", 1651593944068))
+
 
 class TestEvent(Event, DictWrapper):
     def __init__(self, field: str):
@@ -145,6 +161,32 @@ class TestEventSource(EventSource):
         pass
 
 
+class TestAsyncEventSource(AsyncEventSource):
+    """
+    Asynchronous Event Source used for testing which counts the number of ack invocations.
+    """
+
+    ack_count: int = 0
+    # How long producing each event takes, so that acks may arrive while the next event is awaited.
+    event_delay_s: float = 0.0
+
+    @classmethod
+    def create(cls, config_dict: dict, ctx: PipelineContext) -> "EventSource":
+        return TestAsyncEventSource()
+
+    async def events_async(self) -> AsyncIterable[EventEnvelope]:
+        for event in TestEventSource().events():
+            if self.event_delay_s:
+                await asyncio.sleep(self.event_delay_s)
+            yield event
+
+    async def ack_async(self, event: EventEnvelope) -> None:
+        self.ack_count = self.ack_count + 1
+
+    def close(self) -> None:
+        pass
+
+
 class TestTransformer(Transformer):
     """
     Transformer used for testing. This transformer simply inserts a smiley face
@@ -171,6 +213,7 @@ class TestAction(Action):
     ece_count: int = 0
     skipped_count: int = 0
     smiley_count: int = 0
+    batch_count: int = 0
 
     @classmethod
     def create(cls, config_dict: dict, ctx: PipelineContext) -> "Action":
@@ -197,6 +240,29 @@ class TestAction(Action):
         # Handle skipped events
         self.skipped_count = self.skipped_count + 1
 
+    def act_batch(self, events: List[EventEnvelope]) -> None:
+        # Increment a batch invocations counter.
+        self.batch_count = self.batch_count + 1
+        super().act_batch(events)
+
+    def close(self) -> None:
+        pass
+
+
+class TestAsyncAction(AsyncAction):
+    """
+    Asynchronous Action used for testing valid flows. This action simply counts the events it receives.
+    """
+
+    total_event_count: int = 0
+
+    @classmethod
+    def create(cls, config_dict: dict, ctx: PipelineContext) -> "Action":
+        return TestAsyncAction()
+
+    async def act_async(self, event_env: EventEnvelope) -> None:
+        self.total_event_count = self.total_event_count + 1
+
     def close(self) -> None:
         pass
 
@@ -257,12 +323,39 @@ class ThrowingTestAction(Action):
         pass
 
 
+class FlakyTestAction(Action):
+    """
+    Action used for testing retries. This action throws on its first invocation only,
+    and records the type of every event it processes successfully.
+    """
+
+    def __init__(self) -> None:
+        self.invocation_count = 0
+        self.processed_event_types: List[str] = []
+
+    @classmethod
+    def create(cls, config_dict: dict, ctx: PipelineContext) -> "Action":
+        return FlakyTestAction()
+
+    def act(self, event_env: EventEnvelope) -> None:
+        self.invocation_count = self.invocation_count + 1
+        if self.invocation_count == 1:
+            raise Exception("Ouch! Action code threw an exception.")
+        self.processed_event_types.append(event_env.event_type)
+
+    def close(self) -> None:
+        pass
+
+
 # Register test components.
 event_source_registry.register("test_source", TestEventSource)
 event_source_registry.register("stoppable_event_source", StoppableEventSource)
+event_source_registry.register("test_async_source", TestAsyncEventSource)
 
 transformer_registry.register("test_transformer", TestTransformer)
 transformer_registry.register("throwing_test_transformer", ThrowingTestTransformer)
 
 action_registry.register("test_action", TestAction)
+action_registry.register("test_async_action", TestAsyncAction)
 action_registry.register("throwing_test_action", ThrowingTestAction)
+action_registry.register("flaky_test_action", FlakyTestAction)
@@ -0,0 +1,42 @@
+# Copyright 2021 Acryl Data, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Callable, List, Tuple
+from wsgiref.util import setup_testing_defaults
+
+from datahub_actions.utils.monitoring_server import make_monitoring_app
+
+
+def _get(app: Callable, path: str) -> Tuple[str, bytes]:
+    environ: dict = {"PATH_INFO": path}
+    setup_testing_defaults(environ)
+    statuses: List[str] = []
+    body = b"".join(app(environ, lambda status, headers: statuses.append(status)))
+    return statuses[0], body
+
+
+def test_readiness_probe():
+    ready = False
+    app = make_monitoring_app(lambda: ready)
+
+    assert _get(app, "/ready") == ("503 Service Unavailable", b"not ready")
+    ready = True
+    assert _get(app, "/ready") == ("200 OK", b"ready")
+
+
+def test_serves_metrics():
+    status, body = _get(make_monitoring_app(lambda: True), "/metrics")
+
+    assert status.startswith("200")
+    assert b"# HELP" in body
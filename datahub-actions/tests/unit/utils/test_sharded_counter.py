@@ -0,0 +1,42 @@
+# Copyright 2021 Acryl Data, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+
+from datahub_actions.utils.sharded_counter import ShardedCounter
+
+
+def test_increment():
+    counter = ShardedCounter()
+    assert counter.value == 0
+    counter.increment()
+    counter.increment(4)
+    assert counter.value == 5
+
+
+def test_concurrent_increments_are_not_lost():
+    counter = ShardedCounter()
+
+    def increment_many() -> None:
+        for _ in range(10000):
+            counter.increment()
+
+    threads = [threading.Thread(target=increment_many) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # The shards of finished threads still count towards the total.
+    assert counter.value == 80000